@@ -2,16 +2,19 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_cors import CORS
+from app.utils.cache import ResponseCache
+from app.utils.sql import check_database_url
 from config import config
 import os
 
 db = SQLAlchemy()
 login_manager = LoginManager()
+response_cache = ResponseCache()
 
 @login_manager.user_loader
 def load_user(user_id):
     from app.models.user import User
-    user = User.query.get(int(user_id))
+    user = db.session.get(User, int(user_id))
     if user and not user.is_active:
         return None
     return user
@@ -22,14 +25,33 @@ def create_app(config_name='default'):
     
     CORS(app, supports_credentials=True)
     
+    check_database_url(app.config['SQLALCHEMY_DATABASE_URI'])
     db.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     
     with app.app_context():
-        from app.models import user, tenant, payment, template, sms_log, alert
+        from app.models import user, tenant, payment, template, sms_log, alert, tenant_month_balance, mpesa_inbox, stk_campaign, stk_push_request, sms_broadcast, search_document, invoice
         
-        from app.routes import auth_routes, tenant_routes, payment_routes, dashboard_routes, messaging_routes, mpesa_routes
+        response_cache.init_app(app, watched_models=(
+            payment.Payment,
+            tenant.Tenant,
+            alert.Alert,
+            tenant_month_balance.TenantMonthBalance,
+            invoice.Invoice
+        ))
+        response_cache.listen(db.session)
+        
+        from app.services import search_service
+        search_service.listen()
+        
+        from app.utils.instrumentation import request_metrics
+        request_metrics.init_app(app, db.engine)
+        
+        from app.utils.template_engine import template_cache
+        template_cache.lookup_ttl = app.config.get('TEMPLATE_LOOKUP_TTL', 60)
+        
+        from app.routes import auth_routes, tenant_routes, payment_routes, dashboard_routes, messaging_routes, mpesa_routes, search_routes, import_routes, invoice_routes, metrics_routes
         
         app.register_blueprint(auth_routes.bp)
         app.register_blueprint(tenant_routes.bp)
@@ -37,7 +59,20 @@ def create_app(config_name='default'):
         app.register_blueprint(dashboard_routes.bp)
         app.register_blueprint(messaging_routes.bp)
         app.register_blueprint(mpesa_routes.bp)
+        app.register_blueprint(search_routes.bp)
+        app.register_blueprint(import_routes.bp)
+        app.register_blueprint(invoice_routes.bp)
+        app.register_blueprint(metrics_routes.bp)
+        
+        from app.services.mpesa_inbox_service import mpesa_inbox_workers
+        mpesa_inbox_workers.init_app(app)
+        
+        from app.services.sms_outbox_service import sms_outbox_workers
+        sms_outbox_workers.init_app(app)
         
-        db.create_all()
+        from app.services.stk_campaign_service import stk_campaign_workers
+        stk_campaign_workers.init_app(app)
     
+    # No database I/O here: workers boot without touching the schema, which
+    # only migrate.py changes.
     return app
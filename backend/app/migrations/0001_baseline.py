@@ -0,0 +1,81 @@
+"""The schema as it stood before versioned migrations: users, tenants, payments, templates, sms_logs and alerts.
+
+Frozen here as DDL; tables and columns added since belong to the
+migrations that introduced them.
+"""
+
+TABLES = [
+    ('users', [
+        'username VARCHAR(80) NOT NULL',
+        'email VARCHAR(120) NOT NULL',
+        'password_hash VARCHAR(255) NOT NULL',
+        'role VARCHAR(20) NOT NULL',
+        'phone VARCHAR(20)',
+        'full_name VARCHAR(120)',
+        'is_active BOOLEAN',
+        'created_at TIMESTAMP',
+        'updated_at TIMESTAMP',
+        'UNIQUE (username)',
+        'UNIQUE (email)',
+    ]),
+    ('tenants', [
+        'full_name VARCHAR(120) NOT NULL',
+        'phone VARCHAR(20) NOT NULL',
+        'email VARCHAR(120)',
+        'unit_number VARCHAR(20) NOT NULL',
+        'expected_rent FLOAT NOT NULL',
+        'deposit_amount FLOAT',
+        'lease_start_date DATE NOT NULL',
+        'lease_end_date DATE NOT NULL',
+        'is_active BOOLEAN',
+        'notes TEXT',
+        'user_id INTEGER REFERENCES users (id)',
+        'created_at TIMESTAMP',
+        'updated_at TIMESTAMP',
+    ]),
+    ('payments', [
+        'tenant_id INTEGER NOT NULL REFERENCES tenants (id)',
+        'amount FLOAT NOT NULL',
+        'payment_date DATE NOT NULL',
+        'payment_method VARCHAR(20) NOT NULL',
+        'payment_status VARCHAR(20) NOT NULL',
+        'transaction_reference VARCHAR(100)',
+        'remaining_amount FLOAT',
+        'notes TEXT',
+        'logged_by INTEGER REFERENCES users (id)',
+        'receipt_sent BOOLEAN',
+        'created_at TIMESTAMP',
+        'updated_at TIMESTAMP',
+    ]),
+    ('templates', [
+        'name VARCHAR(100) NOT NULL',
+        'category VARCHAR(50) NOT NULL',
+        'theme VARCHAR(20) NOT NULL',
+        'content TEXT NOT NULL',
+        'is_active BOOLEAN',
+        'created_at TIMESTAMP',
+        'updated_at TIMESTAMP',
+    ]),
+    ('sms_logs', [
+        'recipient_phone VARCHAR(20) NOT NULL',
+        'recipient_name VARCHAR(120)',
+        'message TEXT NOT NULL',
+        'message_type VARCHAR(50)',
+        'status VARCHAR(20)',
+        'sent_by INTEGER REFERENCES users (id)',
+        'sent_at TIMESTAMP',
+    ]),
+    ('alerts', [
+        'alert_type VARCHAR(50) NOT NULL',
+        'message TEXT NOT NULL',
+        'severity VARCHAR(20)',
+        'is_read BOOLEAN',
+        'related_tenant_id INTEGER REFERENCES tenants (id)',
+        'related_payment_id INTEGER REFERENCES payments (id)',
+        'created_at TIMESTAMP',
+    ]),
+]
+
+def upgrade(migration):
+    for table, definitions in TABLES:
+        migration.create_table(table, definitions)
@@ -0,0 +1,4 @@
+"""Optional link from a tenant to the user account they log in with."""
+
+def upgrade(migration):
+    migration.add_column('tenants', 'user_id', 'INTEGER REFERENCES users (id)')
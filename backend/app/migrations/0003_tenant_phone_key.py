@@ -0,0 +1,13 @@
+"""Indexed national-number key used to match M-PESA payers to tenants."""
+from app.utils.phone import phone_key
+
+BATCH_SIZE = 1000
+
+def upgrade(migration):
+    migration.add_column('tenants', 'phone_key', 'VARCHAR(9)')
+    migration.create_index('ix_tenants_phone_key', 'tenants', ['phone_key'])
+
+    rows = migration.execute('SELECT id, phone FROM tenants WHERE phone_key IS NULL').fetchall()
+    updates = [{'id': row.id, 'phone_key': phone_key(row.phone)} for row in rows]
+    for start in range(0, len(updates), BATCH_SIZE):
+        migration.execute('UPDATE tenants SET phone_key = :phone_key WHERE id = :id', updates[start:start + BATCH_SIZE])
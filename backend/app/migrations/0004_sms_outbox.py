@@ -0,0 +1,15 @@
+"""Outbox bookkeeping on sms_logs: retries, backoff and worker claims."""
+
+COLUMNS = [
+    ('payment_id', 'INTEGER REFERENCES payments (id)'),
+    ('attempts', 'INTEGER DEFAULT 0'),
+    ('next_attempt_at', 'TIMESTAMP'),
+    ('last_error', 'TEXT'),
+    ('claim_token', 'VARCHAR(36)'),
+    ('claimed_at', 'TIMESTAMP'),
+]
+
+def upgrade(migration):
+    for name, definition in COLUMNS:
+        migration.add_column('sms_logs', name, definition)
+    migration.create_index('ix_sms_logs_status_next_attempt', 'sms_logs', ['status', 'next_attempt_at'])
@@ -0,0 +1,21 @@
+"""Bulk SMS broadcasts, with sms_logs rows linked to their tenant and to the broadcast that sent them."""
+
+BROADCAST_COLUMNS = [
+    'template_id INTEGER REFERENCES templates (id)',
+    'selector TEXT NOT NULL',
+    'message_type VARCHAR(50)',
+    'total INTEGER NOT NULL',
+    'created_by INTEGER REFERENCES users (id)',
+    'created_at TIMESTAMP',
+]
+
+COLUMNS = [
+    ('tenant_id', 'INTEGER REFERENCES tenants (id)'),
+    ('broadcast_id', 'INTEGER REFERENCES sms_broadcasts (id)'),
+]
+
+def upgrade(migration):
+    migration.create_table('sms_broadcasts', BROADCAST_COLUMNS)
+    for name, definition in COLUMNS:
+        migration.add_column('sms_logs', name, definition)
+    migration.create_index('ix_sms_logs_broadcast_id', 'sms_logs', ['broadcast_id'])
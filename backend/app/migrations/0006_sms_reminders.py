@@ -0,0 +1,5 @@
+"""Dedupe key so each automated reminder goes out at most once."""
+
+def upgrade(migration):
+    migration.add_column('sms_logs', 'dedupe_key', 'VARCHAR(100)')
+    migration.create_index('uq_sms_logs_dedupe_key', 'sms_logs', ['dedupe_key'], unique=True)
@@ -0,0 +1,101 @@
+"""The search_documents index and its trigram structures: pg_trgm GIN index on PostgreSQL, FTS5 table and triggers on SQLite.
+
+Existing tenants and payment references are indexed here, with the
+document format as it stood when the index was introduced.
+"""
+from app.utils.phone import phone_key
+import re
+
+BATCH_SIZE = 1000
+
+COLUMNS = [
+    'entity_type VARCHAR(20) NOT NULL',
+    'entity_id INTEGER NOT NULL',
+    'tenant_id INTEGER',
+    'label VARCHAR(200)',
+    'document TEXT NOT NULL',
+    'is_active BOOLEAN NOT NULL',
+    'CONSTRAINT uq_search_documents_entity UNIQUE (entity_type, entity_id)',
+]
+
+# PostgreSQL: trigram GIN index so '%term%' lookups stop scanning the table.
+POSTGRESQL_DDL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS ix_search_documents_trgm ON search_documents USING gin (document gin_trgm_ops)',
+]
+
+# SQLite: external-content FTS5 trigram table kept in step by triggers.
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5("
+    "document, content='search_documents', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts (rowid, document) VALUES (new.id, new.document); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts (search_documents_fts, rowid, document) VALUES ('delete', old.id, old.document); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts (search_documents_fts, rowid, document) VALUES ('delete', old.id, old.document); "
+    "INSERT INTO search_documents_fts (rowid, document) VALUES (new.id, new.document); END",
+]
+
+INSERT_DOCUMENT = (
+    'INSERT INTO search_documents (entity_type, entity_id, tenant_id, label, document, is_active) '
+    'VALUES (:entity_type, :entity_id, :tenant_id, :label, :document, :is_active)'
+)
+
+def normalise(value):
+    return ' '.join((value or '').lower().split())
+
+def tenant_document(row):
+    digits = re.sub(r'\D', '', row.phone or '')
+    return {
+        'entity_type': 'tenant',
+        'entity_id': row.id,
+        'tenant_id': row.id,
+        'label': f'{row.full_name} ({row.unit_number})',
+        'document': normalise(' '.join(filter(None, [
+            row.full_name, row.unit_number, row.email, digits, phone_key(row.phone)
+        ]))),
+        'is_active': row.is_active is None or bool(row.is_active)
+    }
+
+def payment_document(row):
+    return {
+        'entity_type': 'payment',
+        'entity_id': row.id,
+        'tenant_id': row.tenant_id,
+        'label': row.transaction_reference,
+        'document': normalise(row.transaction_reference),
+        'is_active': True
+    }
+
+def backfill(migration, query, document):
+    """Index rows of `query` (keyset-paged on id) that the app wrote before the index existed."""
+    last_id = 0
+    while True:
+        rows = migration.execute(query, {'last_id': last_id, 'limit': BATCH_SIZE}).fetchall()
+        if not rows:
+            return
+        migration.execute(INSERT_DOCUMENT, [document(row) for row in rows])
+        last_id = rows[-1].id
+
+def upgrade(migration):
+    migration.create_table('search_documents', COLUMNS)
+    migration.create_index('ix_search_documents_tenant_id', 'search_documents', ['tenant_id'])
+    for statement in {'postgresql': POSTGRESQL_DDL, 'sqlite': SQLITE_DDL}.get(migration.dialect, []):
+        migration.execute(statement)
+
+    if migration.execute('SELECT COUNT(*) FROM search_documents').scalar():
+        return
+    backfill(
+        migration,
+        'SELECT id, full_name, unit_number, email, phone, is_active FROM tenants '
+        'WHERE id > :last_id ORDER BY id LIMIT :limit',
+        tenant_document
+    )
+    backfill(
+        migration,
+        "SELECT id, tenant_id, transaction_reference FROM payments "
+        "WHERE id > :last_id AND transaction_reference IS NOT NULL AND transaction_reference <> '' "
+        "ORDER BY id LIMIT :limit",
+        payment_document
+    )
@@ -0,0 +1,12 @@
+"""Indexes behind the sorted, paginated tenant and user listings."""
+
+INDEXES = [
+    ('ix_tenants_active_full_name', 'tenants', ['is_active', 'full_name', 'id']),
+    ('ix_tenants_active_unit_number', 'tenants', ['is_active', 'unit_number', 'id']),
+    ('ix_tenants_active_lease_end', 'tenants', ['is_active', 'lease_end_date', 'id']),
+    ('ix_users_role_id', 'users', ['role', 'id']),
+]
+
+def upgrade(migration):
+    for name, table, columns in INDEXES:
+        migration.create_index(name, table, columns)
@@ -0,0 +1,23 @@
+"""The tenant_month_balance ledger, with the arrears carried into each month as opening_balance."""
+
+COLUMNS = [
+    'tenant_id INTEGER NOT NULL REFERENCES tenants (id)',
+    'year INTEGER NOT NULL',
+    'month INTEGER NOT NULL',
+    'opening_balance FLOAT NOT NULL DEFAULT 0',
+    'expected FLOAT NOT NULL',
+    'paid FLOAT NOT NULL',
+    'remaining FLOAT NOT NULL',
+    'status VARCHAR(20) NOT NULL',
+    'updated_at TIMESTAMP',
+    'CONSTRAINT uq_tenant_month_balance_period UNIQUE (tenant_id, year, month)',
+]
+
+def upgrade(migration):
+    payments = migration.execute('SELECT COUNT(*) FROM payments').scalar()
+    if migration.create_table('tenant_month_balance', COLUMNS):
+        if payments:
+            migration.notice('Run rebuild_ledger.py to build the ledger from existing payments')
+    elif migration.add_column('tenant_month_balance', 'opening_balance', 'FLOAT NOT NULL DEFAULT 0'):
+        migration.notice('Run rebuild_ledger.py to carry existing arrears forward into opening_balance')
+    migration.create_index('ix_tenant_month_balance_period', 'tenant_month_balance', ['year', 'month'])
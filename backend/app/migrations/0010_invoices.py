@@ -0,0 +1,36 @@
+"""Monthly rent invoices and the allocation of payments to them."""
+
+INVOICE_COLUMNS = [
+    'tenant_id INTEGER NOT NULL REFERENCES tenants (id)',
+    'year INTEGER NOT NULL',
+    'month INTEGER NOT NULL',
+    'period_start DATE NOT NULL',
+    'period_end DATE NOT NULL',
+    'amount FLOAT NOT NULL',
+    'paid_amount FLOAT NOT NULL',
+    'due_date DATE NOT NULL',
+    'status VARCHAR(20) NOT NULL',
+    'created_at TIMESTAMP',
+    'updated_at TIMESTAMP',
+    'CONSTRAINT uq_invoices_tenant_period UNIQUE (tenant_id, year, month)',
+]
+
+ALLOCATION_COLUMNS = [
+    'invoice_id INTEGER NOT NULL REFERENCES invoices (id)',
+    'payment_id INTEGER NOT NULL REFERENCES payments (id)',
+    'amount FLOAT NOT NULL',
+    'created_at TIMESTAMP',
+]
+
+def upgrade(migration):
+    migration.create_table('invoices', INVOICE_COLUMNS)
+    migration.create_index('ix_invoices_status_due_date', 'invoices', ['status', 'due_date'])
+    migration.create_index('ix_invoices_period', 'invoices', ['year', 'month'])
+    migration.create_table('invoice_payments', ALLOCATION_COLUMNS)
+    migration.create_index('ix_invoice_payments_invoice_id', 'invoice_payments', ['invoice_id'])
+    migration.create_index('ix_invoice_payments_payment_id', 'invoice_payments', ['payment_id'])
+
+    added = migration.add_column('payments', 'allocated_amount', 'FLOAT NOT NULL DEFAULT 0')
+    migration.create_index('ix_payments_tenant_date', 'payments', ['tenant_id', 'payment_date'])
+    if added and migration.execute('SELECT COUNT(*) FROM payments').scalar():
+        migration.notice('Run generate_invoices.py --since YYYY-MM to backfill invoices and allocate existing payments')
@@ -0,0 +1,28 @@
+"""One payment per M-PESA receipt number, so callback retries cannot double-count.
+
+Built CONCURRENTLY on PostgreSQL so payments stay writable while the
+index builds. A duplicate that lands after the check fails the build;
+the INVALID index it leaves is dropped when the migration is rerun.
+"""
+from app.migrations import MigrationError
+
+TRANSACTIONAL = False
+
+MPESA_REFERENCE_WHERE = (
+    "payment_method = 'M-PESA' AND transaction_reference IS NOT NULL AND transaction_reference <> ''"
+)
+
+def upgrade(migration):
+    duplicates = migration.execute(
+        f'SELECT COUNT(*) FROM (SELECT transaction_reference FROM payments WHERE {MPESA_REFERENCE_WHERE} '
+        'GROUP BY transaction_reference HAVING COUNT(*) > 1) AS duplicated'
+    ).scalar()
+    if duplicates:
+        raise MigrationError(
+            f'{duplicates} M-PESA receipts are recorded more than once; '
+            'run dedup_mpesa_payments.py --apply, then migrate again'
+        )
+    migration.create_index(
+        'uq_payments_mpesa_reference', 'payments', ['transaction_reference'],
+        unique=True, where=MPESA_REFERENCE_WHERE
+    )
@@ -0,0 +1,27 @@
+"""Composite indexes matched to the filters and sort order of the busiest routes.
+
+Built CONCURRENTLY on PostgreSQL so payments and sms_logs stay writable
+while the indexes build.
+"""
+
+TRANSACTIONAL = False
+
+INDEXES = [
+    # GET /api/payments: ORDER BY payment_date DESC, id DESC, keyset on the same pair
+    ('ix_payments_date_id', 'payments', ['payment_date', 'id']),
+    # GET /api/payments/audit-trail and its export: ORDER BY created_at DESC, id DESC
+    ('ix_payments_created_at_id', 'payments', ['created_at', 'id']),
+    # GET /api/dashboard/alerts: newest first, optionally unread only
+    ('ix_alerts_created_at', 'alerts', ['created_at']),
+    ('ix_alerts_is_read_created_at', 'alerts', ['is_read', 'created_at']),
+    # Alerts are re-pointed at the surviving payment when duplicates are removed
+    ('ix_alerts_related_payment_id', 'alerts', ['related_payment_id']),
+    # GET /api/messaging/sms-logs: newest first
+    ('ix_sms_logs_sent_at', 'sms_logs', ['sent_at']),
+    # Tenant <-> user account lookups when linking and on the tenant_profile backref
+    ('ix_tenants_user_id', 'tenants', ['user_id']),
+]
+
+def upgrade(migration):
+    for name, table, columns in INDEXES:
+        migration.create_index(name, table, columns)
@@ -0,0 +1,50 @@
+"""The M-PESA callback inbox and the bulk STK push campaign tables.
+
+Databases migrated before 0001 was frozen already have these from its
+old create_all(); this gives new databases the same tables.
+"""
+
+TABLES = [
+    ('mpesa_inbox', [
+        'payload TEXT NOT NULL',
+        'status VARCHAR(20) NOT NULL',
+        'attempts INTEGER NOT NULL',
+        'last_error TEXT',
+        'claim_token VARCHAR(36)',
+        'claimed_at TIMESTAMP',
+        'received_at TIMESTAMP',
+        'processed_at TIMESTAMP',
+    ]),
+    ('stk_campaigns', [
+        'scope VARCHAR(30) NOT NULL',
+        'status VARCHAR(20) NOT NULL',
+        'total INTEGER NOT NULL',
+        'created_by INTEGER REFERENCES users (id)',
+        'created_at TIMESTAMP',
+        'completed_at TIMESTAMP',
+    ]),
+    ('stk_push_requests', [
+        'campaign_id INTEGER NOT NULL REFERENCES stk_campaigns (id)',
+        'tenant_id INTEGER NOT NULL REFERENCES tenants (id)',
+        'phone VARCHAR(20) NOT NULL',
+        'amount FLOAT NOT NULL',
+        'status VARCHAR(20) NOT NULL',
+        'checkout_request_id VARCHAR(100)',
+        'error TEXT',
+        'created_at TIMESTAMP',
+        'updated_at TIMESTAMP',
+        'UNIQUE (checkout_request_id)',
+    ]),
+]
+
+INDEXES = [
+    ('ix_mpesa_inbox_status_id', 'mpesa_inbox', ['status', 'id']),
+    ('ix_mpesa_inbox_claim_token', 'mpesa_inbox', ['claim_token']),
+    ('ix_stk_push_requests_campaign_status', 'stk_push_requests', ['campaign_id', 'status']),
+]
+
+def upgrade(migration):
+    for table, definitions in TABLES:
+        migration.create_table(table, definitions)
+    for name, table, columns in INDEXES:
+        migration.create_index(name, table, columns)
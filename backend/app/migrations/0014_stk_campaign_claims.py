@@ -0,0 +1,4 @@
+"""Worker claims on stk_campaigns, so campaigns cut off by a restart are resumed."""
+
+def upgrade(migration):
+    migration.add_column('stk_campaigns', 'claimed_at', 'TIMESTAMP')
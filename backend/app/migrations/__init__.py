@@ -0,0 +1,160 @@
+"""Versioned schema migrations.
+
+Each module in this package named NNNN_description.py is one migration,
+applied in version order and recorded in schema_migrations. A module
+defines upgrade(migration) and may set TRANSACTIONAL = False when it
+builds indexes on large tables: on PostgreSQL those run CONCURRENTLY,
+which cannot happen inside a transaction.
+
+Migrations spell out their DDL rather than reading the models, so a
+migration keeps meaning what it meant when it was written. They are
+no-ops where the schema already matches, so databases set up with
+db.create_all() or the old migrate_*.py scripts can be brought under
+version control by simply running them all.
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, text
+import importlib
+import pkgutil
+import pytz
+import re
+
+MIGRATION_MODULE = re.compile(r'^(\d{4})_(\w+)$')
+# Arbitrary key for pg_advisory_lock so two deploys never migrate at once.
+ADVISORY_LOCK_KEY = 52_764_211
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', String(4), primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+class MigrationError(Exception):
+    pass
+
+class Migration:
+    """What a migration module's upgrade() gets: the connection plus idempotent DDL helpers."""
+
+    def __init__(self, version, name, module, connection):
+        self.version = version
+        self.name = name
+        self.module = module
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        self.transactional = getattr(module, 'TRANSACTIONAL', True)
+        self.notices = []
+
+    def execute(self, statement, parameters=None):
+        return self.connection.execute(text(statement), parameters or {})
+
+    def notice(self, message):
+        """A follow-up step for whoever runs the migration, printed once it is applied."""
+        self.notices.append(message)
+
+    def has_table(self, table):
+        return inspect(self.connection).has_table(table)
+
+    def has_column(self, table, column):
+        return column in {c['name'] for c in inspect(self.connection).get_columns(table)}
+
+    def create_table(self, table, definitions):
+        """CREATE TABLE IF NOT EXISTS with an auto-increment integer `id` key ahead of `definitions`."""
+        if self.has_table(table):
+            return False
+        id_column = 'id SERIAL PRIMARY KEY' if self.dialect == 'postgresql' else 'id INTEGER NOT NULL PRIMARY KEY'
+        self.execute(f'CREATE TABLE {table} ({", ".join([id_column] + list(definitions))})')
+        return True
+
+    def add_column(self, table, column, definition):
+        if self.has_column(table, column):
+            return False
+        self.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+        return True
+
+    def create_index(self, name, table, columns, unique=False, where=None):
+        """CREATE INDEX IF NOT EXISTS; CONCURRENTLY on PostgreSQL when the migration is not transactional."""
+        concurrently = self.dialect == 'postgresql' and not self.transactional
+        if concurrently:
+            # A failed concurrent build leaves an INVALID index that IF NOT EXISTS would keep.
+            invalid = self.execute(
+                'SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid '
+                'WHERE c.relname = :name AND NOT i.indisvalid', {'name': name}
+            ).first()
+            if invalid:
+                self.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+        self.execute(
+            f'CREATE {"UNIQUE " if unique else ""}INDEX {"CONCURRENTLY " if concurrently else ""}'
+            f'IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'
+            + (f' WHERE {where}' if where else '')
+        )
+
+def load_migrations():
+    """[(version, name, module)] for every migration module, in version order."""
+    migrations = []
+    for info in pkgutil.iter_modules(__path__):
+        match = MIGRATION_MODULE.match(info.name)
+        if match:
+            migrations.append((match.group(1), match.group(2), importlib.import_module(f'{__name__}.{info.name}')))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+def applied_versions(connection):
+    if not inspect(connection).has_table('schema_migrations'):
+        return {}
+    return {row.version: row.applied_at for row in connection.execute(schema_migrations.select())}
+
+def status(engine):
+    """[(version, name, applied_at or None)] for every known migration."""
+    with engine.connect() as connection:
+        applied = applied_versions(connection)
+    return [(version, name, applied.get(version)) for version, name, _ in load_migrations()]
+
+def pending(engine):
+    return [(version, name) for version, name, applied_at in status(engine) if applied_at is None]
+
+def upgrade(engine, target=None, log=print):
+    """Apply pending migrations up to and including `target` (default: all); returns the versions applied."""
+    applied_now = []
+    with engine.connect() as lock_connection:
+        if engine.dialect.name == 'postgresql':
+            lock_connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': ADVISORY_LOCK_KEY})
+            lock_connection.commit()
+        try:
+            with engine.begin() as connection:
+                schema_migrations.create(connection, checkfirst=True)
+                applied = applied_versions(connection)
+
+            for version, name, module in load_migrations():
+                if version in applied:
+                    continue
+                if target is not None and version > target:
+                    break
+                migration = _run(engine, version, name, module)
+                applied_now.append(version)
+                log(f'✅ Applied {version}_{name}')
+                for message in migration.notices:
+                    log(f'   {message}')
+        finally:
+            if engine.dialect.name == 'postgresql':
+                lock_connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': ADVISORY_LOCK_KEY})
+                lock_connection.commit()
+    return applied_now
+
+def _run(engine, version, name, module):
+    record = schema_migrations.insert().values(
+        version=version, name=name, applied_at=datetime.now(pytz.timezone('Africa/Nairobi'))
+    )
+    if getattr(module, 'TRANSACTIONAL', True):
+        with engine.begin() as connection:
+            migration = Migration(version, name, module, connection)
+            module.upgrade(migration)
+            connection.execute(record)
+        return migration
+
+    # Each statement commits on its own; helpers stay idempotent so a rerun after a failure is safe.
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        migration = Migration(version, name, module, connection)
+        module.upgrade(migration)
+        connection.execute(record)
+    return migration
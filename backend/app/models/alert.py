@@ -4,6 +4,11 @@ import pytz
 
 class Alert(db.Model):
     __tablename__ = 'alerts'
+    __table_args__ = (
+        db.Index('ix_alerts_created_at', 'created_at'),
+        db.Index('ix_alerts_is_read_created_at', 'is_read', 'created_at'),
+        db.Index('ix_alerts_related_payment_id', 'related_payment_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     alert_type = db.Column(db.String(50), nullable=False)
@@ -0,0 +1,82 @@
+from app import db
+from datetime import datetime
+import pytz
+
+INVOICE_STATUSES = ('open', 'partial', 'paid')
+OPEN_STATUSES = ('open', 'partial')
+
+class Invoice(db.Model):
+    """One rent charge per tenant per billing month, fixed at the rent that applied when it was issued."""
+    __tablename__ = 'invoices'
+    __table_args__ = (
+        db.UniqueConstraint('tenant_id', 'year', 'month', name='uq_invoices_tenant_period'),
+        db.Index('ix_invoices_status_due_date', 'status', 'due_date'),
+        db.Index('ix_invoices_period', 'year', 'month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    # Billed days; shorter than the month when the lease starts or ends mid-month.
+    period_start = db.Column(db.Date, nullable=False)
+    period_end = db.Column(db.Date, nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    paid_amount = db.Column(db.Float, nullable=False, default=0.0)
+    due_date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='open')
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')), onupdate=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
+
+    allocations = db.relationship('InvoicePayment', backref='invoice', lazy=True)
+
+    @staticmethod
+    def status_for(amount, paid_amount):
+        if paid_amount >= amount - 0.005:
+            return 'paid'
+        if paid_amount > 0:
+            return 'partial'
+        return 'open'
+
+    @property
+    def balance(self):
+        return max(self.amount - self.paid_amount, 0.0)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tenant_id': self.tenant_id,
+            'year': self.year,
+            'month': self.month,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'period_end': self.period_end.isoformat() if self.period_end else None,
+            'amount': self.amount,
+            'paid_amount': self.paid_amount,
+            'balance': self.balance,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class InvoicePayment(db.Model):
+    """The part of a payment applied to an invoice."""
+    __tablename__ = 'invoice_payments'
+    __table_args__ = (
+        db.Index('ix_invoice_payments_invoice_id', 'invoice_id'),
+        db.Index('ix_invoice_payments_payment_id', 'payment_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
+    payment_id = db.Column(db.Integer, db.ForeignKey('payments.id'), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'invoice_id': self.invoice_id,
+            'payment_id': self.payment_id,
+            'amount': self.amount,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,29 @@
+from app import db
+from datetime import datetime
+import pytz
+
+class MpesaInbox(db.Model):
+    __tablename__ = 'mpesa_inbox'
+    __table_args__ = (
+        db.Index('ix_mpesa_inbox_status_id', 'status', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    claim_token = db.Column(db.String(36), index=True)
+    claimed_at = db.Column(db.DateTime)
+    received_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
+    processed_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'received_at': self.received_at.isoformat() if self.received_at else None,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+        }
@@ -2,8 +2,26 @@ from app import db
 from datetime import datetime
 import pytz
 
+# M-PESA receipt numbers are unique per transaction; Safaricom callback retries
+# must not be able to insert the same receipt twice.
+MPESA_REFERENCE_WHERE = db.text(
+    "payment_method = 'M-PESA' AND transaction_reference IS NOT NULL AND transaction_reference <> ''"
+)
+
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index(
+            'uq_payments_mpesa_reference',
+            'transaction_reference',
+            unique=True,
+            postgresql_where=MPESA_REFERENCE_WHERE,
+            sqlite_where=MPESA_REFERENCE_WHERE
+        ),
+        db.Index('ix_payments_tenant_date', 'tenant_id', 'payment_date'),
+        db.Index('ix_payments_date_id', 'payment_date', 'id'),
+        db.Index('ix_payments_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
@@ -13,19 +31,28 @@ class Payment(db.Model):
     payment_status = db.Column(db.String(20), nullable=False)
     transaction_reference = db.Column(db.String(100))
     remaining_amount = db.Column(db.Float, default=0.0)
+    # Portion already applied to invoices; the rest is credit for the next one.
+    allocated_amount = db.Column(db.Float, nullable=False, default=0.0)
     notes = db.Column(db.Text)
     logged_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     receipt_sent = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')), onupdate=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
     
+    @staticmethod
+    def status_for(amount, expected_rent):
+        """(payment_status, remaining_amount) for a payment of `amount` against `expected_rent`."""
+        if amount >= expected_rent:
+            return 'Full', 0.0
+        return 'Partial', expected_rent - amount
+    
     def calculate_status(self, expected_rent):
-        if self.amount >= expected_rent:
-            self.payment_status = 'Full'
-            self.remaining_amount = 0.0
-        else:
-            self.payment_status = 'Partial'
-            self.remaining_amount = expected_rent - self.amount
+        self.payment_status, self.remaining_amount = self.status_for(self.amount, expected_rent)
+    
+    def apply_balance(self, balance):
+        """Take status and remaining from the tenant's month balance after this payment, arrears included."""
+        self.remaining_amount = balance.remaining
+        self.payment_status = 'Full' if balance.remaining <= 0 else 'Partial'
     
     def to_dict(self):
         return {
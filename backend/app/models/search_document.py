@@ -0,0 +1,42 @@
+from app import db
+from sqlalchemy import DDL, event
+
+class SearchDocument(db.Model):
+    """One normalised, searchable row per tenant and per referenced payment."""
+
+    __tablename__ = 'search_documents'
+    __table_args__ = (
+        db.UniqueConstraint('entity_type', 'entity_id', name='uq_search_documents_entity'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    tenant_id = db.Column(db.Integer, index=True)
+    label = db.Column(db.String(200))
+    document = db.Column(db.Text, nullable=False)
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+
+# PostgreSQL: trigram GIN index so '%term%' lookups stop scanning the table.
+POSTGRESQL_DDL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS ix_search_documents_trgm ON search_documents USING gin (document gin_trgm_ops)',
+]
+
+# SQLite: external-content FTS5 trigram table kept in step by triggers.
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5("
+    "document, content='search_documents', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts (rowid, document) VALUES (new.id, new.document); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts (search_documents_fts, rowid, document) VALUES ('delete', old.id, old.document); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts (search_documents_fts, rowid, document) VALUES ('delete', old.id, old.document); "
+    "INSERT INTO search_documents_fts (rowid, document) VALUES (new.id, new.document); END",
+]
+
+for statement in POSTGRESQL_DDL:
+    event.listen(SearchDocument.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+for statement in SQLITE_DDL:
+    event.listen(SearchDocument.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
@@ -0,0 +1,25 @@
+from app import db
+from datetime import datetime
+import pytz
+
+class SMSBroadcast(db.Model):
+    __tablename__ = 'sms_broadcasts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    template_id = db.Column(db.Integer, db.ForeignKey('templates.id'))
+    selector = db.Column(db.Text, nullable=False)
+    message_type = db.Column(db.String(50))
+    total = db.Column(db.Integer, nullable=False, default=0)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'template_id': self.template_id,
+            'selector': self.selector,
+            'message_type': self.message_type,
+            'total': self.total,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
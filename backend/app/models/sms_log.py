@@ -4,6 +4,12 @@ import pytz
 
 class SMSLog(db.Model):
     __tablename__ = 'sms_logs'
+    __table_args__ = (
+        db.Index('ix_sms_logs_status_next_attempt', 'status', 'next_attempt_at'),
+        db.Index('ix_sms_logs_broadcast_id', 'broadcast_id'),
+        db.Index('uq_sms_logs_dedupe_key', 'dedupe_key', unique=True),
+        db.Index('ix_sms_logs_sent_at', 'sent_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     recipient_phone = db.Column(db.String(20), nullable=False)
@@ -14,6 +20,19 @@ class SMSLog(db.Model):
     sent_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     sent_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
     
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'))
+    broadcast_id = db.Column(db.Integer, db.ForeignKey('sms_broadcasts.id'))
+    # Set for automated sends that must go out at most once, e.g. 'reminder:due:42:2026-11'
+    dedupe_key = db.Column(db.String(100))
+    
+    # Outbox bookkeeping: rows move pending -> sending -> sent/failed
+    payment_id = db.Column(db.Integer, db.ForeignKey('payments.id'))
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    claim_token = db.Column(db.String(36))
+    claimed_at = db.Column(db.DateTime)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -23,5 +42,9 @@ class SMSLog(db.Model):
             'message_type': self.message_type,
             'status': self.status,
             'sent_by': self.sent_by,
-            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'tenant_id': self.tenant_id,
+            'broadcast_id': self.broadcast_id,
+            'attempts': self.attempts,
+            'last_error': self.last_error
         }
@@ -0,0 +1,28 @@
+from app import db
+from datetime import datetime
+import pytz
+
+class StkCampaign(db.Model):
+    __tablename__ = 'stk_campaigns'
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='running')
+    total = db.Column(db.Integer, nullable=False, default=0)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
+    completed_at = db.Column(db.DateTime)
+    claimed_at = db.Column(db.DateTime)
+
+    requests = db.relationship('StkPushRequest', backref='campaign', lazy='dynamic')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'scope': self.scope,
+            'status': self.status,
+            'total': self.total,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
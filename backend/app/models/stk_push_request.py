@@ -0,0 +1,33 @@
+from app import db
+from datetime import datetime
+import pytz
+
+class StkPushRequest(db.Model):
+    __tablename__ = 'stk_push_requests'
+    __table_args__ = (
+        db.Index('ix_stk_push_requests_campaign_status', 'campaign_id', 'status'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('stk_campaigns.id'), nullable=False)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
+    phone = db.Column(db.String(20), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    checkout_request_id = db.Column(db.String(100), unique=True)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')), onupdate=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'campaign_id': self.campaign_id,
+            'tenant_id': self.tenant_id,
+            'phone': self.phone,
+            'amount': self.amount,
+            'status': self.status,
+            'checkout_request_id': self.checkout_request_id,
+            'error': self.error,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
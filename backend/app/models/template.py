@@ -1,4 +1,5 @@
 from app import db
+from app.utils.template_engine import template_cache
 from datetime import datetime
 import pytz
 
@@ -14,12 +15,11 @@ class Template(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')), onupdate=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
     
+    def compiled(self):
+        return template_cache.get(self)
+    
     def render(self, **kwargs):
-        content = self.content
-        for key, value in kwargs.items():
-            placeholder = '{' + key + '}'
-            content = content.replace(placeholder, str(value))
-        return content
+        return self.compiled().render(kwargs)
     
     def to_dict(self):
         return {
@@ -29,5 +29,6 @@ class Template(db.Model):
             'theme': self.theme,
             'content': self.content,
             'is_active': self.is_active,
+            'unknown_placeholders': self.compiled().unknown_placeholders(),
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
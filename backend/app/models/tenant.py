@@ -1,13 +1,22 @@
 ﻿from app import db
+from app.utils.phone import phone_key
+from sqlalchemy.orm import validates
 from datetime import datetime
 import pytz
 
 class Tenant(db.Model):
     __tablename__ = 'tenants'
+    __table_args__ = (
+        db.Index('ix_tenants_active_full_name', 'is_active', 'full_name', 'id'),
+        db.Index('ix_tenants_active_unit_number', 'is_active', 'unit_number', 'id'),
+        db.Index('ix_tenants_active_lease_end', 'is_active', 'lease_end_date', 'id'),
+        db.Index('ix_tenants_user_id', 'user_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(20), nullable=False)
+    phone_key = db.Column(db.String(9), index=True)
     email = db.Column(db.String(120))
     unit_number = db.Column(db.String(20), nullable=False)
     expected_rent = db.Column(db.Float, nullable=False)
@@ -26,6 +35,11 @@ class Tenant(db.Model):
     payments = db.relationship('Payment', backref='tenant', lazy=True, cascade='all, delete-orphan')
     user = db.relationship('User', backref='tenant_profile', uselist=False)
 
+    @validates('phone')
+    def validate_phone(self, key, phone):
+        self.phone_key = phone_key(phone)
+        return phone
+
     def get_initials(self):
         parts = self.full_name.split()
         return ''.join([p[0].upper() for p in parts if p])
@@ -0,0 +1,49 @@
+from app import db
+from datetime import datetime
+import pytz
+
+class TenantMonthBalance(db.Model):
+    __tablename__ = 'tenant_month_balance'
+    __table_args__ = (
+        db.UniqueConstraint('tenant_id', 'year', 'month', name='uq_tenant_month_balance_period'),
+        db.Index('ix_tenant_month_balance_period', 'year', 'month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenants.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    # Arrears (positive) or credit (negative) carried in from the previous month.
+    opening_balance = db.Column(db.Float, nullable=False, default=0.0)
+    expected = db.Column(db.Float, nullable=False, default=0.0)
+    paid = db.Column(db.Float, nullable=False, default=0.0)
+    remaining = db.Column(db.Float, nullable=False, default=0.0)
+    status = db.Column(db.String(20), nullable=False, default='Overdue')
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(pytz.timezone('Africa/Nairobi')), onupdate=lambda: datetime.now(pytz.timezone('Africa/Nairobi')))
+
+    @property
+    def closing_balance(self):
+        return (self.opening_balance or 0.0) + self.expected - self.paid
+
+    def refresh(self):
+        self.remaining = max(self.closing_balance, 0.0)
+        if self.closing_balance <= 0:
+            self.status = 'Paid'
+        elif self.paid > 0:
+            self.status = 'Partial'
+        else:
+            self.status = 'Overdue'
+
+    def to_dict(self):
+        return {
+            'tenant_id': self.tenant_id,
+            'year': self.year,
+            'month': self.month,
+            'opening_balance': self.opening_balance,
+            'expected': self.expected,
+            'paid': self.paid,
+            'remaining': self.remaining,
+            'closing_balance': self.closing_balance,
+            'status': self.status,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
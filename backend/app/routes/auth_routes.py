@@ -3,9 +3,14 @@ from flask_login import login_user, logout_user, login_required, current_user
 from app import db
 from app.models.user import User
 from app.utils.decorators import admin_required
+from app.utils.pagination import parse_limit, parse_fields, parse_sort, keyset_page, json_value
 
 bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+USER_LIST_FIELDS = ('id', 'username', 'email', 'role', 'phone', 'full_name', 'is_active', 'created_at')
+# username has its unique index; role sorts use ix_users_role_id.
+USER_SORTS = ('id', 'username', 'role')
+
 @bp.route('/register', methods=['POST'])
 @login_required
 @admin_required
@@ -72,8 +77,39 @@ def check_session():
 @login_required
 @admin_required
 def get_users():
-    users = User.query.all()
-    return jsonify({'users': [u.to_dict() for u in users]}), 200
+    try:
+        fields = parse_fields(request.args.get('fields'), USER_LIST_FIELDS)
+        sort_name, descending = parse_sort(request.args.get('sort'), USER_SORTS)
+        paginate = 'limit' in request.args or 'cursor' in request.args
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if fields:
+        columns = [getattr(User, name) for name in dict.fromkeys(fields + [sort_name])]
+        query = db.session.query(*columns)
+        serialize = lambda row: {name: json_value(getattr(row, name)) for name in fields}
+    else:
+        query = User.query
+        serialize = lambda user: user.to_dict()
+    if request.args.get('role'):
+        query = query.filter(User.role == request.args['role'])
+    
+    sort_column = getattr(User, sort_name)
+    if paginate:
+        try:
+            users, next_cursor = keyset_page(query, sort_column, User.id, descending, limit, request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({
+            'users': [serialize(u) for u in users],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }), 200
+    
+    order = (sort_column.desc(), User.id.desc()) if descending else (sort_column, User.id)
+    users = query.order_by(*order).all()
+    return jsonify({'users': [serialize(u) for u in users]}), 200
 
 @bp.route('/users/<int:user_id>', methods=['PUT'])
 @login_required
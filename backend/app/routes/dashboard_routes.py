@@ -1,12 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required
-from app import db
+from app import db, response_cache
 from app.models.tenant import Tenant
-from app.models.payment import Payment
 from app.models.alert import Alert
-from app.utils.decorators import admin_or_caretaker_required
+from app.services.dashboard_service import DashboardService
+from app.utils.decorators import admin_or_caretaker_required, admin_required
 from datetime import datetime, timedelta
-from sqlalchemy import func
 import pytz
 
 bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
@@ -15,58 +14,13 @@ bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
 @login_required
 @admin_or_caretaker_required
 def get_summary():
-    tz = pytz.timezone('Africa/Nairobi')
-    current_month = datetime.now(tz).month
-    current_year = datetime.now(tz).year
-    
-    tenants = Tenant.query.filter_by(is_active=True).all()
-    total_tenants = len(tenants)
-    total_expected = sum([t.expected_rent for t in tenants])
-    
-    payments_this_month = Payment.query.filter(
-        func.extract('month', Payment.payment_date) == current_month,
-        func.extract('year', Payment.payment_date) == current_year
-    ).all()
-    
-    total_collected = sum([p.amount for p in payments_this_month])
-    
-    paid_tenants = []
-    partial_tenants = []
-    overdue_tenants = []
-    
-    for tenant in tenants:
-        tenant_payments = [p for p in payments_this_month if p.tenant_id == tenant.id]
-        total_paid = sum([p.amount for p in tenant_payments])
-        
-        if total_paid >= tenant.expected_rent:
-            paid_tenants.append(tenant.id)
-        elif total_paid > 0:
-            partial_tenants.append({
-                'tenant_id': tenant.id,
-                'tenant_name': tenant.full_name,
-                'unit_number': tenant.unit_number,
-                'expected_rent': tenant.expected_rent,
-                'paid_amount': total_paid,
-                'remaining_amount': tenant.expected_rent - total_paid
-            })
-        else:
-            overdue_tenants.append({
-                'tenant_id': tenant.id,
-                'tenant_name': tenant.full_name,
-                'unit_number': tenant.unit_number,
-                'expected_rent': tenant.expected_rent
-            })
-    
-    return jsonify({
-        'total_tenants': total_tenants,
-        'total_expected': total_expected,
-        'total_collected': total_collected,
-        'paid_count': len(paid_tenants),
-        'partial_count': len(partial_tenants),
-        'overdue_count': len(overdue_tenants),
-        'partial_tenants': partial_tenants,
-        'overdue_tenants': overdue_tenants
-    }), 200
+    dashboard_service = DashboardService()
+    summary = response_cache.fetch(
+        'dashboard.summary',
+        dashboard_service.today.strftime('%Y-%m'),
+        dashboard_service.get_summary
+    )
+    return jsonify(summary), 200
 
 @bp.route('/alerts', methods=['GET'])
 @login_required
@@ -97,6 +51,21 @@ def mark_alert_read(alert_id):
 def get_expiring_leases():
     tz = pytz.timezone('Africa/Nairobi')
     today = datetime.now(tz).date()
+    
+    expiring_leases = response_cache.fetch(
+        'dashboard.lease_expiring',
+        today.isoformat(),
+        lambda: _expiring_leases(today)
+    )
+    return jsonify(expiring_leases), 200
+
+@bp.route('/cache-stats', methods=['GET'])
+@login_required
+@admin_required
+def get_cache_stats():
+    return jsonify({'cache': response_cache.stats()}), 200
+
+def _expiring_leases(today):
     thirty_days = today + timedelta(days=30)
     
     expiring_tenants = Tenant.query.filter(
@@ -105,11 +74,11 @@ def get_expiring_leases():
         Tenant.lease_end_date >= today
     ).all()
     
-    return jsonify({
+    return {
         'expiring_leases': [
             {
                 **t.to_dict(),
                 'days_remaining': (t.lease_end_date - today).days
             } for t in expiring_tenants
         ]
-    }), 200
+    }
@@ -0,0 +1,36 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from app.services.import_service import ImportService
+from app.utils.decorators import admin_required
+from app.utils.pagination import parse_bool
+import io
+
+bp = Blueprint('imports', __name__, url_prefix='/api/import')
+
+def _run_import(kind):
+    upload = request.files.get('file')
+    if not upload:
+        return jsonify({'error': 'Upload the CSV as a multipart "file" field'}), 400
+
+    # Read the upload as a text stream so large files are never held in memory at once.
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    import_service = ImportService(batch_size=request.args.get('batch_size', type=int))
+    importer = import_service.import_tenants if kind == 'tenants' else import_service.import_payments
+    try:
+        report = importer(stream, dry_run=parse_bool(request.args.get('dry_run')), imported_by=current_user.id)
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'report': report.to_dict()}), 200
+
+@bp.route('/tenants', methods=['POST'])
+@login_required
+@admin_required
+def import_tenants():
+    return _run_import('tenants')
+
+@bp.route('/payments', methods=['POST'])
+@login_required
+@admin_required
+def import_payments():
+    return _run_import('payments')
@@ -0,0 +1,89 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+from app import db
+from app.models.invoice import Invoice, INVOICE_STATUSES
+from app.services.invoice_service import InvoiceService
+from app.utils.decorators import admin_or_caretaker_required, admin_required
+from app.utils.pagination import parse_limit, parse_bool, keyset_page
+
+bp = Blueprint('invoices', __name__, url_prefix='/api/invoices')
+
+@bp.route('', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def get_invoices():
+    query = Invoice.query
+    if request.args.get('tenant_id'):
+        query = query.filter(Invoice.tenant_id == request.args.get('tenant_id', type=int))
+    if request.args.get('year') and request.args.get('month'):
+        query = query.filter(
+            Invoice.year == request.args.get('year', type=int),
+            Invoice.month == request.args.get('month', type=int)
+        )
+
+    status = request.args.get('status')
+    if status:
+        statuses = status.split(',')
+        if any(s not in INVOICE_STATUSES for s in statuses):
+            return jsonify({'error': f'status must be drawn from {", ".join(INVOICE_STATUSES)}'}), 400
+        query = query.filter(Invoice.status.in_(statuses))
+    if parse_bool(request.args.get('overdue')):
+        query = query.filter(Invoice.status != 'paid', Invoice.due_date < InvoiceService().today)
+
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        invoices, next_cursor = keyset_page(
+            query, Invoice.id, Invoice.id, True, limit, request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'invoices': [invoice.to_dict() for invoice in invoices],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }), 200
+
+@bp.route('/<int:invoice_id>', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def get_invoice(invoice_id):
+    invoice = Invoice.query.get_or_404(invoice_id)
+    return jsonify({
+        'invoice': invoice.to_dict(),
+        'allocations': [allocation.to_dict() for allocation in invoice.allocations]
+    }), 200
+
+@bp.route('/generate', methods=['POST'])
+@login_required
+@admin_required
+def generate_invoices():
+    data = request.get_json(silent=True) or {}
+    invoice_service = InvoiceService()
+    year = data.get('year', invoice_service.today.year)
+    month = data.get('month', invoice_service.today.month)
+    if not isinstance(year, int) or not isinstance(month, int) or not 1 <= month <= 12:
+        return jsonify({'error': 'year and month must be integers with month 1-12'}), 400
+
+    summary = invoice_service.generate(year, month, dry_run=bool(data.get('dry_run')))
+    if not summary['dry_run']:
+        db.session.commit()
+    return jsonify({'summary': summary}), 200
+
+@bp.route('/arrears', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def get_arrears():
+    rows = InvoiceService().arrears(unit_prefix=request.args.get('unit_prefix'))
+    return jsonify({
+        'arrears': [{
+            'tenant_id': row.id,
+            'tenant_name': row.full_name,
+            'unit_number': row.unit_number,
+            'phone': row.phone,
+            'outstanding': round(row.outstanding, 2),
+            'invoices': row.invoices,
+            'oldest_due_date': row.oldest_due_date.isoformat()
+        } for row in rows],
+        'total_outstanding': round(sum(row.outstanding for row in rows), 2)
+    }), 200
@@ -4,8 +4,14 @@ from app import db
 from app.models.template import Template
 from app.models.sms_log import SMSLog
 from app.models.tenant import Tenant
+from app.models.sms_broadcast import SMSBroadcast
 from app.services.messaging_service import MessagingService
+from app.services.sms_outbox_service import SMSOutboxService
+from app.services.sms_broadcast_service import SMSBroadcastService
+from app.services.sms_providers import sms_providers
+from app.services.reminder_service import ReminderService
 from app.utils.decorators import admin_or_caretaker_required, admin_required
+from app.utils.template_engine import template_cache
 
 bp = Blueprint('messaging', __name__, url_prefix='/api/messaging')
 
@@ -41,6 +47,7 @@ def create_template():
     
     db.session.add(template)
     db.session.commit()
+    template_cache.invalidate(template.id)
     
     return jsonify({'message': 'Template created successfully', 'template': template.to_dict()}), 201
 
@@ -63,23 +70,84 @@ def send_sms():
         message = data['message']
     
     messaging_service = MessagingService()
-    success = messaging_service.send_sms(tenant.phone, message, tenant.full_name)
-    
-    sms_log = SMSLog(
-        recipient_phone=tenant.phone,
-        recipient_name=tenant.full_name,
-        message=message,
+    sms_log = messaging_service.queue_sms(
+        tenant.phone,
+        message,
+        tenant.full_name,
         message_type=data.get('message_type', 'manual'),
-        status='sent' if success else 'failed',
-        sent_by=current_user.id
+        sent_by=current_user.id,
+        tenant_id=tenant.id
     )
-    db.session.add(sms_log)
     db.session.commit()
+    SMSOutboxService().notify()
+    
+    return jsonify({'message': 'SMS queued for delivery', 'sms_log': sms_log.to_dict()}), 202
+
+@bp.route('/broadcast', methods=['POST'])
+@login_required
+@admin_or_caretaker_required
+def create_broadcast():
+    data = request.get_json()
+    
+    if not data.get('template_id'):
+        return jsonify({'error': 'template_id is required'}), 400
+    template = Template.query.get_or_404(data['template_id'])
+    
+    selector = data.get('selector') or {}
+    broadcast_service = SMSBroadcastService()
+    try:
+        broadcast = broadcast_service.create_broadcast(
+            template,
+            selector,
+            placeholders=data.get('placeholders', {}),
+            message_type=data.get('message_type', 'broadcast'),
+            sent_by=current_user.id
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    db.session.commit()
+    SMSOutboxService().notify()
     
-    if success:
-        return jsonify({'message': 'SMS sent successfully'}), 200
+    return jsonify({
+        'message': f'{broadcast.total} SMS queued for delivery',
+        'broadcast': broadcast.to_dict()
+    }), 202
+
+@bp.route('/broadcasts/<int:broadcast_id>', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def get_broadcast(broadcast_id):
+    broadcast = SMSBroadcast.query.get_or_404(broadcast_id)
+    broadcast_service = SMSBroadcastService()
     
-    return jsonify({'error': 'Failed to send SMS'}), 500
+    return jsonify({
+        'broadcast': broadcast.to_dict(),
+        'status_counts': broadcast_service.status_counts(broadcast.id),
+        'recipients': [{
+            'sms_log_id': row.id,
+            'tenant_id': row.tenant_id,
+            'recipient_name': row.recipient_name,
+            'recipient_phone': row.recipient_phone,
+            'status': row.status,
+            'attempts': row.attempts,
+            'last_error': row.last_error
+        } for row in broadcast_service.recipients(broadcast.id)]
+    }), 200
+
+@bp.route('/reminders/run', methods=['POST'])
+@login_required
+@admin_required
+def run_reminders():
+    data = request.get_json(silent=True) or {}
+    summary = ReminderService().run(dry_run=bool(data.get('dry_run')))
+    return jsonify({'reminders': summary}), 200
+
+@bp.route('/providers', methods=['GET'])
+@login_required
+@admin_required
+def get_provider_stats():
+    return jsonify({'providers': sms_providers.stats()}), 200
 
 @bp.route('/sms-logs', methods=['GET'])
 @login_required
@@ -100,6 +168,7 @@ def update_template(template_id):
     template.content = data.get('content', template.content)
     
     db.session.commit()
+    template_cache.invalidate(template.id)
     return jsonify({'message': 'Template updated successfully', 'template': template.to_dict()}), 200
 
 @bp.route('/templates/<int:template_id>', methods=['DELETE'])
@@ -109,6 +178,7 @@ def delete_template(template_id):
     template = Template.query.get_or_404(template_id)
     template.is_active = False
     db.session.commit()
+    template_cache.invalidate(template.id)
     return jsonify({'message': 'Template deleted successfully'}), 200
 
 @bp.route('/sms-logs/<int:log_id>', methods=['DELETE'])
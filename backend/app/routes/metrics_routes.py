@@ -0,0 +1,20 @@
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_login import current_user
+from app.utils.instrumentation import request_metrics
+import hmac
+
+bp = Blueprint('metrics', __name__, url_prefix='/api/metrics')
+
+@bp.route('', methods=['GET'])
+def get_metrics():
+    # Scrapers cannot log in, so a bearer METRICS_TOKEN also works; without one
+    # the endpoint is for logged-in admins only.
+    token = current_app.config.get('METRICS_TOKEN')
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not (token and supplied and hmac.compare_digest(supplied, token)):
+        if not current_user.is_authenticated:
+            return jsonify({'error': 'Authentication required'}), 401
+        if current_user.role != 'super_admin':
+            return jsonify({'error': 'Insufficient permissions'}), 403
+
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
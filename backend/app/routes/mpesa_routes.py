@@ -1,61 +1,46 @@
-from flask import Blueprint, request, jsonify
-from flask_login import login_required
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
 from app import db
-from app.models.payment import Payment
 from app.models.tenant import Tenant
-from app.models.alert import Alert
+from app.models.mpesa_inbox import MpesaInbox
+from app.models.stk_campaign import StkCampaign
+from app.models.stk_push_request import StkPushRequest
 from app.services.mpesa_service import MPesaService
-from app.utils.decorators import admin_or_caretaker_required
-from datetime import datetime
+from app.services.mpesa_inbox_service import MpesaInboxService, mpesa_inbox_workers
+from app.services.stk_campaign_service import StkCampaignService, CAMPAIGN_SCOPES
+from app.utils.decorators import admin_or_caretaker_required, admin_required
+from app.utils.pagination import parse_id_list
 
 bp = Blueprint('mpesa', __name__, url_prefix='/api/mpesa')
 
 @bp.route('/callback', methods=['POST'])
 def mpesa_callback():
-    data = request.get_json()
-    
-    mpesa_service = MPesaService()
-    result = mpesa_service.process_callback(data)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Failed to process callback'}), 400
     
-    if result:
-        tenant = result.get('tenant')
-        if tenant:
-            payment = Payment(
-                tenant_id=tenant.id,
-                amount=result['amount'],
-                payment_date=datetime.now().date(),
-                payment_method='M-PESA',
-                transaction_reference=result['transaction_id']
-            )
-            
-            payment.calculate_status(tenant.expected_rent)
-            
-            db.session.add(payment)
-            
-            alert = Alert(
-                alert_type='mpesa_payment_received',
-                message=f'M-PESA payment of KES {payment.amount} received from {tenant.full_name}',
-                severity='success',
-                related_tenant_id=tenant.id,
-                related_payment_id=payment.id
-            )
-            db.session.add(alert)
-            
-            db.session.commit()
-            
-            return jsonify({'message': 'Payment processed successfully'}), 200
-        else:
-            alert = Alert(
-                alert_type='mpesa_unmatched',
-                message=f'Unmatched M-PESA payment of KES {result["amount"]} from {result["phone"]}',
-                severity='warning'
-            )
-            db.session.add(alert)
-            db.session.commit()
-            
-            return jsonify({'message': 'Payment received but tenant not matched'}), 200
+    MpesaInboxService().enqueue(data)
+    db.session.commit()
+    mpesa_inbox_workers.notify(current_app._get_current_object())
     
-    return jsonify({'error': 'Failed to process callback'}), 400
+    return jsonify({'ResultCode': 0, 'ResultDesc': 'Accepted', 'message': 'Callback received'}), 200
+
+@bp.route('/inbox', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def get_inbox():
+    status = request.args.get('status', 'poison')
+    entries = MpesaInbox.query.filter_by(status=status).order_by(MpesaInbox.id.desc()).limit(100).all()
+    return jsonify({'inbox': [e.to_dict() for e in entries]}), 200
+
+@bp.route('/inbox/reprocess', methods=['POST'])
+@login_required
+@admin_required
+def reprocess_inbox():
+    data = request.get_json(silent=True) or {}
+    count = MpesaInboxService().reprocess(data.get('ids'))
+    mpesa_inbox_workers.notify(current_app._get_current_object())
+    return jsonify({'message': f'{count} inbox entries queued for reprocessing'}), 200
 
 @bp.route('/initiate-stk', methods=['POST'])
 @login_required
@@ -73,3 +58,45 @@ def initiate_stk_push():
         return jsonify({'message': 'STK push initiated', 'checkout_request_id': result}), 200
     
     return jsonify({'error': 'Failed to initiate STK push'}), 500
+
+@bp.route('/campaigns', methods=['POST'])
+@login_required
+@admin_or_caretaker_required
+def create_campaign():
+    data = request.get_json(silent=True) or {}
+    scope = data.get('scope', 'arrears')
+    
+    if scope not in CAMPAIGN_SCOPES:
+        return jsonify({'error': f'scope must be one of {", ".join(CAMPAIGN_SCOPES)}'}), 400
+    try:
+        tenant_ids = parse_id_list(data.get('tenant_ids'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    campaign_service = StkCampaignService()
+    campaign = campaign_service.create_campaign(scope=scope, tenant_ids=tenant_ids, created_by=current_user.id)
+    if campaign.status == 'running':
+        campaign_service.notify()
+    
+    return jsonify({'message': f'STK push campaign started for {campaign.total} tenants', 'campaign': campaign.to_dict()}), 202
+
+@bp.route('/campaigns', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def get_campaigns():
+    campaigns = StkCampaign.query.order_by(StkCampaign.id.desc()).limit(20).all()
+    return jsonify({'campaigns': [c.to_dict() for c in campaigns]}), 200
+
+@bp.route('/campaigns/<int:campaign_id>', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def get_campaign(campaign_id):
+    campaign = StkCampaign.query.get_or_404(campaign_id)
+    response = {
+        'campaign': campaign.to_dict(),
+        'progress': StkCampaignService().progress(campaign.id)
+    }
+    if request.args.get('include_requests', 'false').lower() == 'true':
+        response['requests'] = [r.to_dict() for r in campaign.requests.order_by(StkPushRequest.id).all()]
+    
+    return jsonify(response), 200
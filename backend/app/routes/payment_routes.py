@@ -1,12 +1,20 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
 from app import db
 from app.models.payment import Payment
 from app.models.tenant import Tenant
 from app.models.alert import Alert
 from app.services.messaging_service import MessagingService
+from app.services.sms_outbox_service import SMSOutboxService
+from app.services.ledger_service import LedgerService
+from app.services.invoice_service import InvoiceService
 from app.utils.decorators import admin_or_caretaker_required
-from datetime import datetime
+from app.utils.pagination import parse_limit, parse_bool, keyset_page
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime
+import csv
+import io
+import json
 
 bp = Blueprint('payments', __name__, url_prefix='/api/payments')
 
@@ -16,12 +24,46 @@ bp = Blueprint('payments', __name__, url_prefix='/api/payments')
 def get_payments():
     tenant_id = request.args.get('tenant_id')
     
-    query = Payment.query
-    if tenant_id:
-        query = query.filter_by(tenant_id=tenant_id)
+    if parse_bool(request.args.get('all')):
+        query = Payment.query
+        if tenant_id:
+            query = query.filter_by(tenant_id=tenant_id)
+        
+        payments = query.order_by(Payment.payment_date.desc()).all()
+        return jsonify({'payments': [p.to_dict() for p in payments]}), 200
     
-    payments = query.order_by(Payment.payment_date.desc()).all()
-    return jsonify({'payments': [p.to_dict() for p in payments]}), 200
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        cursor = request.args.get('cursor')
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        
+        query = Payment.query
+        if tenant_id:
+            query = query.filter(Payment.tenant_id == int(tenant_id))
+        if start_date:
+            query = query.filter(Payment.payment_date >= datetime.fromisoformat(start_date).date())
+        if end_date:
+            query = query.filter(Payment.payment_date <= datetime.fromisoformat(end_date).date())
+        if request.args.get('method'):
+            query = query.filter(Payment.payment_method == request.args['method'])
+        if request.args.get('status'):
+            query = query.filter(Payment.payment_status == request.args['status'])
+        
+        total = query.count() if parse_bool(request.args.get('include_total'), default=True) else None
+        payments, next_cursor = keyset_page(query, Payment.payment_date, Payment.id, True, limit, cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = {
+        'payments': [p.to_dict() for p in payments],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+    if total is not None:
+        response['total'] = total
+    
+    return jsonify(response), 200
 
 @bp.route('/<int:payment_id>', methods=['GET'])
 @login_required
@@ -30,6 +72,9 @@ def get_payment(payment_id):
     payment = Payment.query.get_or_404(payment_id)
     return jsonify({'payment': payment.to_dict()}), 200
 
+def _duplicate_mpesa_error():
+    return jsonify({'error': 'This M-PESA transaction has already been recorded'}), 409
+
 @bp.route('', methods=['POST'])
 @login_required
 @admin_or_caretaker_required
@@ -38,12 +83,17 @@ def create_payment():
     
     tenant = Tenant.query.get_or_404(data['tenant_id'])
     
+    transaction_reference = data.get('transaction_reference', '')
+    if data['payment_method'] == 'M-PESA' and transaction_reference:
+        if Payment.query.filter_by(payment_method='M-PESA', transaction_reference=transaction_reference).first():
+            return _duplicate_mpesa_error()
+    
     payment = Payment(
         tenant_id=data['tenant_id'],
         amount=data['amount'],
         payment_date=datetime.fromisoformat(data['payment_date']).date(),
         payment_method=data['payment_method'],
-        transaction_reference=data.get('transaction_reference', ''),
+        transaction_reference=transaction_reference,
         notes=data.get('notes', ''),
         logged_by=current_user.id
     )
@@ -51,6 +101,14 @@ def create_payment():
     payment.calculate_status(tenant.expected_rent)
     
     db.session.add(payment)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        return _duplicate_mpesa_error()
+    
+    LedgerService().record_payment(payment, tenant)
+    InvoiceService().allocate([tenant.id])
     
     alert = Alert(
         alert_type='payment_logged',
@@ -61,11 +119,14 @@ def create_payment():
     )
     db.session.add(alert)
     
+    send_receipt = data.get('send_receipt', False)
+    if send_receipt:
+        MessagingService().queue_payment_receipt(payment, tenant, sent_by=current_user.id)
+    
     db.session.commit()
     
-    if data.get('send_receipt', False):
-        messaging_service = MessagingService()
-        messaging_service.send_payment_receipt(payment, tenant)
+    if send_receipt:
+        SMSOutboxService().notify()
     
     return jsonify({'message': 'Payment logged successfully', 'payment': payment.to_dict()}), 201
 
@@ -77,28 +138,124 @@ def send_receipt(payment_id):
     tenant = Tenant.query.get(payment.tenant_id)
     
     messaging_service = MessagingService()
-    success = messaging_service.send_payment_receipt(payment, tenant)
+    messaging_service.queue_payment_receipt(payment, tenant, sent_by=current_user.id)
+    db.session.commit()
+    SMSOutboxService().notify()
     
-    if success:
-        payment.receipt_sent = True
-        db.session.commit()
-        return jsonify({'message': 'Receipt sent successfully'}), 200
+    return jsonify({'message': 'Receipt queued for delivery'}), 202
+
+AUDIT_EXPORT_BATCH_SIZE = 1000
+
+AUDIT_FIELDS = [
+    'id', 'tenant_id', 'tenant_name', 'unit_number', 'amount', 'payment_date',
+    'payment_method', 'payment_status', 'transaction_reference', 'remaining_amount',
+    'notes', 'logged_by', 'receipt_sent', 'created_at'
+]
+
+def _audit_trail_query():
+    return db.session.query(
+        Payment.id,
+        Payment.tenant_id,
+        Payment.amount,
+        Payment.payment_date,
+        Payment.payment_method,
+        Payment.payment_status,
+        Payment.transaction_reference,
+        Payment.remaining_amount,
+        Payment.notes,
+        Payment.logged_by,
+        Payment.receipt_sent,
+        Payment.created_at,
+        Tenant.full_name.label('tenant_name'),
+        Tenant.unit_number
+    ).outerjoin(Tenant, Tenant.id == Payment.tenant_id)
+
+def _audit_row_to_dict(row):
+    return {
+        'id': row.id,
+        'tenant_id': row.tenant_id,
+        'amount': row.amount,
+        'payment_date': row.payment_date.isoformat() if row.payment_date else None,
+        'payment_method': row.payment_method,
+        'payment_status': row.payment_status,
+        'transaction_reference': row.transaction_reference,
+        'remaining_amount': row.remaining_amount,
+        'notes': row.notes,
+        'logged_by': row.logged_by,
+        'receipt_sent': row.receipt_sent,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'tenant_name': row.tenant_name or 'Unknown',
+        'unit_number': row.unit_number or 'Unknown'
+    }
+
+def _filter_audit_period(query):
+    year = request.args.get('year', type=int)
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
     
-    return jsonify({'error': 'Failed to send receipt'}), 500
+    if year:
+        query = query.filter(Payment.payment_date >= date(year, 1, 1), Payment.payment_date < date(year + 1, 1, 1))
+    if start_date:
+        query = query.filter(Payment.payment_date >= datetime.fromisoformat(start_date).date())
+    if end_date:
+        query = query.filter(Payment.payment_date <= datetime.fromisoformat(end_date).date())
+    return query
 
 @bp.route('/audit-trail', methods=['GET'])
 @login_required
 @admin_or_caretaker_required
 def get_audit_trail():
-    payments = Payment.query.order_by(Payment.created_at.desc()).all()
-    
-    audit_data = []
-    for payment in payments:
-        tenant = Tenant.query.get(payment.tenant_id)
-        audit_data.append({
-            **payment.to_dict(),
-            'tenant_name': tenant.full_name if tenant else 'Unknown',
-            'unit_number': tenant.unit_number if tenant else 'Unknown'
-        })
-    
-    return jsonify({'audit_trail': audit_data}), 200
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        query = _filter_audit_period(_audit_trail_query())
+        rows, next_cursor = keyset_page(query, Payment.created_at, Payment.id, True, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'audit_trail': [_audit_row_to_dict(row) for row in rows],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }), 200
+
+@bp.route('/audit-trail/export', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def export_audit_trail():
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    try:
+        query = _filter_audit_period(_audit_trail_query())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    rows = query.order_by(Payment.created_at.desc(), Payment.id.desc()).execution_options(
+        yield_per=AUDIT_EXPORT_BATCH_SIZE
+    )
+    
+    def generate_ndjson():
+        for row in rows:
+            yield json.dumps(_audit_row_to_dict(row)) + '\n'
+    
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=AUDIT_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(_audit_row_to_dict(row))
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    if export_format == 'ndjson':
+        generator, mimetype = generate_ndjson(), 'application/x-ndjson'
+    else:
+        generator, mimetype = generate_csv(), 'text/csv'
+    
+    response = Response(stream_with_context(generator), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=audit-trail.{export_format}'
+    return response
@@ -0,0 +1,38 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+from app import db
+from app.models.tenant import Tenant
+from app.services.search_service import SearchService, SEARCH_TYPES
+from app.utils.decorators import admin_or_caretaker_required
+from app.utils.pagination import parse_limit, parse_bool
+
+bp = Blueprint('search', __name__, url_prefix='/api/search')
+
+@bp.route('', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def search():
+    query = request.args.get('q', '').strip()
+    types = tuple(t for t in request.args.get('types', ','.join(SEARCH_TYPES)).split(',') if t)
+    if any(t not in SEARCH_TYPES for t in types):
+        return jsonify({'error': f'types must be drawn from {", ".join(SEARCH_TYPES)}'}), 400
+    try:
+        limit = parse_limit(request.args.get('limit'), default=20, maximum=100)
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    results = SearchService().search(
+        query,
+        types=types,
+        limit=limit,
+        include_inactive=parse_bool(request.args.get('include_inactive'))
+    ) if query else []
+
+    # Payment hits show whose payment it was; one lookup covers the whole page.
+    tenant_ids = {r['tenant_id'] for r in results if r['type'] == 'payment' and r['tenant_id']}
+    names = dict(db.session.query(Tenant.id, Tenant.full_name).filter(Tenant.id.in_(tenant_ids)).all()) if tenant_ids else {}
+    for result in results:
+        if result['type'] == 'payment':
+            result['tenant_name'] = names.get(result['tenant_id'])
+
+    return jsonify({'query': query, 'results': results}), 200
@@ -3,11 +3,22 @@ from flask_login import login_required
 from app import db
 from app.models.tenant import Tenant
 from app.models.user import User
+from app.services.ledger_service import LedgerService
+from app.services.invoice_service import InvoiceService
+from app.services.search_service import SearchService, MAX_TENANT_MATCHES
 from app.utils.decorators import admin_or_caretaker_required
+from app.utils.pagination import parse_limit, parse_fields, parse_sort, keyset_page, json_value, encode_cursor, decode_offset_cursor
 from datetime import datetime
 
 bp = Blueprint('tenants', __name__, url_prefix='/api/tenants')
 
+TENANT_LIST_FIELDS = (
+    'id', 'full_name', 'phone', 'email', 'unit_number', 'expected_rent', 'deposit_amount',
+    'lease_start_date', 'lease_end_date', 'is_active', 'notes', 'user_id', 'created_at'
+)
+# Each sort is backed by an (is_active, column, id) index on tenants.
+TENANT_SORTS = ('id', 'full_name', 'unit_number', 'lease_end_date')
+
 @bp.route('', methods=['GET'])
 @login_required
 @admin_or_caretaker_required
@@ -15,21 +26,59 @@ def get_tenants():
     search = request.args.get('search', '')
     is_active = request.args.get('is_active', 'true').lower() == 'true'
 
-    query = Tenant.query.filter_by(is_active=is_active)
-
-    if search:
-        search_filter = f'%{search}%'
-        query = query.filter(
-            db.or_(
-                Tenant.full_name.ilike(search_filter),
-                Tenant.phone.ilike(search_filter),
-                Tenant.unit_number.ilike(search_filter),
-                Tenant.email.ilike(search_filter)
-            )
+    try:
+        fields = parse_fields(request.args.get('fields'), TENANT_LIST_FIELDS)
+        sort_name, descending = parse_sort(request.args.get('sort'), TENANT_SORTS)
+        paginate = 'limit' in request.args or 'cursor' in request.args
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # A fieldset selects just those columns, so no Tenant objects are built.
+    if fields:
+        columns = [getattr(Tenant, name) for name in dict.fromkeys(fields + [sort_name])]
+        query = db.session.query(*columns).filter(Tenant.is_active == is_active)
+        serialize = lambda row: {name: json_value(getattr(row, name)) for name in fields}
+    else:
+        query = Tenant.query.filter_by(is_active=is_active)
+        serialize = lambda tenant: tenant.to_dict()
+
+    next_cursor = None
+    if search and not request.args.get('sort'):
+        # Search results keep the index's rank order, so pages continue from a rank offset.
+        try:
+            offset = decode_offset_cursor(request.args['cursor']) if paginate and request.args.get('cursor') else 0
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        ranked_ids = SearchService().tenant_ids(
+            search, is_active=is_active, limit=limit + 1 if paginate else MAX_TENANT_MATCHES, offset=offset
         )
-
-    tenants = query.all()
-    return jsonify({'tenants': [t.to_dict() for t in tenants]}), 200
+        if paginate and len(ranked_ids) > limit:
+            ranked_ids = ranked_ids[:limit]
+            next_cursor = encode_cursor([offset + limit])
+        rank = {tenant_id: position for position, tenant_id in enumerate(ranked_ids)}
+        tenants = sorted(query.filter(Tenant.id.in_(ranked_ids)).all(), key=lambda t: rank[t.id]) if ranked_ids else []
+    else:
+        if search:
+            # A sorted search orders the best MAX_TENANT_MATCHES matches by the sort column.
+            query = query.filter(Tenant.id.in_(SearchService().tenant_ids(search, is_active=is_active)))
+        if paginate:
+            try:
+                tenants, next_cursor = keyset_page(
+                    query, getattr(Tenant, sort_name), Tenant.id, descending, limit, request.args.get('cursor')
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            sort_column = getattr(Tenant, sort_name)
+            order = (sort_column.desc(), Tenant.id.desc()) if descending else (sort_column, Tenant.id)
+            tenants = query.order_by(*order).all()
+
+    response = {'tenants': [serialize(t) for t in tenants]}
+    if paginate:
+        response['next_cursor'] = next_cursor
+        response['has_more'] = next_cursor is not None
+    return jsonify(response), 200
 
 @bp.route('/<int:tenant_id>', methods=['GET'])
 @login_required
@@ -38,6 +87,34 @@ def get_tenant(tenant_id):
     tenant = Tenant.query.get_or_404(tenant_id)
     return jsonify({'tenant': tenant.to_dict()}), 200
 
+@bp.route('/<int:tenant_id>/balance', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def get_tenant_balance(tenant_id):
+    tenant = Tenant.query.get_or_404(tenant_id)
+    ledger_service = LedgerService()
+    year = request.args.get('year', type=int)
+    month = request.args.get('month', type=int)
+    if not year or not month:
+        year, month = ledger_service.current_period()
+    return jsonify({'balance': ledger_service.period_balance(tenant, year, month).to_dict()}), 200
+
+@bp.route('/<int:tenant_id>/statement', methods=['GET'])
+@login_required
+@admin_or_caretaker_required
+def get_tenant_statement(tenant_id):
+    tenant = Tenant.query.get_or_404(tenant_id)
+    try:
+        start_date = datetime.fromisoformat(request.args['start_date']).date() if request.args.get('start_date') else None
+        end_date = datetime.fromisoformat(request.args['end_date']).date() if request.args.get('end_date') else None
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date must be YYYY-MM-DD'}), 400
+
+    statement = InvoiceService().statement(tenant.id, start_date, end_date)
+    statement['tenant_name'] = tenant.full_name
+    statement['unit_number'] = tenant.unit_number
+    return jsonify({'statement': statement}), 200
+
 @bp.route('', methods=['POST'])
 @login_required
 @admin_or_caretaker_required
@@ -81,6 +158,8 @@ def create_tenant():
 def update_tenant(tenant_id):
     tenant = Tenant.query.get_or_404(tenant_id)
     data = request.get_json()
+    previous_rent = tenant.expected_rent
+    previous_lease = (tenant.lease_start_date, tenant.lease_end_date)
 
     tenant.full_name = data.get('full_name', tenant.full_name)
     tenant.phone = data.get('phone', tenant.phone)
@@ -110,6 +189,11 @@ def update_tenant(tenant_id):
     if 'lease_end_date' in data:
         tenant.lease_end_date = datetime.fromisoformat(data['lease_end_date']).date()
 
+    if tenant.expected_rent != previous_rent:
+        LedgerService().update_expected_rent(tenant)
+    if (tenant.lease_start_date, tenant.lease_end_date) != previous_lease:
+        InvoiceService().apply_lease_change(tenant, previous_lease)
+
     db.session.commit()
 
     return jsonify({'message': 'Tenant updated successfully', 'tenant': tenant.to_dict()}), 200
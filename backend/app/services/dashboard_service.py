@@ -0,0 +1,118 @@
+from app import db
+from app.models.tenant import Tenant
+from app.models.tenant_month_balance import TenantMonthBalance
+from app.models.invoice import Invoice, OPEN_STATUSES
+from app.utils.sql import escape_like
+from datetime import datetime
+from sqlalchemy import func, and_
+import pytz
+
+class DashboardService:
+    def __init__(self, today=None):
+        tz = pytz.timezone('Africa/Nairobi')
+        self.today = today or datetime.now(tz).date()
+
+    def tenant_totals(self, tenant_ids=None, unit_prefix=None):
+        """One row per active tenant with this month's charge, carried balance and paid total from the ledger rollup."""
+        total_paid = func.coalesce(TenantMonthBalance.paid, 0.0).label('total_paid')
+        opening_balance = func.coalesce(TenantMonthBalance.opening_balance, 0.0).label('opening_balance')
+        # The month's row bills the prorated or invoiced charge; without one, the full rent.
+        expected_rent = func.coalesce(TenantMonthBalance.expected, Tenant.expected_rent).label('expected_rent')
+
+        query = db.session.query(
+            Tenant.id,
+            Tenant.full_name,
+            Tenant.unit_number,
+            Tenant.phone,
+            expected_rent,
+            opening_balance,
+            total_paid
+        ).outerjoin(
+            TenantMonthBalance,
+            and_(
+                TenantMonthBalance.tenant_id == Tenant.id,
+                TenantMonthBalance.year == self.today.year,
+                TenantMonthBalance.month == self.today.month
+            )
+        ).filter(
+            Tenant.is_active == True
+        )
+
+        if tenant_ids is not None:
+            query = query.filter(Tenant.id.in_(tenant_ids))
+        if unit_prefix:
+            query = query.filter(Tenant.unit_number.like(f'{escape_like(unit_prefix)}%', escape='\\'))
+        return query.order_by(Tenant.id).all()
+
+    def tenants_in_arrears(self, scope='arrears', tenant_ids=None, unit_prefix=None):
+        """Active tenants still owing this month: 'overdue' (nothing paid), 'partial' or 'arrears' (both)."""
+        rows = []
+        for row in self.tenant_totals(tenant_ids, unit_prefix):
+            if row.total_paid >= row.expected_rent:
+                continue
+            if scope == 'overdue' and row.total_paid > 0:
+                continue
+            if scope == 'partial' and row.total_paid <= 0:
+                continue
+            rows.append(row)
+        return rows
+
+    def total_collected(self):
+        return db.session.query(func.coalesce(func.sum(TenantMonthBalance.paid), 0.0)).filter(
+            TenantMonthBalance.year == self.today.year,
+            TenantMonthBalance.month == self.today.month
+        ).scalar()
+
+    def invoice_arrears(self):
+        """(outstanding, tenants) over invoices past due and not fully paid; served by the status/due_date index."""
+        return db.session.query(
+            func.coalesce(func.sum(Invoice.amount - Invoice.paid_amount), 0.0),
+            func.count(func.distinct(Invoice.tenant_id))
+        ).filter(
+            Invoice.status.in_(OPEN_STATUSES),
+            Invoice.due_date < self.today
+        ).one()
+
+    def get_summary(self):
+        rows = self.tenant_totals()
+
+        paid_count = 0
+        partial_tenants = []
+        overdue_tenants = []
+
+        for row in rows:
+            if row.total_paid >= row.expected_rent:
+                paid_count += 1
+            elif row.total_paid > 0:
+                partial_tenants.append({
+                    'tenant_id': row.id,
+                    'tenant_name': row.full_name,
+                    'unit_number': row.unit_number,
+                    'expected_rent': row.expected_rent,
+                    'paid_amount': row.total_paid,
+                    'opening_balance': row.opening_balance,
+                    # Balance still due including arrears carried in from earlier months.
+                    'remaining_amount': row.opening_balance + row.expected_rent - row.total_paid
+                })
+            else:
+                overdue_tenants.append({
+                    'tenant_id': row.id,
+                    'tenant_name': row.full_name,
+                    'unit_number': row.unit_number,
+                    'expected_rent': row.expected_rent
+                })
+
+        arrears_outstanding, arrears_tenants = self.invoice_arrears()
+
+        return {
+            'total_tenants': len(rows),
+            'total_expected': sum([row.expected_rent for row in rows]),
+            'total_collected': self.total_collected(),
+            'paid_count': paid_count,
+            'partial_count': len(partial_tenants),
+            'overdue_count': len(overdue_tenants),
+            'partial_tenants': partial_tenants,
+            'overdue_tenants': overdue_tenants,
+            'arrears_outstanding': arrears_outstanding,
+            'arrears_tenant_count': arrears_tenants
+        }
@@ -0,0 +1,321 @@
+from flask import current_app
+from app import db
+from app.models.tenant import Tenant
+from app.models.payment import Payment, MPESA_REFERENCE_WHERE
+from app.models.alert import Alert
+from app.services.ledger_service import LedgerService
+from app.services.invoice_service import InvoiceService
+from app.services.search_service import SearchService
+from app.utils.phone import phone_key
+from app.utils.sql import insert_ignore
+from datetime import date, datetime
+from sqlalchemy import insert
+import csv
+import pytz
+
+TENANT_COLUMNS = ('full_name', 'phone', 'unit_number', 'expected_rent', 'lease_start_date', 'lease_end_date')
+PAYMENT_COLUMNS = ('amount', 'payment_date')
+PAYMENT_METHODS = ('Cash', 'M-PESA', 'Bank Transfer')
+MAX_REPORTED_ERRORS = 1000
+
+class ImportRowError(ValueError):
+    """A CSV row that cannot be imported; the message goes into the row report."""
+
+class ImportReport:
+    def __init__(self, kind, dry_run):
+        self.kind = kind
+        self.dry_run = dry_run
+        self.rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': message})
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'dry_run': self.dry_run,
+            'rows': self.rows,
+            'imported': self.imported,
+            'duplicates': self.duplicates,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors)
+        }
+
+def _required(row, name):
+    value = (row.get(name) or '').strip()
+    if not value:
+        raise ImportRowError(f'{name} is required')
+    return value
+
+def _amount(row, name, default=None):
+    value = (row.get(name) or '').strip()
+    if not value:
+        if default is not None:
+            return default
+        raise ImportRowError(f'{name} is required')
+    try:
+        amount = float(value.replace(',', ''))
+    except ValueError:
+        raise ImportRowError(f'{name} must be a number, got {value!r}')
+    if amount < 0:
+        raise ImportRowError(f'{name} cannot be negative')
+    return amount
+
+def _date(row, name):
+    value = _required(row, name)
+    try:
+        if '/' in value:
+            day, month, year = value.split('/')
+            return date(int(year), int(month), int(day))
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ImportRowError(f'{name} must be YYYY-MM-DD or DD/MM/YYYY, got {value!r}')
+
+def _chunks(reader, size):
+    chunk = []
+    # Row 1 is the header, so data rows start at 2 to match what a spreadsheet shows.
+    for row_number, row in enumerate(reader, start=2):
+        chunk.append((row_number, row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class ImportService:
+    """Streams tenant or payment CSVs into the database in executemany batches."""
+
+    def __init__(self, batch_size=None):
+        self.tz = pytz.timezone('Africa/Nairobi')
+        self.batch_size = batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 1000)
+
+    def _reader(self, stream, required_columns):
+        reader = csv.DictReader(stream)
+        missing = [name for name in required_columns if name not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f'CSV is missing columns: {", ".join(missing)}')
+        return reader
+
+    def import_tenants(self, stream, dry_run=False, imported_by=None):
+        reader = self._reader(stream, TENANT_COLUMNS)
+        report = ImportReport('tenants', dry_run)
+
+        occupied_units = {
+            unit.lower() for (unit,) in db.session.query(Tenant.unit_number).filter(Tenant.is_active.is_(True))
+        }
+
+        for chunk in _chunks(reader, self.batch_size):
+            rows = []
+            now = datetime.now(self.tz)
+            for row_number, row in chunk:
+                report.rows += 1
+                try:
+                    values = self._tenant_values(row, now)
+                except ImportRowError as e:
+                    report.error(row_number, str(e))
+                    continue
+                if values['unit_number'].lower() in occupied_units:
+                    report.duplicates += 1
+                    report.error(row_number, f'Unit {values["unit_number"]} already has an active tenant')
+                    continue
+                occupied_units.add(values['unit_number'].lower())
+                rows.append(values)
+
+            if rows and not dry_run:
+                statement = insert(Tenant).returning(
+                    Tenant.id, Tenant.full_name, Tenant.unit_number, Tenant.email, Tenant.phone, Tenant.is_active,
+                    sort_by_parameter_order=True
+                )
+                inserted = db.session.execute(statement, rows).all()
+                SearchService().index_tenants(inserted)
+                db.session.commit()
+            report.imported += len(rows)
+
+        if not dry_run and report.imported:
+            self._summary_alert(report, imported_by)
+            db.session.commit()
+        return report
+
+    def _tenant_values(self, row, now):
+        lease_start = _date(row, 'lease_start_date')
+        lease_end = _date(row, 'lease_end_date')
+        if lease_end < lease_start:
+            raise ImportRowError('lease_end_date is before lease_start_date')
+        phone = _required(row, 'phone')
+        if not phone_key(phone):
+            raise ImportRowError(f'phone {phone!r} is not a valid number')
+
+        return {
+            'full_name': _required(row, 'full_name'),
+            'phone': phone,
+            'phone_key': phone_key(phone),
+            'email': (row.get('email') or '').strip(),
+            'unit_number': _required(row, 'unit_number'),
+            'expected_rent': _amount(row, 'expected_rent'),
+            'deposit_amount': _amount(row, 'deposit_amount', default=0.0),
+            'lease_start_date': lease_start,
+            'lease_end_date': lease_end,
+            'notes': (row.get('notes') or '').strip(),
+            'is_active': True,
+            'created_at': now,
+            'updated_at': now
+        }
+
+    def import_payments(self, stream, dry_run=False, imported_by=None):
+        reader = self._reader(stream, PAYMENT_COLUMNS)
+        if not {'unit_number', 'phone', 'tenant_id'} & set(reader.fieldnames):
+            raise ValueError('CSV needs a unit_number, phone or tenant_id column to identify tenants')
+        report = ImportReport('payments', dry_run)
+
+        # One pass over tenants resolves every row; active tenants win a shared unit.
+        tenants = db.session.query(
+            Tenant.id, Tenant.unit_number, Tenant.phone_key, Tenant.expected_rent, Tenant.is_active
+        ).order_by(Tenant.is_active, Tenant.id).all()
+        expected_rent = {t.id: t.expected_rent for t in tenants}
+        by_unit = {t.unit_number.lower(): t.id for t in tenants}
+        by_phone = {}
+        for t in tenants:
+            if t.phone_key:
+                by_phone.setdefault(t.phone_key, set()).add(t.id)
+
+        seen_references = set()
+        touched_tenants = set()
+        for chunk in _chunks(reader, self.batch_size):
+            rows = []
+            now = datetime.now(self.tz)
+            for row_number, row in chunk:
+                report.rows += 1
+                try:
+                    values = self._payment_values(row, by_unit, by_phone, expected_rent, imported_by, now)
+                except ImportRowError as e:
+                    report.error(row_number, str(e))
+                    continue
+
+                reference = values['transaction_reference']
+                if values['payment_method'] == 'M-PESA' and reference:
+                    if reference in seen_references:
+                        report.duplicates += 1
+                        report.error(row_number, f'M-PESA reference {reference} appears more than once in the file')
+                        continue
+                    seen_references.add(reference)
+                rows.append((row_number, values))
+
+            if rows and not dry_run:
+                inserted = self._insert_payments(rows, report)
+                touched_tenants.update(row.tenant_id for row in inserted)
+                SearchService().index_payments([(p[0], p[1], p[2]) for p in inserted])
+                db.session.commit()
+            elif rows:
+                self._check_recorded(rows, report)
+
+        if not dry_run and touched_tenants:
+            # Backdated payments change every later month's carried balance, so
+            # replay the affected tenants once rather than per row.
+            LedgerService().rebuild(tenant_ids=sorted(touched_tenants))
+            # Allocation is oldest-payment-first, so backdated rows re-run it for those tenants.
+            InvoiceService().reallocate(touched_tenants)
+            self._summary_alert(report, imported_by)
+            db.session.commit()
+        return report
+
+    def _payment_values(self, row, by_unit, by_phone, expected_rent, imported_by, now):
+        tenant_id = self._resolve_tenant(row, by_unit, by_phone, expected_rent)
+        amount = _amount(row, 'amount')
+        if amount <= 0:
+            raise ImportRowError('amount must be greater than zero')
+        method = (row.get('payment_method') or 'Cash').strip()
+        if method not in PAYMENT_METHODS:
+            raise ImportRowError(f'payment_method must be one of {", ".join(PAYMENT_METHODS)}')
+
+        status, remaining = Payment.status_for(amount, expected_rent[tenant_id])
+        return {
+            'tenant_id': tenant_id,
+            'amount': amount,
+            'payment_date': _date(row, 'payment_date'),
+            'payment_method': method,
+            'payment_status': status,
+            'remaining_amount': remaining,
+            'transaction_reference': (row.get('transaction_reference') or '').strip(),
+            'notes': (row.get('notes') or '').strip(),
+            'logged_by': imported_by,
+            'receipt_sent': False,
+            'created_at': now,
+            'updated_at': now
+        }
+
+    def _resolve_tenant(self, row, by_unit, by_phone, expected_rent):
+        tenant_id = (row.get('tenant_id') or '').strip()
+        if tenant_id:
+            if not tenant_id.isdigit() or int(tenant_id) not in expected_rent:
+                raise ImportRowError(f'tenant_id {tenant_id} does not exist')
+            return int(tenant_id)
+
+        unit = (row.get('unit_number') or '').strip()
+        if unit:
+            if unit.lower() not in by_unit:
+                raise ImportRowError(f'No tenant found for unit {unit}')
+            return by_unit[unit.lower()]
+
+        phone = (row.get('phone') or '').strip()
+        matches = by_phone.get(phone_key(phone), set()) if phone else set()
+        if len(matches) == 1:
+            return next(iter(matches))
+        if matches:
+            raise ImportRowError(f'Phone {phone} matches {len(matches)} tenants; give unit_number instead')
+        raise ImportRowError('No tenant found for this row (give unit_number, phone or tenant_id)')
+
+    def _check_recorded(self, rows, report):
+        """Dry-run counterpart of _insert_payments: count rows whose M-PESA receipt is already in payments."""
+        references = [values['transaction_reference'] for row_number, values in rows
+                      if values['payment_method'] == 'M-PESA' and values['transaction_reference']]
+        recorded = {reference for (reference,) in db.session.query(Payment.transaction_reference).filter(
+            MPESA_REFERENCE_WHERE, Payment.transaction_reference.in_(references)
+        )} if references else set()
+
+        for row_number, values in rows:
+            if values['payment_method'] == 'M-PESA' and values['transaction_reference'] in recorded:
+                report.duplicates += 1
+                report.error(row_number, f'M-PESA reference {values["transaction_reference"]} is already recorded')
+            else:
+                report.imported += 1
+
+    def _insert_payments(self, rows, report):
+        # Re-imported M-PESA receipts hit the partial unique index and are skipped.
+        # A Core statement on the table skips the ORM bulk-insert bookkeeping.
+        payments = Payment.__table__
+        statement = insert_ignore(
+            db.session,
+            payments,
+            index_elements=['transaction_reference'],
+            index_where=MPESA_REFERENCE_WHERE
+        ).returning(
+            payments.c.id, payments.c.tenant_id, payments.c.transaction_reference, payments.c.payment_date
+        )
+        inserted = db.session.execute(statement, [values for row_number, values in rows]).all()
+
+        if len(inserted) < len(rows):
+            new_references = {row.transaction_reference for row in inserted if row.transaction_reference}
+            for row_number, values in rows:
+                if values['payment_method'] == 'M-PESA' and values['transaction_reference'] \
+                        and values['transaction_reference'] not in new_references:
+                    report.duplicates += 1
+                    report.error(row_number, f'M-PESA reference {values["transaction_reference"]} is already recorded')
+
+        report.imported += len(inserted)
+        return inserted
+
+    def _summary_alert(self, report, imported_by):
+        skipped = report.error_count
+        db.session.add(Alert(
+            alert_type=f'{report.kind}_imported',
+            message=f'Imported {report.imported} of {report.rows} {report.kind} from CSV'
+                    + (f'; {skipped} rows skipped' if skipped else ''),
+            severity='warning' if skipped else 'success'
+        ))
@@ -0,0 +1,314 @@
+from flask import current_app
+from app import db
+from app.models.tenant import Tenant
+from app.models.payment import Payment
+from app.models.invoice import Invoice, InvoicePayment, OPEN_STATUSES
+from app.models.tenant_month_balance import TenantMonthBalance
+from app.services.ledger_service import LedgerService, billing_window, prorated_charge
+from app.utils.sql import escape_like, insert_ignore
+from calendar import monthrange
+from datetime import date, datetime
+from sqlalchemy import func, insert, update
+import pytz
+
+class InvoiceService:
+    """Issues monthly rent invoices and applies payments to them, oldest invoice first."""
+
+    def __init__(self, today=None):
+        self.tz = pytz.timezone('Africa/Nairobi')
+        self.today = today or datetime.now(self.tz).date()
+        self.due_day = current_app.config.get('RENT_DUE_DAY', 1)
+        self.batch_size = current_app.config.get('INVOICE_BATCH_SIZE', 1000)
+
+    def due_date_for(self, year, month, first):
+        due_date = date(year, month, min(self.due_day, monthrange(year, month)[1]))
+        # A tenant moving in after the due day owes from the day they move in.
+        return max(due_date, first)
+
+    def billable_tenants(self, year, month, tenant_ids=None):
+        first = date(year, month, 1)
+        last = date(year, month, monthrange(year, month)[1])
+        query = db.session.query(
+            Tenant.id, Tenant.expected_rent, Tenant.lease_start_date, Tenant.lease_end_date
+        ).filter(
+            db.or_(Tenant.lease_start_date.is_(None), Tenant.lease_start_date <= last),
+            db.or_(
+                db.and_(Tenant.is_active == True, Tenant.lease_end_date.is_(None)),
+                Tenant.lease_end_date >= first
+            )
+        )
+        if tenant_ids is not None:
+            query = query.filter(Tenant.id.in_(tenant_ids))
+        return query.order_by(Tenant.id).all()
+
+    def recorded_charges(self, year, month, tenant_ids=None):
+        """{tenant_id: expected} from the ledger rows already open for the period."""
+        query = db.session.query(TenantMonthBalance.tenant_id, TenantMonthBalance.expected).filter(
+            TenantMonthBalance.year == year, TenantMonthBalance.month == month
+        )
+        if tenant_ids is not None:
+            query = query.filter(TenantMonthBalance.tenant_id.in_(tenant_ids))
+        return dict(query.all())
+
+    def invoice_rows(self, year, month, tenant_ids=None):
+        now = datetime.now(self.tz)
+        # A month the ledger already bills keeps the rent recorded for it, so a
+        # backfill after a rent change does not re-price history.
+        recorded = self.recorded_charges(year, month, tenant_ids)
+        rows = []
+        for tenant in self.billable_tenants(year, month, tenant_ids):
+            window = billing_window(tenant.lease_start_date, tenant.lease_end_date, year, month)
+            if not window:
+                continue
+            first, last = window
+            amount = recorded.get(tenant.id)
+            if amount is None:
+                amount = prorated_charge(tenant.expected_rent, year, month, first, last)
+            rows.append({
+                'tenant_id': tenant.id,
+                'year': year,
+                'month': month,
+                'period_start': first,
+                'period_end': last,
+                'amount': amount,
+                'paid_amount': 0.0,
+                'due_date': self.due_date_for(year, month, first),
+                'status': 'open',
+                'created_at': now,
+                'updated_at': now
+            })
+        return rows
+
+    def generate(self, year, month, tenant_ids=None, dry_run=False):
+        """Issue this period's invoices; tenants already invoiced for it are skipped, so reruns are safe."""
+        rows = self.invoice_rows(year, month, tenant_ids)
+        summary = {'year': year, 'month': month, 'billable': len(rows), 'created': 0, 'dry_run': dry_run}
+        if dry_run:
+            existing = db.session.query(func.count(Invoice.id)).filter(
+                Invoice.year == year, Invoice.month == month,
+                Invoice.tenant_id.in_([row['tenant_id'] for row in rows])
+            ).scalar() if rows else 0
+            summary['created'] = len(rows) - existing
+            return summary
+
+        created = []
+        statement = insert_ignore(
+            db.session, Invoice, index_elements=['tenant_id', 'year', 'month']
+        ).returning(Invoice.tenant_id)
+        for start in range(0, len(rows), self.batch_size):
+            result = db.session.execute(statement, rows[start:start + self.batch_size])
+            created.extend(tenant_id for (tenant_id,) in result)
+
+        summary['created'] = len(created)
+        # Prepayments and credit from overpaid months settle the new invoices straight away.
+        summary['allocated'] = self.allocate(created)
+        ledger_service = LedgerService()
+        for start in range(0, len(created), self.batch_size):
+            ledger_service.sync_invoiced(created[start:start + self.batch_size])
+        return summary
+
+    def _lock_tenants(self, tenant_ids):
+        # Same row lock as the ledger; ordered so two batches cannot deadlock.
+        db.session.query(Tenant.id).filter(Tenant.id.in_(tenant_ids)).order_by(Tenant.id).with_for_update().all()
+
+    def allocate(self, tenant_ids):
+        """Apply unallocated payment amounts to open invoices, oldest first on both sides; returns allocations made."""
+        tenant_ids = sorted(set(tenant_ids))
+        total = 0
+        for start in range(0, len(tenant_ids), self.batch_size):
+            chunk = tenant_ids[start:start + self.batch_size]
+            self._lock_tenants(chunk)
+            total += self._allocate_chunk(chunk)
+        return total
+
+    def _allocate_chunk(self, tenant_ids):
+        invoices_by_tenant = {}
+        for invoice in db.session.query(
+            Invoice.id, Invoice.tenant_id, Invoice.amount, Invoice.paid_amount
+        ).filter(
+            Invoice.tenant_id.in_(tenant_ids),
+            Invoice.status.in_(OPEN_STATUSES)
+        ).order_by(Invoice.tenant_id, Invoice.year, Invoice.month):
+            invoices_by_tenant.setdefault(invoice.tenant_id, []).append(
+                {'id': invoice.id, 'amount': invoice.amount, 'paid_amount': invoice.paid_amount}
+            )
+        if not invoices_by_tenant:
+            return 0
+
+        payments = db.session.query(
+            Payment.id, Payment.tenant_id, Payment.amount, Payment.allocated_amount
+        ).filter(
+            Payment.tenant_id.in_(list(invoices_by_tenant)),
+            Payment.allocated_amount < Payment.amount
+        ).order_by(Payment.tenant_id, Payment.payment_date, Payment.id).all()
+
+        now = datetime.now(self.tz)
+        allocations = []
+        touched_invoices = {}
+        payment_updates = []
+        queues = {tenant_id: list(invoices) for tenant_id, invoices in invoices_by_tenant.items()}
+        for payment in payments:
+            queue = queues[payment.tenant_id]
+            available = round(payment.amount - payment.allocated_amount, 2)
+            allocated = payment.allocated_amount
+            while available > 0 and queue:
+                invoice = queue[0]
+                applied = round(min(available, invoice['amount'] - invoice['paid_amount']), 2)
+                if applied > 0:
+                    allocations.append({
+                        'invoice_id': invoice['id'],
+                        'payment_id': payment.id,
+                        'amount': applied,
+                        'created_at': now
+                    })
+                    invoice['paid_amount'] = round(invoice['paid_amount'] + applied, 2)
+                    touched_invoices[invoice['id']] = invoice
+                    available = round(available - applied, 2)
+                    allocated = round(allocated + applied, 2)
+                if Invoice.status_for(invoice['amount'], invoice['paid_amount']) == 'paid':
+                    queue.pop(0)
+            if allocated != payment.allocated_amount:
+                payment_updates.append({'id': payment.id, 'allocated_amount': allocated})
+
+        if allocations:
+            db.session.execute(insert(InvoicePayment), allocations)
+            db.session.execute(update(Invoice), [{
+                'id': invoice['id'],
+                'paid_amount': invoice['paid_amount'],
+                'status': Invoice.status_for(invoice['amount'], invoice['paid_amount']),
+                'updated_at': now
+            } for invoice in touched_invoices.values()])
+            db.session.execute(update(Payment), payment_updates)
+        return len(allocations)
+
+    def reset_allocations(self, tenant_ids):
+        """Undo every allocation for these tenants, e.g. before payments are deleted or invoices re-priced."""
+        tenant_ids = sorted(set(tenant_ids))
+        for start in range(0, len(tenant_ids), self.batch_size):
+            chunk = tenant_ids[start:start + self.batch_size]
+            self._lock_tenants(chunk)
+            invoice_ids = db.session.query(Invoice.id).filter(Invoice.tenant_id.in_(chunk))
+            InvoicePayment.query.filter(InvoicePayment.invoice_id.in_(invoice_ids)).delete(synchronize_session=False)
+            Invoice.query.filter(Invoice.tenant_id.in_(chunk)).update(
+                {'paid_amount': 0.0, 'status': 'open'}, synchronize_session=False
+            )
+            Payment.query.filter(Payment.tenant_id.in_(chunk)).update(
+                {'allocated_amount': 0.0}, synchronize_session=False
+            )
+            # Invoices re-priced to nothing have nothing left to pay.
+            Invoice.query.filter(Invoice.tenant_id.in_(chunk), Invoice.amount <= 0).update(
+                {'status': 'paid'}, synchronize_session=False
+            )
+
+    def reallocate(self, tenant_ids):
+        self.reset_allocations(tenant_ids)
+        return self.allocate(tenant_ids)
+
+    def apply_lease_change(self, tenant, previous_lease):
+        """Re-price issued invoices and the ledger after a move-in or move-out date changes; rent changes never rewrite them."""
+        changed = False
+        for invoice in Invoice.query.filter_by(tenant_id=tenant.id).all():
+            window = billing_window(tenant.lease_start_date, tenant.lease_end_date, invoice.year, invoice.month)
+            if window == (invoice.period_start, invoice.period_end):
+                continue
+            if window:
+                monthly_rent = self._issued_monthly_rent(invoice) or tenant.expected_rent
+                invoice.period_start, invoice.period_end = window
+                invoice.amount = prorated_charge(monthly_rent, invoice.year, invoice.month, *window)
+                invoice.due_date = self.due_date_for(invoice.year, invoice.month, window[0])
+            else:
+                invoice.amount = 0.0
+            changed = True
+
+        if changed:
+            db.session.flush()
+            self.reallocate([tenant.id])
+        LedgerService().apply_lease_change(tenant, previous_lease)
+        return changed
+
+    def _issued_monthly_rent(self, invoice):
+        # Keep the rent the invoice was issued at rather than the tenant's current rent.
+        billed_days = (invoice.period_end - invoice.period_start).days + 1
+        if invoice.amount <= 0 or billed_days <= 0:
+            return None
+        return invoice.amount * monthrange(invoice.year, invoice.month)[1] / billed_days
+
+    def arrears(self, unit_prefix=None):
+        """Per-tenant totals of invoices past their due date and not fully paid."""
+        outstanding = func.sum(Invoice.amount - Invoice.paid_amount)
+        query = db.session.query(
+            Tenant.id,
+            Tenant.full_name,
+            Tenant.unit_number,
+            Tenant.phone,
+            outstanding.label('outstanding'),
+            func.count(Invoice.id).label('invoices'),
+            func.min(Invoice.due_date).label('oldest_due_date')
+        ).join(
+            Tenant, Tenant.id == Invoice.tenant_id
+        ).filter(
+            Invoice.status.in_(OPEN_STATUSES),
+            Invoice.due_date < self.today
+        )
+        if unit_prefix:
+            query = query.filter(Tenant.unit_number.like(f'{escape_like(unit_prefix)}%', escape='\\'))
+        return query.group_by(
+            Tenant.id, Tenant.full_name, Tenant.unit_number, Tenant.phone
+        ).order_by(outstanding.desc(), Tenant.id).all()
+
+    def statement(self, tenant_id, start_date=None, end_date=None):
+        """Invoices and payments for a tenant in date order with a running balance."""
+        opening_balance = 0.0
+        if start_date:
+            invoiced_before = db.session.query(func.coalesce(func.sum(Invoice.amount), 0.0)).filter(
+                Invoice.tenant_id == tenant_id, Invoice.period_start < start_date
+            ).scalar()
+            paid_before = db.session.query(func.coalesce(func.sum(Payment.amount), 0.0)).filter(
+                Payment.tenant_id == tenant_id, Payment.payment_date < start_date
+            ).scalar()
+            opening_balance = invoiced_before - paid_before
+
+        invoices = Invoice.query.filter(Invoice.tenant_id == tenant_id)
+        payments = Payment.query.filter(Payment.tenant_id == tenant_id)
+        if start_date:
+            invoices = invoices.filter(Invoice.period_start >= start_date)
+            payments = payments.filter(Payment.payment_date >= start_date)
+        if end_date:
+            invoices = invoices.filter(Invoice.period_start <= end_date)
+            payments = payments.filter(Payment.payment_date <= end_date)
+
+        entries = [(invoice.period_start, 0, invoice.id, {
+            'type': 'invoice',
+            'date': invoice.period_start.isoformat(),
+            'invoice_id': invoice.id,
+            'description': f'Rent {invoice.year}-{invoice.month:02d}',
+            'debit': invoice.amount,
+            'credit': 0.0,
+            'status': invoice.status,
+            'due_date': invoice.due_date.isoformat()
+        }) for invoice in invoices]
+        entries += [(payment.payment_date, 1, payment.id, {
+            'type': 'payment',
+            'date': payment.payment_date.isoformat(),
+            'payment_id': payment.id,
+            'description': f'{payment.payment_method} {payment.transaction_reference or ""}'.strip(),
+            'debit': 0.0,
+            'credit': payment.amount
+        }) for payment in payments]
+        entries.sort(key=lambda entry: entry[:3])
+
+        balance = opening_balance
+        lines = []
+        for entry_date, order, entry_id, line in entries:
+            balance = round(balance + line['debit'] - line['credit'], 2)
+            line['balance'] = balance
+            lines.append(line)
+
+        return {
+            'tenant_id': tenant_id,
+            'start_date': start_date.isoformat() if start_date else None,
+            'end_date': end_date.isoformat() if end_date else None,
+            'opening_balance': opening_balance,
+            'closing_balance': balance,
+            'lines': lines
+        }
@@ -0,0 +1,396 @@
+from app import db
+from app.models.tenant import Tenant
+from app.models.payment import Payment
+from app.models.tenant_month_balance import TenantMonthBalance
+from app.models.invoice import Invoice
+from calendar import monthrange
+from datetime import date, datetime
+from sqlalchemy import and_, func, insert, update
+import pytz
+
+def period_index(year, month):
+    return year * 12 + month - 1
+
+def period_of(index):
+    return index // 12, index % 12 + 1
+
+def billing_window(lease_start, lease_end, year, month):
+    """(first, last) billed day of the month for a lease, or None when the lease does not touch it."""
+    first = date(year, month, 1)
+    last = date(year, month, monthrange(year, month)[1])
+    if lease_start and lease_start > first:
+        first = lease_start
+    if lease_end and lease_end < last:
+        last = lease_end
+    if first > last:
+        return None
+    return first, last
+
+def prorated_charge(rent, year, month, first, last):
+    days_in_month = monthrange(year, month)[1]
+    days = (last - first).days + 1
+    if days >= days_in_month:
+        return rent
+    return round(rent * days / days_in_month, 2)
+
+class LedgerService:
+    """Stages tenant_month_balance changes on db.session; callers commit them with their own write.
+
+    Each month row carries the previous month's closing balance in as
+    opening_balance, so the latest row answers "what is owed now" without
+    replaying payment history. A month bills what its invoice says; months
+    not invoiced yet bill what InvoiceService would issue for them, i.e.
+    the current rent prorated to the days the lease covers.
+    """
+
+    def __init__(self):
+        self.tz = pytz.timezone('Africa/Nairobi')
+
+    def current_period(self):
+        today = datetime.now(self.tz).date()
+        return today.year, today.month
+
+    def get_balance(self, tenant_id, year, month, lock=False):
+        query = TenantMonthBalance.query.filter_by(tenant_id=tenant_id, year=year, month=month)
+        if lock:
+            query = query.with_for_update()
+        return query.first()
+
+    def lock_tenant(self, tenant_id):
+        # Serialises balance updates per tenant; SQLite ignores FOR UPDATE and
+        # relies on its single writer instead.
+        db.session.query(Tenant.id).filter(Tenant.id == tenant_id).with_for_update().first()
+
+    def _issued(self, tenant_id, first, last):
+        """{period index: amount} of the tenant's invoices for months first..last inclusive."""
+        first_year, first_month = period_of(first)
+        last_year, last_month = period_of(last)
+        query = db.session.query(Invoice.year, Invoice.month, Invoice.amount).filter(
+            Invoice.tenant_id == tenant_id,
+            (Invoice.year > first_year) | ((Invoice.year == first_year) & (Invoice.month >= first_month)),
+            (Invoice.year < last_year) | ((Invoice.year == last_year) & (Invoice.month <= last_month))
+        )
+        return {period_index(row.year, row.month): row.amount for row in query}
+
+    def _charge(self, tenant, index, issued):
+        if index in issued:
+            return issued[index]
+        year, month = period_of(index)
+        window = billing_window(tenant.lease_start_date, tenant.lease_end_date, year, month)
+        if not window:
+            return 0.0
+        return prorated_charge(tenant.expected_rent, year, month, *window)
+
+    def _expected_for(self, tenant, index):
+        return self._charge(tenant, index, self._issued(tenant.id, index, index))
+
+    def _billed_between(self, tenant, first, last):
+        """Rent for months first..last inclusive that have no ledger row."""
+        start = tenant.lease_start_date
+        if start:
+            first = max(first, period_index(start.year, start.month))
+        if first > last:
+            return 0.0
+        issued = self._issued(tenant.id, first, last)
+        return sum(self._charge(tenant, index, issued) for index in range(first, last + 1))
+
+    def carried_opening(self, tenant, year, month):
+        index = period_index(year, month)
+        prior = TenantMonthBalance.query.filter(
+            TenantMonthBalance.tenant_id == tenant.id,
+            (TenantMonthBalance.year < year) | (
+                (TenantMonthBalance.year == year) & (TenantMonthBalance.month < month)
+            )
+        ).order_by(TenantMonthBalance.year.desc(), TenantMonthBalance.month.desc()).first()
+
+        if prior:
+            return prior.closing_balance + self._billed_between(tenant, period_index(prior.year, prior.month) + 1, index - 1)
+        if not tenant.lease_start_date:
+            return 0.0
+        start = tenant.lease_start_date
+        return self._billed_between(tenant, period_index(start.year, start.month), index - 1)
+
+    def get_or_create_balance(self, tenant, year, month):
+        balance = self.get_balance(tenant.id, year, month, lock=True)
+        if not balance:
+            balance = TenantMonthBalance(
+                tenant_id=tenant.id,
+                year=year,
+                month=month,
+                opening_balance=self.carried_opening(tenant, year, month),
+                expected=self._expected_for(tenant, period_index(year, month)),
+                paid=0.0
+            )
+            balance.refresh()
+            db.session.add(balance)
+        return balance
+
+    def period_balance(self, tenant, year, month):
+        """The month's row, or an unsaved one carrying the balance forward; nothing is written."""
+        balance = self.get_balance(tenant.id, year, month)
+        if balance:
+            return balance
+        balance = TenantMonthBalance(
+            tenant_id=tenant.id,
+            year=year,
+            month=month,
+            opening_balance=self.carried_opening(tenant, year, month),
+            expected=self._expected_for(tenant, period_index(year, month)),
+            paid=0.0
+        )
+        balance.refresh()
+        return balance
+
+    def record_payment(self, payment, tenant):
+        balance = self.record_amount(tenant, payment.payment_date.year, payment.payment_date.month, payment.amount)
+        payment.apply_balance(balance)
+        return balance
+
+    def record_amount(self, tenant, year, month, amount):
+        self.lock_tenant(tenant.id)
+        balance = self.get_or_create_balance(tenant, year, month)
+        balance.paid += amount
+        balance.refresh()
+        self._carry_forward(tenant, balance)
+        return balance
+
+    def _later_rows(self, tenant, balance):
+        return TenantMonthBalance.query.filter(
+            TenantMonthBalance.tenant_id == tenant.id,
+            (TenantMonthBalance.year > balance.year) | (
+                (TenantMonthBalance.year == balance.year) & (TenantMonthBalance.month > balance.month)
+            )
+        ).order_by(TenantMonthBalance.year, TenantMonthBalance.month).with_for_update().all()
+
+    def _carry_forward(self, tenant, balance):
+        """Re-open every later month from `balance`; only backdated payments and rent changes have any."""
+        later = self._later_rows(tenant, balance)
+        previous = balance
+        for row in later:
+            gap = self._billed_between(
+                tenant,
+                period_index(previous.year, previous.month) + 1,
+                period_index(row.year, row.month) - 1
+            )
+            row.opening_balance = previous.closing_balance + gap
+            row.refresh()
+            previous = row
+        return later
+
+    def update_expected_rent(self, tenant):
+        # Past months keep the rent that applied at the time; only the current
+        # and any already-opened future periods follow the new amount, and
+        # months already invoiced keep the invoiced charge.
+        self.lock_tenant(tenant.id)
+        year, month = self.current_period()
+        balance = self.get_or_create_balance(tenant, year, month)
+        later = self._later_rows(tenant, balance)
+
+        current = period_index(year, month)
+        last = max([current] + [period_index(row.year, row.month) for row in later])
+        issued = self._issued(tenant.id, current, last)
+        for row in [balance] + later:
+            row.expected = self._charge(tenant, period_index(row.year, row.month), issued)
+        balance.refresh()
+        self._carry_forward(tenant, balance)
+        return [balance] + later
+
+    def apply_lease_change(self, tenant, previous_lease):
+        """Re-bill the month rows for new move-in or move-out dates; runs after the invoices are re-priced."""
+        self.lock_tenant(tenant.id)
+        rows = TenantMonthBalance.query.filter_by(tenant_id=tenant.id).order_by(
+            TenantMonthBalance.year, TenantMonthBalance.month
+        ).with_for_update().all()
+        if not rows:
+            return rows
+
+        issued = self._issued(tenant.id, period_index(rows[0].year, rows[0].month), period_index(rows[-1].year, rows[-1].month))
+        for row in rows:
+            index = period_index(row.year, row.month)
+            window = billing_window(tenant.lease_start_date, tenant.lease_end_date, row.year, row.month)
+            # A whole month keeps the rent recorded for it; only the months the
+            # lease now starts, ends or stops covering are re-billed.
+            if index in issued:
+                row.expected = issued[index]
+            elif not window:
+                row.expected = 0.0
+            elif window != billing_window(None, None, row.year, row.month) or not row.expected:
+                monthly_rent = self._recorded_monthly_rent(row, previous_lease) or tenant.expected_rent
+                row.expected = prorated_charge(monthly_rent, row.year, row.month, *window)
+
+        first = rows[0]
+        first.opening_balance = self.carried_opening(tenant, first.year, first.month)
+        first.refresh()
+        self._carry_forward(tenant, first)
+        return rows
+
+    def _recorded_monthly_rent(self, row, previous_lease):
+        # Scale the row's charge back up over the days the old lease billed.
+        window = billing_window(*previous_lease, row.year, row.month)
+        if not row.expected or not window:
+            return None
+        return row.expected * monthrange(row.year, row.month)[1] / ((window[1] - window[0]).days + 1)
+
+    def sync_invoiced(self, tenant_ids):
+        """Set month rows to their invoice's amount where they differ, e.g. once invoices are issued or re-priced."""
+        mismatched = db.session.query(TenantMonthBalance, Invoice.amount).join(
+            Invoice, and_(
+                Invoice.tenant_id == TenantMonthBalance.tenant_id,
+                Invoice.year == TenantMonthBalance.year,
+                Invoice.month == TenantMonthBalance.month
+            )
+        ).filter(
+            TenantMonthBalance.tenant_id.in_(tenant_ids),
+            func.abs(TenantMonthBalance.expected - Invoice.amount) > 0.005
+        ).order_by(TenantMonthBalance.tenant_id, TenantMonthBalance.year, TenantMonthBalance.month).all()
+
+        earliest = {}
+        for row, amount in mismatched:
+            row.expected = amount
+            row.refresh()
+            earliest.setdefault(row.tenant_id, row)
+        for tenant_id, row in earliest.items():
+            self.lock_tenant(tenant_id)
+            self._carry_forward(db.session.get(Tenant, tenant_id), row)
+        return len(mismatched)
+
+    def compute(self, tenant_ids=None):
+        """Replay payment history into (month rows, payment statuses) without writing anything."""
+        year, month = self.current_period()
+        current = period_index(year, month)
+
+        tenant_query = db.session.query(
+            Tenant.id, Tenant.expected_rent, Tenant.lease_start_date, Tenant.lease_end_date, Tenant.is_active
+        )
+        payment_query = db.session.query(
+            Payment.id, Payment.tenant_id, Payment.amount, Payment.payment_date,
+            Payment.payment_status, Payment.remaining_amount
+        )
+        expected_query = db.session.query(
+            TenantMonthBalance.tenant_id, TenantMonthBalance.year, TenantMonthBalance.month, TenantMonthBalance.expected
+        )
+        invoice_query = db.session.query(Invoice.tenant_id, Invoice.year, Invoice.month, Invoice.amount)
+        if tenant_ids is not None:
+            tenant_query = tenant_query.filter(Tenant.id.in_(tenant_ids))
+            payment_query = payment_query.filter(Payment.tenant_id.in_(tenant_ids))
+            expected_query = expected_query.filter(TenantMonthBalance.tenant_id.in_(tenant_ids))
+            invoice_query = invoice_query.filter(Invoice.tenant_id.in_(tenant_ids))
+
+        # Invoices fix what a month bills. Before one is issued, rent history
+        # lives only in the rows themselves, so keep what they recorded.
+        issued_by_tenant = {}
+        for invoice in invoice_query:
+            issued_by_tenant.setdefault(invoice.tenant_id, {})[period_index(invoice.year, invoice.month)] = invoice.amount
+        recorded_expected = {(r.tenant_id, r.year, r.month): r.expected for r in expected_query}
+        payments_by_tenant = {}
+        for payment in payment_query.order_by(Payment.tenant_id, Payment.payment_date, Payment.id):
+            payments_by_tenant.setdefault(payment.tenant_id, []).append(payment)
+
+        rows = []
+        payment_updates = []
+        for tenant in tenant_query.order_by(Tenant.id):
+            issued = issued_by_tenant.get(tenant.id, {})
+            payments = payments_by_tenant.get(tenant.id, [])
+            by_period = {}
+            for payment in payments:
+                by_period.setdefault(period_index(payment.payment_date.year, payment.payment_date.month), []).append(payment)
+
+            start = tenant.lease_start_date
+            first_candidates = list(by_period)
+            if start:
+                first_candidates.append(period_index(start.year, start.month))
+            if not first_candidates:
+                continue
+            last = current
+            if not tenant.is_active and tenant.lease_end_date:
+                last = min(current, period_index(tenant.lease_end_date.year, tenant.lease_end_date.month))
+            last = max([last] + list(by_period))
+
+            opening = 0.0
+            for index in range(min(first_candidates), last + 1):
+                row_year, row_month = period_of(index)
+                expected = issued.get(index)
+                if expected is None:
+                    expected = recorded_expected.get((tenant.id, row_year, row_month))
+                if expected is None:
+                    expected = self._charge(tenant, index, issued)
+                paid = 0.0
+                for payment in by_period.get(index, []):
+                    paid += payment.amount
+                    remaining = max(opening + expected - paid, 0.0)
+                    status = 'Full' if remaining <= 0 else 'Partial'
+                    if payment.payment_status != status or payment.remaining_amount != remaining:
+                        payment_updates.append({'id': payment.id, 'payment_status': status, 'remaining_amount': remaining})
+
+                row = TenantMonthBalance(
+                    tenant_id=tenant.id, year=row_year, month=row_month,
+                    opening_balance=opening, expected=expected, paid=paid
+                )
+                row.refresh()
+                rows.append(row)
+                opening = row.closing_balance
+
+        return rows, payment_updates
+
+    def rebuild(self, tenant_ids=None):
+        """Recompute every month row and payment status from raw payments, optionally for some tenants only."""
+        rows, payment_updates = self.compute(tenant_ids)
+
+        delete_query = TenantMonthBalance.query
+        if tenant_ids is not None:
+            delete_query = delete_query.filter(TenantMonthBalance.tenant_id.in_(tenant_ids))
+        delete_query.delete(synchronize_session=False)
+
+        now = datetime.now(self.tz)
+        if rows:
+            db.session.execute(insert(TenantMonthBalance), [{
+                'tenant_id': row.tenant_id,
+                'year': row.year,
+                'month': row.month,
+                'opening_balance': row.opening_balance,
+                'expected': row.expected,
+                'paid': row.paid,
+                'remaining': row.remaining,
+                'status': row.status,
+                'updated_at': now
+            } for row in rows])
+        if payment_updates:
+            db.session.execute(update(Payment), payment_updates)
+        return len(rows)
+
+    def check(self, tenant_ids=None, tolerance=0.005):
+        """Compare stored rows with a replay of history; returns a list of drift records."""
+        # Payment statuses are receipts as issued, so a later rent change or a
+        # backdated payment is not drift; only the month rows are compared.
+        rows, _ = self.compute(tenant_ids)
+        computed = {(row.tenant_id, row.year, row.month): row for row in rows}
+
+        stored_query = TenantMonthBalance.query
+        if tenant_ids is not None:
+            stored_query = stored_query.filter(TenantMonthBalance.tenant_id.in_(tenant_ids))
+
+        drift = []
+        seen = set()
+        for stored in stored_query:
+            key = (stored.tenant_id, stored.year, stored.month)
+            seen.add(key)
+            expected_row = computed.get(key)
+            if expected_row is None:
+                if stored.paid:
+                    drift.append({'tenant_id': stored.tenant_id, 'year': stored.year, 'month': stored.month,
+                                  'field': 'paid', 'stored': stored.paid, 'expected': 0.0})
+                continue
+            for field in ('opening_balance', 'paid', 'remaining'):
+                stored_value = getattr(stored, field) or 0.0
+                expected_value = getattr(expected_row, field)
+                if abs(stored_value - expected_value) > tolerance:
+                    drift.append({'tenant_id': stored.tenant_id, 'year': stored.year, 'month': stored.month,
+                                  'field': field, 'stored': stored_value, 'expected': expected_value})
+
+        # A month with payments must have a row; empty months may stay virtual.
+        for key, row in computed.items():
+            if key not in seen and row.paid:
+                drift.append({'tenant_id': key[0], 'year': key[1], 'month': key[2],
+                              'field': 'paid', 'stored': None, 'expected': row.paid})
+
+        return drift
@@ -1,89 +1,105 @@
 ﻿from flask import current_app
 from app.models.template import Template
+from app.models.sms_log import SMSLog
+from app.utils.template_engine import template_cache
+from app.services.sms_providers import sms_providers, SMSProviderError, SMSDeliveryError
 from app import db
 
 class MessagingService:
     def __init__(self):
         self.provider = current_app.config.get('SMS_PROVIDER', 'twilio')
     
-    def send_sms(self, phone, message, recipient_name=''):
-        if self.provider == 'twilio':
-            return self._send_via_twilio(phone, message)
-        elif self.provider == 'mock':
-            return self._send_via_mock(phone, message, recipient_name)
-        else:
-            current_app.logger.info(f'SMS to {phone} ({recipient_name}): {message}')
-            return True
+    def deliver(self, phone, message, recipient_name=''):
+        """Send through the primary provider, failing over down the chain; returns the provider name."""
+        errors = []
+        for provider in sms_providers.chain(current_app.config):
+            try:
+                provider.send(phone, message, recipient_name)
+                return provider.name
+            except SMSProviderError as e:
+                errors.append(str(e))
+        raise SMSDeliveryError('; '.join(errors))
     
-    def _send_via_mock(self, phone, message, recipient_name=''):
-        """Mock SMS sending for development - logs instead of actually sending"""
-        current_app.logger.info('='*50)
-        current_app.logger.info('📱 MOCK SMS SENT')
-        current_app.logger.info(f'To: {phone} ({recipient_name})')
-        current_app.logger.info(f'Message: {message}')
-        current_app.logger.info('='*50)
-        return True
-    
-    def _send_via_twilio(self, phone, message):
+    def send_sms(self, phone, message, recipient_name=''):
         try:
-            from twilio.rest import Client
-            
-            account_sid = current_app.config.get('TWILIO_ACCOUNT_SID')
-            auth_token = current_app.config.get('TWILIO_AUTH_TOKEN')
-            from_phone = current_app.config.get('TWILIO_PHONE_NUMBER')
-            
-            if not all([account_sid, auth_token, from_phone]):
-                current_app.logger.warning('Twilio credentials not configured. SMS not sent.')
-                return False
-            
-            client = Client(account_sid, auth_token)
-            message = client.messages.create(
-                body=message,
-                from_=from_phone,
-                to=phone
-            )
-            
+            self.deliver(phone, message, recipient_name)
             return True
-        except Exception as e:
-            current_app.logger.error(f'Failed to send SMS via Twilio: {str(e)}')
+        except SMSDeliveryError as e:
+            current_app.logger.error(f'Failed to send SMS to {phone}: {str(e)}')
             return False
     
-    def send_payment_receipt(self, payment, tenant):
-        template = Template.query.filter_by(
-            category='receipt',
-            theme='formal',
-            is_active=True
-        ).first()
+    def _active_template(self, category, theme=None):
+        def load():
+            query = Template.query.filter_by(category=category, is_active=True)
+            if theme:
+                query = query.filter_by(theme=theme)
+            return query.first()
+        return template_cache.lookup((category, theme), load)
+    
+    def render_payment_receipt(self, payment, tenant):
+        template = self._active_template('receipt', 'formal')
         
         if template:
-            message = template.render(
-                tenant_name=tenant.full_name,
-                unit_number=tenant.unit_number,
-                amount=payment.amount,
-                payment_date=payment.payment_date.strftime('%d/%m/%Y'),
-                remaining_amount=payment.remaining_amount,
-                transaction_reference=payment.transaction_reference or 'N/A'
-            )
+            message = template.render({
+                'tenant_name': tenant.full_name,
+                'unit_number': tenant.unit_number,
+                'amount': payment.amount,
+                'payment_date': payment.payment_date.strftime('%d/%m/%Y'),
+                'remaining_amount': payment.remaining_amount,
+                'transaction_reference': payment.transaction_reference or 'N/A'
+            })
         else:
             message = f'Receipt: Payment of KES {payment.amount} received for Unit {tenant.unit_number} on {payment.payment_date.strftime("%d/%m/%Y")}.'
             if payment.remaining_amount > 0:
                 message += f' Remaining balance: KES {payment.remaining_amount}.'
         
-        return self.send_sms(tenant.phone, message, tenant.full_name)
+        return message
     
-    def send_rent_reminder(self, tenant, remaining_amount=None):
-        template = Template.query.filter_by(
-            category='reminder',
-            is_active=True
-        ).first()
+    def render_rent_reminder(self, tenant, remaining_amount=None, due_date=None):
+        template = self._active_template('reminder')
         
         if template:
-            message = template.render(
-                tenant_name=tenant.full_name,
-                unit_number=tenant.unit_number,
-                remaining_amount=remaining_amount or tenant.expected_rent
-            )
+            values = {
+                'tenant_name': tenant.full_name,
+                'unit_number': tenant.unit_number,
+                'remaining_amount': remaining_amount or tenant.expected_rent
+            }
+            if due_date:
+                values['due_date'] = due_date.strftime('%d/%m/%Y')
+            message = template.render(values)
         else:
             message = f'Reminder: Rent of KES {remaining_amount or tenant.expected_rent} is due for Unit {tenant.unit_number}.'
         
+        return message
+    
+    def send_payment_receipt(self, payment, tenant):
+        message = self.render_payment_receipt(payment, tenant)
+        return self.send_sms(tenant.phone, message, tenant.full_name)
+    
+    def send_rent_reminder(self, tenant, remaining_amount=None):
+        message = self.render_rent_reminder(tenant, remaining_amount)
         return self.send_sms(tenant.phone, message, tenant.full_name)
+    
+    def queue_sms(self, phone, message, recipient_name='', message_type='manual', sent_by=None, payment_id=None, tenant_id=None):
+        """Stage an SMSLog row for the outbox workers; the caller commits it."""
+        sms_log = SMSLog(
+            tenant_id=tenant_id,
+            recipient_phone=phone,
+            recipient_name=recipient_name,
+            message=message,
+            message_type=message_type,
+            status='pending',
+            sent_by=sent_by,
+            payment_id=payment_id,
+            attempts=0
+        )
+        db.session.add(sms_log)
+        return sms_log
+    
+    def queue_payment_receipt(self, payment, tenant, sent_by=None):
+        message = self.render_payment_receipt(payment, tenant)
+        return self.queue_sms(tenant.phone, message, tenant.full_name, 'receipt', sent_by, payment.id, tenant.id)
+    
+    def queue_rent_reminder(self, tenant, remaining_amount=None, sent_by=None):
+        message = self.render_rent_reminder(tenant, remaining_amount)
+        return self.queue_sms(tenant.phone, message, tenant.full_name, 'reminder', sent_by, tenant_id=tenant.id)
@@ -0,0 +1,247 @@
+from flask import current_app
+from app import db
+from app.models.mpesa_inbox import MpesaInbox
+from app.models.payment import Payment, MPESA_REFERENCE_WHERE
+from app.models.alert import Alert
+from app.models.stk_push_request import StkPushRequest
+from app.services.mpesa_service import MPesaService
+from app.services.ledger_service import LedgerService
+from app.services.invoice_service import InvoiceService
+from app.services.search_service import SearchService
+from app.utils.phone import phone_key
+from app.utils.sql import insert_ignore
+from app.utils.workers import BackgroundWorkerPool
+from datetime import datetime, timedelta
+from sqlalchemy import update
+import json
+import pytz
+import uuid
+
+class MpesaInboxService:
+    """Durable inbox for Daraja callbacks: store on receipt, settle in batches later."""
+
+    def __init__(self):
+        self.tz = pytz.timezone('Africa/Nairobi')
+        self.batch_size = current_app.config.get('MPESA_INBOX_BATCH_SIZE', 100)
+        self.max_attempts = current_app.config.get('MPESA_INBOX_MAX_ATTEMPTS', 5)
+        self.claim_timeout = timedelta(seconds=current_app.config.get('MPESA_INBOX_CLAIM_TIMEOUT', 300))
+
+    def enqueue(self, payload):
+        entry = MpesaInbox(payload=json.dumps(payload), status='pending')
+        db.session.add(entry)
+        return entry
+
+    def _claimable(self, now):
+        return db.or_(
+            MpesaInbox.status == 'pending',
+            db.and_(MpesaInbox.status == 'processing', MpesaInbox.claimed_at < now - self.claim_timeout)
+        )
+
+    def claim_batch(self):
+        now = datetime.now(self.tz)
+        candidates = db.session.query(MpesaInbox.id).filter(
+            self._claimable(now)
+        ).order_by(MpesaInbox.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+        if not candidates:
+            db.session.commit()
+            return []
+
+        # The conditional UPDATE is the actual claim, so two workers can never
+        # both win a row even on databases without SKIP LOCKED.
+        token = str(uuid.uuid4())
+        MpesaInbox.query.filter(
+            MpesaInbox.id.in_([c.id for c in candidates]),
+            self._claimable(now)
+        ).update({
+            'status': 'processing',
+            'claim_token': token,
+            'claimed_at': now,
+            'attempts': MpesaInbox.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+
+        return MpesaInbox.query.filter_by(claim_token=token, status='processing').order_by(MpesaInbox.id).all()
+
+    def process_batch(self):
+        entries = self.claim_batch()
+        if not entries:
+            return 0
+
+        try:
+            self._settle(entries)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f'M-PESA inbox batch failed, retrying rows individually: {str(e)}')
+            for entry in entries:
+                self._process_single(entry.id, entry.claim_token)
+
+        return len(entries)
+
+    def drain(self):
+        total = 0
+        while True:
+            processed = self.process_batch()
+            if not processed:
+                return total
+            total += processed
+
+    def reprocess(self, entry_ids=None):
+        query = MpesaInbox.query.filter(MpesaInbox.status.in_(['poison', 'failed']))
+        if entry_ids:
+            query = query.filter(MpesaInbox.id.in_(entry_ids))
+        count = query.update({
+            'status': 'pending',
+            'attempts': 0,
+            'last_error': None,
+            'claim_token': None
+        }, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    def _process_single(self, entry_id, claim_token):
+        entry = db.session.get(MpesaInbox, entry_id)
+        if entry.claim_token != claim_token or entry.status != 'processing':
+            return
+        try:
+            self._settle([entry])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            entry = db.session.get(MpesaInbox, entry_id)
+            entry.status = 'poison' if entry.attempts >= self.max_attempts else 'pending'
+            entry.last_error = str(e)
+            entry.claim_token = None
+            db.session.commit()
+            current_app.logger.error(f'M-PESA inbox entry {entry_id} failed (attempt {entry.attempts}): {str(e)}')
+
+    def _settle(self, entries):
+        mpesa_service = MPesaService()
+        ledger_service = LedgerService()
+        now = datetime.now(self.tz)
+
+        parsed = []
+        outcomes = {}
+        for entry in entries:
+            payload = json.loads(entry.payload)
+            parsed.append((entry, mpesa_service.parse_callback(payload)))
+            checkout_request_id, result_code = mpesa_service.callback_outcome(payload)
+            if checkout_request_id:
+                outcomes[checkout_request_id] = 'paid' if result_code == 0 else 'cancelled'
+
+        tenants_by_key = mpesa_service.find_tenants_by_phone_keys(
+            [phone_key(result['phone']) for entry, result in parsed if result]
+        )
+
+        payments = {}
+        alerts = []
+        for entry, result in parsed:
+            entry.status = 'processed'
+            entry.processed_at = now
+            entry.last_error = None
+            if not result or result['transaction_id'] in payments:
+                continue
+
+            matches = tenants_by_key.get(phone_key(result['phone']), [])
+            if len(matches) == 1:
+                tenant = matches[0]
+                payment = Payment(
+                    tenant_id=tenant.id,
+                    amount=result['amount'],
+                    payment_date=(entry.received_at or now).date(),
+                    payment_method='M-PESA',
+                    transaction_reference=result['transaction_id']
+                )
+                payment.calculate_status(tenant.expected_rent)
+                payments[result['transaction_id']] = (payment, tenant)
+            elif matches:
+                tenant_names = ', '.join(f'{t.full_name} ({t.unit_number})' for t in matches)
+                alerts.append(Alert(
+                    alert_type='mpesa_ambiguous_match',
+                    message=f'M-PESA payment of KES {result["amount"]} from {result["phone"]} matches several tenants: {tenant_names}. Ref: {result["transaction_id"]}',
+                    severity='warning'
+                ))
+            else:
+                alerts.append(Alert(
+                    alert_type='mpesa_unmatched',
+                    message=f'Unmatched M-PESA payment of KES {result["amount"]} from {result["phone"]}',
+                    severity='warning'
+                ))
+
+        if payments:
+            inserted = self._insert_payments([payment for payment, tenant in payments.values()])
+
+            status_updates = []
+            for reference, payment_id in inserted.items():
+                payment, tenant = payments[reference]
+                # Per payment, so a second payment in the month sees the first one's balance.
+                balance = ledger_service.record_amount(
+                    tenant, payment.payment_date.year, payment.payment_date.month, payment.amount
+                )
+                payment.apply_balance(balance)
+                status_updates.append({
+                    'id': payment_id,
+                    'payment_status': payment.payment_status,
+                    'remaining_amount': payment.remaining_amount
+                })
+                alerts.append(Alert(
+                    alert_type='mpesa_payment_received',
+                    message=f'M-PESA payment of KES {payment.amount} received from {tenant.full_name}',
+                    severity='success',
+                    related_tenant_id=tenant.id,
+                    related_payment_id=payment_id
+                ))
+
+            if status_updates:
+                db.session.execute(update(Payment), status_updates)
+                InvoiceService().allocate([payments[reference][1].id for reference in inserted])
+
+        db.session.add_all(alerts)
+        self._update_push_requests(outcomes)
+
+    def _update_push_requests(self, outcomes):
+        for status in ('paid', 'cancelled'):
+            checkout_request_ids = [key for key, value in outcomes.items() if value == status]
+            if checkout_request_ids:
+                StkPushRequest.query.filter(
+                    StkPushRequest.checkout_request_id.in_(checkout_request_ids)
+                ).update({'status': status}, synchronize_session=False)
+
+    def _insert_payments(self, payments):
+        """Insert-or-ignore on the M-PESA receipt number; returns {reference: id} for new rows only."""
+        statement = insert_ignore(
+            db.session,
+            Payment,
+            index_elements=['transaction_reference'],
+            index_where=MPESA_REFERENCE_WHERE
+        ).returning(Payment.id, Payment.transaction_reference)
+
+        rows = [{
+            'tenant_id': payment.tenant_id,
+            'amount': payment.amount,
+            'payment_date': payment.payment_date,
+            'payment_method': payment.payment_method,
+            'payment_status': payment.payment_status,
+            'remaining_amount': payment.remaining_amount,
+            'transaction_reference': payment.transaction_reference
+        } for payment in payments]
+        payments_by_reference = {payment.transaction_reference: payment for payment in payments}
+
+        result = db.session.execute(statement, rows)
+        inserted = {row.transaction_reference: row.id for row in result}
+        SearchService().index_payments([
+            (payment_id, payments_by_reference[reference].tenant_id, reference)
+            for reference, payment_id in inserted.items()
+        ])
+        return inserted
+
+def _process_inbox_batch():
+    return MpesaInboxService().process_batch()
+
+mpesa_inbox_workers = BackgroundWorkerPool(
+    'mpesa-inbox',
+    _process_inbox_batch,
+    workers_config_key='MPESA_INBOX_WORKERS',
+    poll_interval_config_key='MPESA_INBOX_POLL_INTERVAL'
+)
@@ -1,8 +1,72 @@
-import requests
 from flask import current_app
 from app.models.tenant import Tenant
+from app.utils.instrumentation import track_http
+from app.utils.phone import phone_key
 from datetime import datetime
 import base64
+import threading
+import time
+
+class AccessTokenCache:
+    """Process-wide Daraja token cache; concurrent callers share one refresh."""
+    
+    def __init__(self, refresh_margin=60):
+        self.refresh_margin = refresh_margin
+        self.fetch_count = 0
+        self._tokens = {}
+        self._lock = threading.Lock()
+    
+    def _valid_token(self, key):
+        entry = self._tokens.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+    
+    def get(self, key, fetch):
+        token = self._valid_token(key)
+        if token:
+            return token
+        
+        with self._lock:
+            token = self._valid_token(key)
+            if token:
+                return token
+            
+            self.fetch_count += 1
+            token, expires_in = fetch()
+            if token:
+                ttl = max(expires_in - self.refresh_margin, 0)
+                self._tokens[key] = (token, time.monotonic() + ttl)
+            return token
+    
+    def invalidate(self, key):
+        with self._lock:
+            self._tokens.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self.fetch_count = 0
+
+access_token_cache = AccessTokenCache()
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session(pool_size=20):
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                # Imported on first use so booting a worker does not pay for requests/urllib3.
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
 
 class MPesaService:
     def __init__(self):
@@ -12,22 +76,36 @@ class MPesaService:
         self.passkey = current_app.config['MPESA_PASSKEY']
         self.callback_url = current_app.config['MPESA_CALLBACK_URL']
         self.environment = current_app.config['MPESA_ENVIRONMENT']
+        self.timeout = (
+            current_app.config.get('MPESA_CONNECT_TIMEOUT', 5),
+            current_app.config.get('MPESA_READ_TIMEOUT', 30)
+        )
+        self.http = get_http_session(current_app.config.get('MPESA_HTTP_POOL_SIZE', 20))
         
-        if self.environment == 'sandbox':
+        if current_app.config.get('MPESA_BASE_URL'):
+            self.base_url = current_app.config['MPESA_BASE_URL'].rstrip('/')
+        elif self.environment == 'sandbox':
             self.base_url = 'https://sandbox.safaricom.co.ke'
         else:
             self.base_url = 'https://api.safaricom.co.ke'
+        
+        self.token_key = (self.base_url, self.consumer_key)
     
-    def get_access_token(self):
+    def _fetch_access_token(self):
         url = f'{self.base_url}/oauth/v1/generate?grant_type=client_credentials'
         
         try:
-            response = requests.get(url, auth=(self.consumer_key, self.consumer_secret))
+            with track_http('mpesa'):
+                response = self.http.get(url, auth=(self.consumer_key, self.consumer_secret), timeout=self.timeout)
             response.raise_for_status()
-            return response.json().get('access_token')
+            data = response.json()
+            return data.get('access_token'), int(data.get('expires_in', 3599))
         except Exception as e:
             current_app.logger.error(f'Failed to get M-PESA access token: {str(e)}')
-            return None
+            return None, 0
+    
+    def get_access_token(self):
+        return access_token_cache.get(self.token_key, self._fetch_access_token)
     
     def initiate_stk_push(self, phone, amount, account_reference):
         access_token = self.get_access_token()
@@ -58,57 +136,90 @@ class MPesaService:
         url = f'{self.base_url}/mpesa/stkpush/v1/processrequest'
         
         try:
-            response = requests.post(url, json=payload, headers=headers)
+            with track_http('mpesa'):
+                response = self.http.post(url, json=payload, headers=headers, timeout=self.timeout)
+            if response.status_code == 401:
+                access_token_cache.invalidate(self.token_key)
             response.raise_for_status()
             return response.json().get('CheckoutRequestID')
         except Exception as e:
             current_app.logger.error(f'Failed to initiate STK push: {str(e)}')
             return None
     
+    def callback_outcome(self, callback_data):
+        stk_callback = callback_data.get('Body', {}).get('stkCallback', {})
+        return stk_callback.get('CheckoutRequestID'), stk_callback.get('ResultCode')
+    
+    def parse_callback(self, callback_data):
+        stk_callback = callback_data.get('Body', {}).get('stkCallback', {})
+        result_code = stk_callback.get('ResultCode')
+        
+        if result_code != 0:
+            return None
+        
+        callback_metadata = stk_callback.get('CallbackMetadata', {}).get('Item', [])
+        
+        amount = None
+        phone = None
+        transaction_id = None
+        
+        for item in callback_metadata:
+            if item.get('Name') == 'Amount':
+                amount = item.get('Value')
+            elif item.get('Name') == 'PhoneNumber':
+                phone = str(item.get('Value'))
+            elif item.get('Name') == 'MpesaReceiptNumber':
+                transaction_id = item.get('Value')
+        
+        if not all([amount, phone, transaction_id]):
+            return None
+        
+        return {
+            'amount': amount,
+            'phone': phone,
+            'transaction_id': transaction_id,
+            'checkout_request_id': stk_callback.get('CheckoutRequestID')
+        }
+    
     def process_callback(self, callback_data):
         try:
-            result_code = callback_data.get('Body', {}).get('stkCallback', {}).get('ResultCode')
-            
-            if result_code != 0:
-                return None
-            
-            callback_metadata = callback_data.get('Body', {}).get('stkCallback', {}).get('CallbackMetadata', {}).get('Item', [])
-            
-            amount = None
-            phone = None
-            transaction_id = None
-            
-            for item in callback_metadata:
-                if item.get('Name') == 'Amount':
-                    amount = item.get('Value')
-                elif item.get('Name') == 'PhoneNumber':
-                    phone = str(item.get('Value'))
-                elif item.get('Name') == 'MpesaReceiptNumber':
-                    transaction_id = item.get('Value')
-            
-            if not all([amount, phone, transaction_id]):
+            result = self.parse_callback(callback_data)
+            if not result:
                 return None
             
-            tenant = self.match_tenant(phone)
+            matches = self.find_tenants(result['phone'])
             
             return {
-                'amount': amount,
-                'phone': phone,
-                'transaction_id': transaction_id,
-                'tenant': tenant
+                **result,
+                'tenant': matches[0] if len(matches) == 1 else None,
+                'ambiguous_tenants': matches if len(matches) > 1 else []
             }
         except Exception as e:
             current_app.logger.error(f'Failed to process M-PESA callback: {str(e)}')
             return None
     
-    def match_tenant(self, phone):
-        normalized_phone = phone.replace('+', '').replace(' ', '')
-        
-        tenants = Tenant.query.filter_by(is_active=True).all()
+    def find_tenants(self, phone):
+        key = phone_key(phone)
+        if not key:
+            return []
+        return Tenant.query.filter_by(phone_key=key, is_active=True).order_by(Tenant.id).limit(5).all()
+    
+    def find_tenants_by_phone_keys(self, keys):
+        matches = {}
+        keys = [key for key in set(keys) if key]
+        if not keys:
+            return matches
         
+        tenants = Tenant.query.filter(
+            Tenant.phone_key.in_(keys),
+            Tenant.is_active == True
+        ).order_by(Tenant.id).all()
         for tenant in tenants:
-            tenant_phone = tenant.phone.replace('+', '').replace(' ', '')
-            if tenant_phone.endswith(normalized_phone[-9:]) or normalized_phone.endswith(tenant_phone[-9:]):
-                return tenant
-        
+            matches.setdefault(tenant.phone_key, []).append(tenant)
+        return matches
+    
+    def match_tenant(self, phone):
+        matches = self.find_tenants(phone)
+        if len(matches) == 1:
+            return matches[0]
         return None
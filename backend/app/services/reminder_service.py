@@ -0,0 +1,107 @@
+from flask import current_app
+from app import db
+from app.models.sms_log import SMSLog
+from app.services.dashboard_service import DashboardService
+from app.services.invoice_service import InvoiceService
+from app.services.messaging_service import MessagingService
+from app.services.sms_outbox_service import SMSOutboxService
+from app.utils.sql import insert_ignore
+from datetime import datetime, timedelta
+import pytz
+
+def parse_policies(value):
+    """'pre_due:-3,due:0,overdue:7' -> [('pre_due', -3), ('due', 0), ('overdue', 7)]"""
+    policies = []
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, offset = item.split(':')
+        policies.append((name.strip(), int(offset)))
+    return policies
+
+class ReminderService:
+    """Enqueues rent reminders for each policy whose send day has come, at most once per tenant, policy and month."""
+
+    def __init__(self, today=None):
+        self.tz = pytz.timezone('Africa/Nairobi')
+        self.today = today or datetime.now(self.tz).date()
+        self.invoices = InvoiceService(today=self.today)
+        self.policies = parse_policies(current_app.config.get('RENT_REMINDER_POLICIES', 'pre_due:-3,due:0,overdue:7'))
+        self.catch_up_days = current_app.config.get('RENT_REMINDER_CATCH_UP_DAYS', 2)
+        self.batch_size = current_app.config.get('RENT_REMINDER_BATCH_SIZE', 500)
+
+    def due_cycles(self):
+        """[(policy, offset, due_date)] firing today, including days a missed run should have covered."""
+        cycles = []
+        for name, offset in self.policies:
+            for days_late in range(self.catch_up_days + 1):
+                due_date = self.today - timedelta(days=days_late + offset)
+                # Same due day the month's invoices carry, clamped to the month's length.
+                if due_date == self.invoices.due_date_for(due_date.year, due_date.month, due_date.replace(day=1)):
+                    cycles.append((name, offset, due_date))
+        return cycles
+
+    def dedupe_key(self, policy, tenant_id, due_date):
+        return f'reminder:{policy}:{tenant_id}:{due_date.year}-{due_date.month:02d}'
+
+    def targets(self, due_date):
+        # One aggregate query over tenants and the monthly rollup for that cycle.
+        return DashboardService(today=due_date).tenants_in_arrears('arrears')
+
+    def already_reminded(self, keys):
+        reminded = set()
+        for start in range(0, len(keys), self.batch_size):
+            chunk = keys[start:start + self.batch_size]
+            reminded.update(key for (key,) in db.session.query(SMSLog.dedupe_key).filter(SMSLog.dedupe_key.in_(chunk)))
+        return reminded
+
+    def run(self, dry_run=False):
+        messaging_service = MessagingService()
+        summary = []
+
+        for policy, offset, due_date in self.due_cycles():
+            rows = self.targets(due_date)
+            keyed = [(self.dedupe_key(policy, row.id, due_date), row) for row in rows]
+            reminded = self.already_reminded([key for key, row in keyed])
+            pending = [(key, row) for key, row in keyed if key not in reminded]
+
+            queued = 0
+            if not dry_run:
+                for start in range(0, len(pending), self.batch_size):
+                    queued += self._enqueue(pending[start:start + self.batch_size], policy, due_date, messaging_service)
+
+            summary.append({
+                'policy': policy,
+                'offset_days': offset,
+                'due_date': due_date.isoformat(),
+                'targets': len(rows),
+                'already_reminded': len(reminded),
+                'queued': queued if not dry_run else len(pending)
+            })
+
+        if not dry_run and any(item['queued'] for item in summary):
+            SMSOutboxService().notify()
+        return summary
+
+    def _enqueue(self, batch, policy, due_date, messaging_service):
+        now = datetime.now(self.tz)
+        values = [{
+            'tenant_id': row.id,
+            'recipient_phone': row.phone,
+            'recipient_name': row.full_name,
+            'message': messaging_service.render_rent_reminder(
+                row, max(row.expected_rent - row.total_paid, 0), due_date
+            ),
+            'message_type': 'reminder',
+            'status': 'pending',
+            'attempts': 0,
+            'sent_at': now,
+            'dedupe_key': key
+        } for key, row in batch]
+
+        # The unique dedupe_key makes concurrent runs on other nodes harmless:
+        # whichever insert lands first wins and the rest are skipped.
+        statement = insert_ignore(db.session, SMSLog, index_elements=['dedupe_key']).returning(SMSLog.id)
+        inserted = len(db.session.execute(statement, values).all())
+        db.session.commit()
+        return inserted
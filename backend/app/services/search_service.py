@@ -0,0 +1,252 @@
+from app import db
+from app.models.search_document import SearchDocument, POSTGRESQL_DDL, SQLITE_DDL
+from app.models.tenant import Tenant
+from app.models.payment import Payment
+from app.utils.phone import phone_key
+from app.utils.sql import escape_like
+from sqlalchemy import event, func, inspect, text
+import re
+
+SEARCH_TYPES = ('tenant', 'payment')
+TENANT_FIELDS = ('full_name', 'phone', 'email', 'unit_number', 'is_active')
+PHONE_QUERY = re.compile(r'[\d\s+()-]+')
+MIN_TRIGRAM_LENGTH = 3
+# Best matches a listing filters on; keeps the id list, and the IN clause built from it, bounded.
+MAX_TENANT_MATCHES = 500
+
+def normalise_text(value):
+    return ' '.join((value or '').lower().split())
+
+def normalise_query(query):
+    """Lower-case text; phone-like input becomes its national digits so '+254 712', '0712' and '712' all agree."""
+    query = normalise_text(query)
+    if PHONE_QUERY.fullmatch(query):
+        digits = re.sub(r'\D', '', query)
+        if digits.startswith('254'):
+            digits = digits[3:]
+        elif digits.startswith('0'):
+            digits = digits[1:]
+        return digits or query
+    return query
+
+def tenant_document(tenant):
+    digits = re.sub(r'\D', '', tenant.phone or '')
+    return {
+        'entity_type': 'tenant',
+        'entity_id': tenant.id,
+        'tenant_id': tenant.id,
+        'label': f'{tenant.full_name} ({tenant.unit_number})',
+        'document': normalise_text(' '.join(filter(None, [
+            tenant.full_name, tenant.unit_number, tenant.email, digits, phone_key(tenant.phone)
+        ]))),
+        'is_active': bool(tenant.is_active) if tenant.is_active is not None else True
+    }
+
+def payment_document(payment_id, tenant_id, reference):
+    return {
+        'entity_type': 'payment',
+        'entity_id': payment_id,
+        'tenant_id': tenant_id,
+        'label': reference,
+        'document': normalise_text(reference),
+        'is_active': True
+    }
+
+def _replace_documents(connection, entity_type, entity_ids, documents):
+    table = SearchDocument.__table__
+    connection.execute(table.delete().where(
+        table.c.entity_type == entity_type, table.c.entity_id.in_(entity_ids)
+    ))
+    if documents:
+        connection.execute(table.insert(), documents)
+
+class SearchService:
+    """Ranked tenant and payment-reference search over the search_documents index."""
+
+    # Databases known to have the FTS table. Only a positive answer is kept:
+    # a later migrate or install() can add the table to a running app.
+    _fts_databases = set()
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+        self.dialect = self.session.get_bind().dialect.name
+
+    def search(self, query, types=SEARCH_TYPES, limit=20, include_inactive=False):
+        rows = self._ranked(query, types, limit, 0, None if include_inactive else True)
+        return [{
+            'type': row.entity_type,
+            'id': row.entity_id,
+            'tenant_id': row.tenant_id,
+            'label': row.label,
+            'score': round(float(row.score), 4)
+        } for row in rows]
+
+    def tenant_ids(self, query, is_active=None, limit=MAX_TENANT_MATCHES, offset=0):
+        """Matching tenant ids in rank order; is_active=None matches current and former tenants."""
+        return [row.entity_id for row in self._ranked(query, ('tenant',), limit, offset, is_active)]
+
+    def _ranked(self, query, types, limit, offset, is_active):
+        term = normalise_query(query)
+        if not term:
+            return []
+        if self.dialect == 'postgresql':
+            return self._search_postgresql(term, types, limit, offset, is_active)
+        if self.dialect == 'sqlite' and len(term) >= MIN_TRIGRAM_LENGTH and self._sqlite_fts_available():
+            return self._search_sqlite_fts(term, types, limit, offset, is_active)
+        return self._search_like(term, types, limit, offset, is_active)
+
+    def _like_pattern(self, term):
+        return f'%{escape_like(term)}%'
+
+    def _filtered(self, query, types, is_active):
+        query = query.filter(SearchDocument.entity_type.in_(types))
+        if is_active is not None:
+            query = query.filter(SearchDocument.is_active.is_(is_active))
+        return query
+
+    def _page(self, query, limit, offset):
+        if offset:
+            query = query.offset(offset)
+        return query.limit(limit).all() if limit else query.all()
+
+    def _search_postgresql(self, term, types, limit, offset, is_active):
+        score = func.word_similarity(term, SearchDocument.document)
+        query = self.session.query(
+            SearchDocument.entity_type,
+            SearchDocument.entity_id,
+            SearchDocument.tenant_id,
+            SearchDocument.label,
+            score.label('score')
+        ).filter(SearchDocument.document.like(self._like_pattern(term), escape='\\'))
+        query = self._filtered(query, types, is_active).order_by(score.desc(), SearchDocument.entity_id)
+        return self._page(query, limit, offset)
+
+    def _search_sqlite_fts(self, term, types, limit, offset, is_active):
+        type_params = {f'type_{i}': value for i, value in enumerate(types)}
+        clauses = [
+            'search_documents_fts MATCH :match',
+            f"d.entity_type IN ({', '.join(':' + name for name in type_params)})"
+        ]
+        if is_active is not None:
+            clauses.append(f'd.is_active = {1 if is_active else 0}')
+
+        # bm25() is lower-is-better; negate it so every backend sorts score descending.
+        sql = (
+            'SELECT d.entity_type, d.entity_id, d.tenant_id, d.label, -bm25(search_documents_fts) AS score '
+            'FROM search_documents_fts JOIN search_documents d ON d.id = search_documents_fts.rowid '
+            f'WHERE {" AND ".join(clauses)} ORDER BY bm25(search_documents_fts), d.entity_id'
+        )
+        params = {'match': '"' + term.replace('"', '""') + '"', **type_params}
+        if limit or offset:
+            sql += ' LIMIT :limit OFFSET :offset'
+            params.update(limit=limit or -1, offset=offset)
+        return self.session.execute(text(sql), params).all()
+
+    def _search_like(self, term, types, limit, offset, is_active):
+        # Too short for trigrams: a prefix match ranks above a match inside the text.
+        score = db.case((SearchDocument.document.like(f'{term}%'), 1.0), else_=0.5)
+        query = self.session.query(
+            SearchDocument.entity_type,
+            SearchDocument.entity_id,
+            SearchDocument.tenant_id,
+            SearchDocument.label,
+            score.label('score')
+        ).filter(SearchDocument.document.like(self._like_pattern(term), escape='\\'))
+        query = self._filtered(query, types, is_active).order_by(score.desc(), SearchDocument.entity_id)
+        return self._page(query, limit, offset)
+
+    def _sqlite_fts_available(self):
+        key = str(self.session.get_bind().url)
+        if key not in self._fts_databases and self.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'search_documents_fts'"
+        )).first() is not None:
+            self._fts_databases.add(key)
+        return key in self._fts_databases
+
+    def install(self):
+        """Create the dialect-specific index structures on an existing database."""
+        statements = {'postgresql': POSTGRESQL_DDL, 'sqlite': SQLITE_DDL}.get(self.dialect, [])
+        SearchDocument.__table__.create(self.session.get_bind(), checkfirst=True)
+        for statement in statements:
+            self.session.execute(text(statement))
+
+    def rebuild(self, batch_size=1000):
+        self.session.execute(SearchDocument.__table__.delete())
+        if self.dialect == 'sqlite' and self._sqlite_fts_available():
+            self.session.execute(text("INSERT INTO search_documents_fts (search_documents_fts) VALUES ('delete-all')"))
+
+        count = 0
+        tenants = self.session.query(
+            Tenant.id, Tenant.full_name, Tenant.unit_number, Tenant.email, Tenant.phone, Tenant.is_active
+        ).order_by(Tenant.id).yield_per(batch_size)
+        count += self._insert_batches((tenant_document(t) for t in tenants), batch_size)
+
+        payments = self.session.query(
+            Payment.id, Payment.tenant_id, Payment.transaction_reference
+        ).filter(
+            Payment.transaction_reference.isnot(None), Payment.transaction_reference != ''
+        ).order_by(Payment.id).yield_per(batch_size)
+        count += self._insert_batches((payment_document(*p) for p in payments), batch_size)
+        return count
+
+    def _insert_batches(self, documents, batch_size):
+        count = 0
+        batch = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                self.session.execute(SearchDocument.__table__.insert(), batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.session.execute(SearchDocument.__table__.insert(), batch)
+            count += len(batch)
+        return count
+
+    def index_tenants(self, tenants):
+        """Index tenants just created with bulk Core inserts; rows need the columns tenant_document reads."""
+        documents = [tenant_document(t) for t in tenants]
+        if documents:
+            self.session.execute(SearchDocument.__table__.insert(), documents)
+
+    def index_payments(self, payments):
+        """Index payments just created with bulk Core inserts, which skip the mapper events: [(id, tenant_id, reference)]."""
+        documents = [payment_document(*p) for p in payments if p[2]]
+        if documents:
+            self.session.execute(SearchDocument.__table__.insert(), documents)
+
+def _index_tenant(mapper, connection, tenant):
+    _replace_documents(connection, 'tenant', [tenant.id], [tenant_document(tenant)])
+
+def _reindex_tenant(mapper, connection, tenant):
+    state = inspect(tenant)
+    if any(state.attrs[name].history.has_changes() for name in TENANT_FIELDS):
+        _index_tenant(mapper, connection, tenant)
+
+def _delete_tenant(mapper, connection, tenant):
+    _replace_documents(connection, 'tenant', [tenant.id], [])
+
+def _index_payment(mapper, connection, payment):
+    documents = [payment_document(payment.id, payment.tenant_id, payment.transaction_reference)] if payment.transaction_reference else []
+    _replace_documents(connection, 'payment', [payment.id], documents)
+
+def _reindex_payment(mapper, connection, payment):
+    if inspect(payment).attrs.transaction_reference.history.has_changes():
+        _index_payment(mapper, connection, payment)
+
+def _delete_payment(mapper, connection, payment):
+    _replace_documents(connection, 'payment', [payment.id], [])
+
+_listening = False
+
+def listen():
+    global _listening
+    if _listening:
+        return
+    event.listen(Tenant, 'after_insert', _index_tenant)
+    event.listen(Tenant, 'after_update', _reindex_tenant)
+    event.listen(Tenant, 'after_delete', _delete_tenant)
+    event.listen(Payment, 'after_insert', _index_payment)
+    event.listen(Payment, 'after_update', _reindex_payment)
+    event.listen(Payment, 'after_delete', _delete_payment)
+    _listening = True
@@ -0,0 +1,94 @@
+from app import db
+from app.models.sms_broadcast import SMSBroadcast
+from app.models.sms_log import SMSLog
+from app.services.dashboard_service import DashboardService
+from app.utils.pagination import parse_id_list
+from datetime import datetime
+from sqlalchemy import func, insert
+import json
+import pytz
+
+BROADCAST_SCOPES = ('all_active', 'arrears', 'overdue', 'partial')
+
+class SMSBroadcastService:
+    """Renders one template for a tenant selection and hands every message to the SMS outbox."""
+
+    def __init__(self):
+        self.tz = pytz.timezone('Africa/Nairobi')
+
+    def select_recipients(self, scope='all_active', unit_prefix=None, tenant_ids=None):
+        if scope not in BROADCAST_SCOPES:
+            raise ValueError(f'scope must be one of {", ".join(BROADCAST_SCOPES)}')
+
+        dashboard_service = DashboardService()
+        if scope == 'all_active':
+            return dashboard_service.tenant_totals(tenant_ids, unit_prefix)
+        return dashboard_service.tenants_in_arrears(scope, tenant_ids, unit_prefix)
+
+    def create_broadcast(self, template, selector, placeholders=None, message_type='broadcast', sent_by=None):
+        if not isinstance(selector, dict):
+            raise ValueError('selector must be an object')
+        unit_prefix = selector.get('unit_prefix')
+        if unit_prefix is not None and not isinstance(unit_prefix, str):
+            raise ValueError('unit_prefix must be a string')
+        recipients = self.select_recipients(
+            selector.get('scope', 'all_active'),
+            unit_prefix,
+            parse_id_list(selector.get('tenant_ids'))
+        )
+
+        broadcast = SMSBroadcast(
+            template_id=template.id,
+            selector=json.dumps(selector),
+            message_type=message_type,
+            total=len(recipients),
+            created_by=sent_by
+        )
+        db.session.add(broadcast)
+        db.session.flush()
+
+        now = datetime.now(self.tz)
+        compiled = template.compiled()
+        placeholders = placeholders or {}
+        rows = []
+        for recipient in recipients:
+            message = compiled.render({
+                **placeholders,
+                'tenant_name': recipient.full_name,
+                'unit_number': recipient.unit_number,
+                'expected_rent': recipient.expected_rent,
+                'remaining_amount': max(recipient.expected_rent - recipient.total_paid, 0)
+            })
+            rows.append({
+                'broadcast_id': broadcast.id,
+                'tenant_id': recipient.id,
+                'recipient_phone': recipient.phone,
+                'recipient_name': recipient.full_name,
+                'message': message,
+                'message_type': message_type,
+                'status': 'pending',
+                'attempts': 0,
+                'sent_at': now,
+                'sent_by': sent_by
+            })
+
+        if rows:
+            db.session.execute(insert(SMSLog), rows)
+        return broadcast
+
+    def status_counts(self, broadcast_id):
+        counts = db.session.query(
+            SMSLog.status, func.count(SMSLog.id)
+        ).filter(SMSLog.broadcast_id == broadcast_id).group_by(SMSLog.status).all()
+        return {status: count for status, count in counts}
+
+    def recipients(self, broadcast_id):
+        return db.session.query(
+            SMSLog.id,
+            SMSLog.tenant_id,
+            SMSLog.recipient_name,
+            SMSLog.recipient_phone,
+            SMSLog.status,
+            SMSLog.attempts,
+            SMSLog.last_error
+        ).filter(SMSLog.broadcast_id == broadcast_id).order_by(SMSLog.id).all()
@@ -0,0 +1,109 @@
+from flask import current_app
+from app import db
+from app.models.sms_log import SMSLog
+from app.models.payment import Payment
+from app.services.messaging_service import MessagingService
+from app.utils.workers import BackgroundWorkerPool
+from datetime import datetime, timedelta
+import pytz
+import uuid
+
+class SMSOutboxService:
+    """Delivers queued SMSLog rows with exponential-backoff retries."""
+
+    def __init__(self):
+        self.tz = pytz.timezone('Africa/Nairobi')
+        self.batch_size = current_app.config.get('SMS_OUTBOX_BATCH_SIZE', 10)
+        self.max_attempts = current_app.config.get('SMS_OUTBOX_MAX_ATTEMPTS', 5)
+        self.retry_base = current_app.config.get('SMS_OUTBOX_RETRY_BASE', 30)
+        self.claim_timeout = timedelta(seconds=current_app.config.get('SMS_OUTBOX_CLAIM_TIMEOUT', 300))
+
+    def notify(self):
+        sms_outbox_workers.notify(current_app._get_current_object())
+
+    def _claimable(self, now):
+        return db.or_(
+            db.and_(
+                SMSLog.status == 'pending',
+                db.or_(SMSLog.next_attempt_at.is_(None), SMSLog.next_attempt_at <= now)
+            ),
+            db.and_(SMSLog.status == 'sending', SMSLog.claimed_at < now - self.claim_timeout)
+        )
+
+    def claim_batch(self):
+        now = datetime.now(self.tz)
+        candidates = db.session.query(SMSLog.id).filter(
+            self._claimable(now)
+        ).order_by(SMSLog.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+        if not candidates:
+            db.session.commit()
+            return []
+
+        token = str(uuid.uuid4())
+        SMSLog.query.filter(
+            SMSLog.id.in_([c.id for c in candidates]),
+            self._claimable(now)
+        ).update({
+            'status': 'sending',
+            'claim_token': token,
+            'claimed_at': now,
+            'attempts': db.func.coalesce(SMSLog.attempts, 0) + 1
+        }, synchronize_session=False)
+        db.session.commit()
+
+        return SMSLog.query.filter_by(claim_token=token, status='sending').order_by(SMSLog.id).all()
+
+    def process_batch(self):
+        sms_logs = self.claim_batch()
+        if not sms_logs:
+            return 0
+
+        messaging_service = MessagingService()
+        for sms_log in sms_logs:
+            try:
+                messaging_service.deliver(sms_log.recipient_phone, sms_log.message, sms_log.recipient_name)
+                success, error = True, None
+            except Exception as e:
+                success, error = False, str(e)
+
+            now = datetime.now(self.tz)
+            sms_log.claim_token = None
+            if success:
+                sms_log.status = 'sent'
+                sms_log.sent_at = now
+                sms_log.last_error = None
+                if sms_log.payment_id:
+                    Payment.query.filter_by(id=sms_log.payment_id).update(
+                        {'receipt_sent': True}, synchronize_session=False
+                    )
+            elif sms_log.attempts >= self.max_attempts:
+                sms_log.status = 'failed'
+                sms_log.last_error = error
+            else:
+                sms_log.status = 'pending'
+                sms_log.last_error = error
+                sms_log.next_attempt_at = now + timedelta(seconds=self.retry_base * 2 ** (sms_log.attempts - 1))
+
+            # Commit per message so a crash mid-batch never re-sends delivered rows.
+            db.session.commit()
+
+        return len(sms_logs)
+
+    def drain(self):
+        total = 0
+        while True:
+            processed = self.process_batch()
+            if not processed:
+                return total
+            total += processed
+
+def _process_outbox_batch():
+    return SMSOutboxService().process_batch()
+
+sms_outbox_workers = BackgroundWorkerPool(
+    'sms-outbox',
+    _process_outbox_batch,
+    workers_config_key='SMS_OUTBOX_WORKERS',
+    poll_interval_config_key='SMS_OUTBOX_POLL_INTERVAL'
+)
@@ -0,0 +1,214 @@
+from flask import current_app
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.instrumentation import track_http
+from app.utils.rate_limit import TokenBucket
+import threading
+import time
+
+class SMSProviderError(Exception):
+    def __init__(self, message, throttled=False):
+        super().__init__(message)
+        self.throttled = throttled
+
+class SMSDeliveryError(Exception):
+    """Raised when no configured provider accepted a message."""
+
+class SMSProvider:
+    """Base provider: a long-lived client guarded by a token bucket and a circuit breaker."""
+
+    name = None
+
+    def __init__(self, config):
+        self.config = config
+        self.rate_limiter = TokenBucket(
+            config.get(f'{self.name.upper()}_RATE_PER_SECOND') or config.get('SMS_RATE_PER_SECOND', 10)
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=config.get('SMS_CIRCUIT_FAILURE_THRESHOLD', 5),
+            reset_timeout=config.get('SMS_CIRCUIT_RESET_TIMEOUT', 30)
+        )
+        self.rate_limit_wait = config.get('SMS_RATE_LIMIT_WAIT', 1)
+        self._metrics = {'sent': 0, 'failed': 0, 'throttled': 0, 'circuit_open': 0, 'latency_total': 0.0, 'latency_max': 0.0}
+        self._lock = threading.Lock()
+
+    def send(self, phone, message, recipient_name=''):
+        if not self.circuit_breaker.allow():
+            self._count('circuit_open')
+            raise SMSProviderError(f'{self.name}: circuit open')
+        if not self.rate_limiter.acquire(timeout=self.rate_limit_wait):
+            # The provider was never called, so a trial call granted by allow() is still owed.
+            self.circuit_breaker.release()
+            self._count('throttled')
+            raise SMSProviderError(f'{self.name}: rate limit reached', throttled=True)
+
+        started = time.perf_counter()
+        try:
+            self._send(phone, message, recipient_name)
+        except Exception as e:
+            self.circuit_breaker.record_failure()
+            self._record(time.perf_counter() - started, 'failed')
+            if isinstance(e, SMSProviderError):
+                raise
+            raise SMSProviderError(f'{self.name}: {str(e)}')
+
+        self.circuit_breaker.record_success()
+        self._record(time.perf_counter() - started, 'sent')
+
+    def _send(self, phone, message, recipient_name):
+        raise NotImplementedError
+
+    def _count(self, name):
+        with self._lock:
+            self._metrics[name] += 1
+
+    def _record(self, latency, outcome):
+        with self._lock:
+            self._metrics[outcome] += 1
+            self._metrics['latency_total'] += latency
+            self._metrics['latency_max'] = max(self._metrics['latency_max'], latency)
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        calls = metrics['sent'] + metrics['failed']
+        return {
+            'sent': metrics['sent'],
+            'failed': metrics['failed'],
+            'throttled': metrics['throttled'],
+            'circuit_open_rejections': metrics['circuit_open'],
+            'error_rate': round(metrics['failed'] / calls, 4) if calls else 0.0,
+            'latency_avg_ms': round(metrics['latency_total'] / calls * 1000, 2) if calls else 0.0,
+            'latency_max_ms': round(metrics['latency_max'] * 1000, 2),
+            'circuit_state': self.circuit_breaker.state
+        }
+
+class ConsoleProvider(SMSProvider):
+    name = 'console'
+
+    def _send(self, phone, message, recipient_name):
+        current_app.logger.info(f'SMS to {phone} ({recipient_name}): {message}')
+
+class MockProvider(SMSProvider):
+    """Mock SMS sending for development - logs instead of actually sending"""
+
+    name = 'mock'
+
+    def _send(self, phone, message, recipient_name):
+        latency = self.config.get('SMS_MOCK_LATENCY', 0)
+        if latency:
+            time.sleep(latency)
+        current_app.logger.info('='*50)
+        current_app.logger.info('📱 MOCK SMS SENT')
+        current_app.logger.info(f'To: {phone} ({recipient_name})')
+        current_app.logger.info(f'Message: {message}')
+        current_app.logger.info('='*50)
+
+class TwilioProvider(SMSProvider):
+    name = 'twilio'
+
+    def __init__(self, config):
+        super().__init__(config)
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def _get_client(self):
+        # Twilio's client keeps its own pooled HTTP session, so build it once.
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from twilio.rest import Client
+                    self._client = Client(self.config.get('TWILIO_ACCOUNT_SID'), self.config.get('TWILIO_AUTH_TOKEN'))
+        return self._client
+
+    def _send(self, phone, message, recipient_name):
+        from_phone = self.config.get('TWILIO_PHONE_NUMBER')
+        if not all([self.config.get('TWILIO_ACCOUNT_SID'), self.config.get('TWILIO_AUTH_TOKEN'), from_phone]):
+            raise SMSProviderError('twilio: credentials not configured')
+
+        try:
+            with track_http(self.name):
+                self._get_client().messages.create(body=message, from_=from_phone, to=phone)
+        except Exception as e:
+            raise SMSProviderError(f'twilio: {str(e)}', throttled=getattr(e, 'status', None) == 429)
+
+class AfricasTalkingProvider(SMSProvider):
+    name = 'africastalking'
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.base_url = (config.get('AFRICASTALKING_BASE_URL') or 'https://api.africastalking.com').rstrip('/')
+        self.timeout = (config.get('SMS_CONNECT_TIMEOUT', 5), config.get('SMS_READ_TIMEOUT', 15))
+        pool_size = config.get('SMS_HTTP_POOL_SIZE', 10)
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+
+    def _send(self, phone, message, recipient_name):
+        username = self.config.get('AFRICASTALKING_USERNAME')
+        api_key = self.config.get('AFRICASTALKING_API_KEY')
+        if not all([username, api_key]):
+            raise SMSProviderError("africastalking: credentials not configured")
+
+        payload = {'username': username, 'to': phone, 'message': message}
+        if self.config.get('AFRICASTALKING_SENDER_ID'):
+            payload['from'] = self.config['AFRICASTALKING_SENDER_ID']
+
+        with track_http(self.name):
+            response = self.http.post(
+                f'{self.base_url}/version1/messaging',
+                data=payload,
+                headers={'apiKey': api_key, 'Accept': 'application/json'},
+                timeout=self.timeout
+            )
+        if response.status_code == 429:
+            raise SMSProviderError('africastalking: throttled by provider', throttled=True)
+        response.raise_for_status()
+
+        recipients = response.json().get('SMSMessageData', {}).get('Recipients', [])
+        if not recipients or recipients[0].get('status') != 'Success':
+            status = recipients[0].get('status') if recipients else 'no recipients accepted'
+            raise SMSProviderError(f'africastalking: {status}')
+
+PROVIDERS = {
+    provider.name: provider
+    for provider in (ConsoleProvider, MockProvider, TwilioProvider, AfricasTalkingProvider)
+}
+
+class SMSProviderRegistry:
+    """Builds each configured provider once per process and keeps it for reuse."""
+
+    def __init__(self):
+        self._providers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, config):
+        provider = self._providers.get(name)
+        if provider is None:
+            with self._lock:
+                provider = self._providers.get(name)
+                if provider is None:
+                    # Unrecognised names log to the console, as the old if/elif did.
+                    provider = PROVIDERS.get(name, ConsoleProvider)(config)
+                    self._providers[name] = provider
+        return provider
+
+    def chain(self, config):
+        names = [config.get('SMS_PROVIDER', 'twilio')]
+        fallback = config.get('SMS_FALLBACK_PROVIDER')
+        if fallback and fallback not in names:
+            names.append(fallback)
+        return [self.get(name, config) for name in names]
+
+    def stats(self):
+        with self._lock:
+            providers = dict(self._providers)
+        return {name: provider.stats() for name, provider in providers.items()}
+
+    def reset(self):
+        with self._lock:
+            self._providers.clear()
+
+sms_providers = SMSProviderRegistry()
@@ -0,0 +1,157 @@
+from flask import current_app
+from app import db
+from app.models.stk_campaign import StkCampaign
+from app.models.stk_push_request import StkPushRequest
+from app.services.dashboard_service import DashboardService
+from app.services.mpesa_service import MPesaService
+from app.utils.rate_limit import TokenBucket
+from app.utils.workers import BackgroundWorkerPool
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert
+import pytz
+
+CAMPAIGN_SCOPES = ('arrears', 'overdue', 'partial')
+
+class StkCampaignService:
+    """Pushes a running campaign's queued STK requests one batch at a time from the campaign workers."""
+
+    def __init__(self):
+        self.tz = pytz.timezone('Africa/Nairobi')
+        self.concurrency = current_app.config.get('MPESA_CAMPAIGN_CONCURRENCY', 8)
+        self.rate_per_second = current_app.config.get('MPESA_CAMPAIGN_RATE_PER_SECOND', 5)
+        self.batch_size = current_app.config.get('MPESA_CAMPAIGN_BATCH_SIZE', 20)
+        self.claim_timeout = timedelta(seconds=current_app.config.get('MPESA_CAMPAIGN_CLAIM_TIMEOUT', 300))
+
+    def create_campaign(self, scope='arrears', tenant_ids=None, created_by=None):
+        targets = DashboardService().tenants_in_arrears(scope=scope, tenant_ids=tenant_ids)
+
+        campaign = StkCampaign(
+            scope='selected' if tenant_ids is not None else scope,
+            status='running' if targets else 'completed',
+            total=len(targets),
+            created_by=created_by
+        )
+        db.session.add(campaign)
+        db.session.flush()
+
+        if targets:
+            now = datetime.now(self.tz)
+            db.session.execute(insert(StkPushRequest), [{
+                'campaign_id': campaign.id,
+                'tenant_id': row.id,
+                'phone': row.phone,
+                'amount': row.expected_rent - row.total_paid,
+                'status': 'queued',
+                'created_at': now,
+                'updated_at': now
+            } for row in targets])
+        else:
+            campaign.completed_at = datetime.now(self.tz)
+
+        db.session.commit()
+        return campaign
+
+    def notify(self):
+        stk_campaign_workers.notify(current_app._get_current_object())
+
+    def progress(self, campaign_id):
+        counts = dict(db.session.query(
+            StkPushRequest.status, func.count(StkPushRequest.id)
+        ).filter_by(campaign_id=campaign_id).group_by(StkPushRequest.status).all())
+        return counts
+
+    def _claimable(self, now):
+        # A claim older than the timeout belongs to a worker that died, e.g. in a restart.
+        return db.and_(
+            StkCampaign.status == 'running',
+            db.or_(StkCampaign.claimed_at.is_(None), StkCampaign.claimed_at < now - self.claim_timeout)
+        )
+
+    def claim_campaign(self):
+        now = datetime.now(self.tz)
+        candidate = db.session.query(StkCampaign.id).filter(
+            self._claimable(now)
+        ).order_by(StkCampaign.id).limit(1).with_for_update(skip_locked=True).first()
+
+        claimed = 0
+        if candidate:
+            claimed = StkCampaign.query.filter(
+                StkCampaign.id == candidate.id,
+                self._claimable(now)
+            ).update({'claimed_at': now}, synchronize_session=False)
+        db.session.commit()
+        return db.session.get(StkCampaign, candidate.id) if claimed else None
+
+    def process_batch(self):
+        campaign = self.claim_campaign()
+        if not campaign:
+            return 0
+
+        # Requests a dead worker had taken may already have prompted the tenant; never push them twice.
+        campaign.requests.filter_by(status='sending').update(
+            {'status': 'failed', 'error': 'Interrupted before M-PESA answered the push'}, synchronize_session=False
+        )
+
+        pending = campaign.requests.filter_by(status='queued').order_by(StkPushRequest.id).limit(self.batch_size).all()
+        # Fetch the token once up front; every worker then reuses the cached value.
+        if pending and not MPesaService().get_access_token():
+            campaign.requests.filter_by(status='queued').update(
+                {'status': 'failed', 'error': 'Could not obtain M-PESA access token'}, synchronize_session=False
+            )
+            pending = []
+
+        if pending:
+            for push_request in pending:
+                push_request.status = 'sending'
+            db.session.commit()
+            self._push_all(pending)
+
+        if not campaign.requests.filter_by(status='queued').count():
+            campaign.status = 'completed'
+            campaign.completed_at = datetime.now(self.tz)
+        campaign.claimed_at = None
+        db.session.commit()
+        return len(pending) or 1
+
+    def _push_all(self, pending):
+        app = current_app._get_current_object()
+        bucket = TokenBucket(self.rate_per_second)
+        by_id = {push_request.id: push_request for push_request in pending}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {
+                executor.submit(
+                    self._push, app, bucket, push_request.phone, push_request.amount, f'RENT-{push_request.tenant_id}'
+                ): push_request.id
+                for push_request in pending
+            }
+
+            for future in as_completed(futures):
+                push_request = by_id[futures[future]]
+                checkout_request_id = future.result()
+                if checkout_request_id:
+                    push_request.status = 'sent'
+                    push_request.checkout_request_id = checkout_request_id
+                else:
+                    push_request.status = 'failed'
+                    push_request.error = 'STK push was not accepted by M-PESA'
+
+    def _push(self, app, bucket, phone, amount, account_reference):
+        bucket.acquire()
+        with app.app_context():
+            try:
+                return MPesaService().initiate_stk_push(phone, amount, account_reference)
+            except Exception as e:
+                current_app.logger.error(f'STK push to {phone} failed: {str(e)}')
+                return None
+
+def _process_campaign_batch():
+    return StkCampaignService().process_batch()
+
+stk_campaign_workers = BackgroundWorkerPool(
+    'stk-campaign',
+    _process_campaign_batch,
+    workers_config_key='MPESA_CAMPAIGN_WORKERS',
+    poll_interval_config_key='MPESA_CAMPAIGN_POLL_INTERVAL'
+)
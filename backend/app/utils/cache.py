@@ -0,0 +1,156 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+
+class LRUCacheBackend:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_generation(self):
+        return self._generation
+
+    def bump_generation(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            return self._generation
+
+class RedisCacheBackend:
+    """Shared backend for multi-worker deployments; works with any client exposing get/set/incr."""
+
+    generation_key = 'sawarent:cache:generation'
+
+    def __init__(self, url=None, client=None, prefix='sawarent:cache:'):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('RESPONSE_CACHE_BACKEND=redis requires the redis package')
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def get_generation(self):
+        return int(self.client.get(self.generation_key) or 0)
+
+    def bump_generation(self):
+        return self.client.incr(self.generation_key)
+
+class ResponseCache:
+    """Caches JSON-ready response payloads until a watched model is committed."""
+
+    def __init__(self, backend=None):
+        self.backend = backend or LRUCacheBackend()
+        self.ttl = None
+        self.enabled = True
+        self.watched_models = ()
+        self._counters = {}
+        self._invalidations = 0
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app, watched_models=()):
+        backend_name = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        self.enabled = backend_name != 'none'
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL') or None
+
+        if backend_name == 'redis':
+            self.backend = RedisCacheBackend(url=app.config.get('RESPONSE_CACHE_URL'))
+        elif backend_name == 'memory':
+            self.backend = LRUCacheBackend(max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 256))
+
+        self.watched_models = tuple(watched_models)
+        app.extensions['response_cache'] = self
+
+    def listen(self, session):
+        if self._listening:
+            return
+        event.listen(session, 'after_flush', self._after_flush)
+        event.listen(session, 'do_orm_execute', self._on_orm_execute)
+        event.listen(session, 'after_commit', self._after_commit)
+        event.listen(session, 'after_rollback', self._after_rollback)
+        self._listening = True
+
+    def fetch(self, endpoint, period, builder):
+        if not self.enabled:
+            return builder()
+
+        key = f'{endpoint}:{self.backend.get_generation()}:{period}'
+        value = self.backend.get(key)
+        if value is not None:
+            self._count(endpoint, 'hits')
+            return value
+
+        self._count(endpoint, 'misses')
+        value = builder()
+        self.backend.set(key, value, ttl=self.ttl)
+        return value
+
+    def invalidate(self):
+        self.backend.bump_generation()
+        with self._lock:
+            self._invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'endpoints': {endpoint: dict(counts) for endpoint, counts in self._counters.items()},
+                'invalidations': self._invalidations
+            }
+
+    def _count(self, endpoint, name):
+        with self._lock:
+            counts = self._counters.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            counts[name] += 1
+
+    def _touches_watched(self, objects):
+        return any(isinstance(obj, self.watched_models) for obj in objects)
+
+    def _after_flush(self, session, flush_context):
+        if self._touches_watched(session.new) or self._touches_watched(session.dirty) or self._touches_watched(session.deleted):
+            session.info['response_cache_dirty'] = True
+
+    def _on_orm_execute(self, orm_execute_state):
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        if any(mapper.class_ in self.watched_models for mapper in orm_execute_state.all_mappers):
+            orm_execute_state.session.info['response_cache_dirty'] = True
+
+    def _after_commit(self, session):
+        if session.info.pop('response_cache_dirty', False):
+            self.invalidate()
+
+    def _after_rollback(self, session):
+        session.info.pop('response_cache_dirty', None)
@@ -0,0 +1,251 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+import bisect
+import threading
+import time
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+HTTP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current = ContextVar('sawarent_request_recorder', default=None)
+
+class Histogram:
+    """Cumulative Prometheus histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text}{"," if label_text else ""}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_text}{"," if label_text else ""}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f'{self.name}{{{_labels(self.label_names, labels)}}} {value}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class RequestRecorder:
+    """What one request spent: SQL statements and time, and time waiting on outbound HTTP."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_time = 0.0
+        self.http_calls = 0
+        self.http_time = 0.0
+
+class RequestMetrics:
+    """Per-request timing, SQL counts and outbound HTTP time, exposed in Prometheus text format.
+
+    Metrics live in process memory, so with several workers each one is
+    scraped (or aggregated) separately.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.slow_request_seconds = 0.5
+        self.slow_query_seconds = 0.1
+        self.server_timing = True
+        self.logger = None
+        self.request_duration = Histogram(
+            'sawarent_request_duration_seconds', 'Wall time per request by blueprint.',
+            ('blueprint', 'method'), REQUEST_BUCKETS
+        )
+        self.request_queries = Histogram(
+            'sawarent_request_sql_statements', 'SQL statements executed per request by blueprint.',
+            ('blueprint',), QUERY_COUNT_BUCKETS
+        )
+        self.request_sql_time = Histogram(
+            'sawarent_request_sql_seconds', 'Time spent in SQL per request by blueprint.',
+            ('blueprint',), REQUEST_BUCKETS
+        )
+        self.request_http_time = Histogram(
+            'sawarent_request_outbound_http_seconds', 'Time spent on outbound HTTP per request by blueprint.',
+            ('blueprint',), HTTP_BUCKETS
+        )
+        self.http_client_duration = Histogram(
+            'sawarent_outbound_http_duration_seconds', 'Outbound HTTP call time by target, inside or outside requests.',
+            ('target',), HTTP_BUCKETS
+        )
+        self.responses = Counter(
+            'sawarent_responses_total', 'Responses by blueprint, method and status code.',
+            ('blueprint', 'method', 'status')
+        )
+        self.slow_requests = Counter('sawarent_slow_requests_total', 'Requests over SLOW_REQUEST_MS.', ('blueprint',))
+        self.slow_queries = Counter('sawarent_slow_queries_total', 'SQL statements over SLOW_QUERY_MS.', ('blueprint',))
+        self._engines = set()
+
+    def init_app(self, app, engine):
+        self.enabled = app.config.get('INSTRUMENTATION_ENABLED', True)
+        self.slow_request_seconds = app.config.get('SLOW_REQUEST_MS', 500) / 1000
+        self.slow_query_seconds = app.config.get('SLOW_QUERY_MS', 100) / 1000
+        self.server_timing = app.config.get('SERVER_TIMING_HEADER', True)
+        self.logger = app.logger
+        app.extensions['request_metrics'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        if id(engine) not in self._engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._engines.add(id(engine))
+
+    def _before_request(self):
+        g.request_recorder = RequestRecorder()
+        g.request_recorder_token = _current.set(g.request_recorder)
+
+    def _after_request(self, response):
+        recorder = g.pop('request_recorder', None)
+        if recorder is None:
+            return response
+
+        elapsed = time.perf_counter() - recorder.started
+        blueprint = request.blueprint or 'none'
+        self.request_duration.observe((blueprint, request.method), elapsed)
+        self.request_queries.observe((blueprint,), recorder.statements)
+        self.request_sql_time.observe((blueprint,), recorder.sql_time)
+        if recorder.http_calls:
+            self.request_http_time.observe((blueprint,), recorder.http_time)
+        self.responses.inc((blueprint, request.method, str(response.status_code)))
+
+        if elapsed >= self.slow_request_seconds:
+            self.slow_requests.inc((blueprint,))
+            self.logger.warning(
+                f'Slow request {request.method} {request.path} ({request.endpoint}): {elapsed * 1000:.1f} ms, '
+                f'{recorder.statements} SQL statements in {recorder.sql_time * 1000:.1f} ms, '
+                f'{recorder.http_calls} outbound HTTP calls in {recorder.http_time * 1000:.1f} ms'
+            )
+
+        if self.server_timing:
+            response.headers['Server-Timing'] = (
+                f'app;dur={elapsed * 1000:.1f}, '
+                f'db;dur={recorder.sql_time * 1000:.1f};desc="{recorder.statements} queries", '
+                f'http;dur={recorder.http_time * 1000:.1f}'
+            )
+        return response
+
+    def _teardown_request(self, exc):
+        token = g.pop('request_recorder_token', None)
+        if token is not None:
+            _current.reset(token)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the statement's own context: a statement that raises never
+        # reaches after_cursor_execute, and its start time goes with it.
+        if context is not None:
+            context._sawarent_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_sawarent_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        recorder = _current.get()
+        if recorder is not None:
+            recorder.statements += 1
+            recorder.sql_time += elapsed
+
+        if elapsed >= self.slow_query_seconds:
+            blueprint = _blueprint() if recorder is not None else 'background'
+            self.slow_queries.inc((blueprint,))
+            self.logger.warning(f'Slow query ({elapsed * 1000:.1f} ms, {blueprint}): {" ".join(statement.split())[:500]}')
+
+    @contextmanager
+    def track_http(self, target):
+        """Time an outbound HTTP call; counted against the current request, if any."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.http_client_duration.observe((target,), elapsed)
+            recorder = _current.get()
+            if recorder is not None:
+                recorder.http_calls += 1
+                recorder.http_time += elapsed
+
+    def render(self):
+        lines = []
+        for metric in self._metrics():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        for metric in self._metrics():
+            metric.reset()
+
+    def _metrics(self):
+        return (
+            self.request_duration, self.request_queries, self.request_sql_time, self.request_http_time,
+            self.http_client_duration, self.responses, self.slow_requests, self.slow_queries
+        )
+
+def _blueprint():
+    try:
+        return request.blueprint or 'none'
+    except RuntimeError:
+        return 'background'
+
+request_metrics = RequestMetrics()
+track_http = request_metrics.track_http
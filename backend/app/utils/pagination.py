@@ -0,0 +1,108 @@
+from app import db
+from datetime import date, datetime
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, maximum)
+
+def parse_bool(value, default=False):
+    if value in (None, ''):
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+def parse_id_list(value, name='tenant_ids'):
+    """A JSON list of integer ids, or None when the field was left out."""
+    if value is None:
+        return None
+    if not isinstance(value, list) or not all(isinstance(item, int) and not isinstance(item, bool) for item in value):
+        raise ValueError(f'{name} must be a list of integers')
+    return value
+
+def encode_cursor(values):
+    payload = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+def decode_offset_cursor(cursor):
+    """Position to resume from in a ranked list that has no sort key to seek on."""
+    values = decode_cursor(cursor)
+    if len(values) != 1 or not isinstance(values[0], int) or values[0] < 0:
+        raise ValueError('Invalid cursor')
+    return values[0]
+
+def parse_fields(value, allowed):
+    """'full_name,unit_number' -> ['id', 'full_name', 'unit_number']; None when no fieldset was requested."""
+    if value in (None, ''):
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return list(dict.fromkeys(fields))
+
+def parse_sort(value, allowed, default='id'):
+    """'-full_name' -> ('full_name', True); only names in `allowed` are accepted."""
+    value = value or default
+    descending = value.startswith('-')
+    name = value.lstrip('-')
+    if name not in allowed:
+        raise ValueError(f'sort must be one of {", ".join(allowed)} (prefix with - for descending)')
+    return name, descending
+
+def _cursor_value(column, value):
+    python_type = column.type.python_type
+    if python_type in (date, datetime) and value is not None:
+        return python_type.fromisoformat(value)
+    return value
+
+def json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def keyset_page(query, sort_column, id_column, descending, limit, cursor=None):
+    """One page ordered by (sort_column, id_column); returns (rows, next_cursor)."""
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 2 or not isinstance(values[1], int):
+            raise ValueError('Invalid cursor')
+        sort_value, last_id = values
+        try:
+            sort_value = _cursor_value(sort_column, sort_value)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+        if descending:
+            query = query.filter(db.or_(sort_column < sort_value, db.and_(sort_column == sort_value, id_column < last_id)))
+        else:
+            query = query.filter(db.or_(sort_column > sort_value, db.and_(sort_column == sort_value, id_column > last_id)))
+
+    order = (sort_column.desc(), id_column.desc()) if descending else (sort_column.asc(), id_column.asc())
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([json_value(getattr(last, sort_column.key)), last.id])
@@ -0,0 +1,8 @@
+PHONE_KEY_LENGTH = 9
+
+def phone_key(phone):
+    """Canonical MSISDN key: the last 9 digits, so 0712..., 254712... and +254 712... all match."""
+    digits = ''.join(ch for ch in str(phone or '') if ch.isdigit())
+    if not digits:
+        return None
+    return digits[-PHONE_KEY_LENGTH:]
@@ -0,0 +1,28 @@
+from sqlalchemy.engine import make_url
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING, which insert_ignore() needs.
+SUPPORTED_DIALECTS = ('postgresql', 'sqlite')
+
+def check_database_url(url):
+    """Refuse at startup a database the app cannot write to, rather than on its first insert_ignore()."""
+    if not url:
+        return
+    dialect = make_url(url).get_backend_name()
+    if dialect not in SUPPORTED_DIALECTS:
+        raise RuntimeError(f'DATABASE_URL must be {" or ".join(SUPPORTED_DIALECTS)}, not {dialect}')
+
+def escape_like(term):
+    """Escape LIKE wildcards in user input; use with escape='\\\\'."""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def insert_ignore(session, model, index_elements, index_where=None):
+    """INSERT ... ON CONFLICT DO NOTHING for the session's dialect."""
+    # Only the dialect in use gets imported; loading both slows worker boot.
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f'insert_ignore is not supported on {dialect}')
+    return insert(model).on_conflict_do_nothing(index_elements=index_elements, index_where=index_where)
@@ -0,0 +1,91 @@
+import re
+import threading
+import time
+
+PLACEHOLDER_PATTERN = re.compile(r'\{([A-Za-z_][A-Za-z0-9_]*)\}')
+
+KNOWN_PLACEHOLDERS = frozenset({
+    'tenant_name',
+    'unit_number',
+    'amount',
+    'payment_date',
+    'remaining_amount',
+    'expected_rent',
+    'transaction_reference',
+    'due_date',
+    'month',
+})
+
+class CompiledTemplate:
+    """Template content parsed once into literal and placeholder segments."""
+
+    __slots__ = ('template_id', 'updated_at', 'content', 'segments', 'placeholders')
+
+    def __init__(self, content, template_id=None, updated_at=None):
+        self.template_id = template_id
+        self.updated_at = updated_at
+        self.content = content
+
+        # Even positions hold literals, odd positions hold placeholder names.
+        segments = PLACEHOLDER_PATTERN.split(content)
+        self.segments = tuple(segments)
+        self.placeholders = frozenset(segments[1::2])
+
+    def unknown_placeholders(self, known=KNOWN_PLACEHOLDERS):
+        return sorted(self.placeholders - known)
+
+    def render(self, values):
+        parts = list(self.segments)
+        for index in range(1, len(parts), 2):
+            name = parts[index]
+            # Placeholders without a value stay literal, as str.replace left them.
+            parts[index] = str(values[name]) if name in values else '{' + name + '}'
+        return ''.join(parts)
+
+class TemplateCache:
+    """Compiled templates keyed by (id, updated_at), plus short-lived category lookups."""
+
+    def __init__(self, lookup_ttl=60):
+        self.lookup_ttl = lookup_ttl
+        self._compiled = {}
+        self._lookups = {}
+        self._lock = threading.Lock()
+
+    def get(self, template):
+        if template.id is None:
+            return CompiledTemplate(template.content)
+
+        with self._lock:
+            compiled = self._compiled.get(template.id)
+        if compiled is not None and compiled.updated_at == template.updated_at:
+            return compiled
+
+        compiled = CompiledTemplate(template.content, template.id, template.updated_at)
+        with self._lock:
+            self._compiled[template.id] = compiled
+        return compiled
+
+    def lookup(self, key, loader):
+        """Return the cached compiled template for ``key`` or call ``loader()`` for a Template (or None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lookups.get(key)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        template = loader()
+        compiled = self.get(template) if template is not None else None
+        with self._lock:
+            self._lookups[key] = (compiled, now + self.lookup_ttl)
+        return compiled
+
+    def invalidate(self, template_id=None):
+        with self._lock:
+            if template_id is None:
+                self._compiled.clear()
+            else:
+                self._compiled.pop(template_id, None)
+            # Any category lookup may now resolve to a different template.
+            self._lookups.clear()
+
+template_cache = TemplateCache()
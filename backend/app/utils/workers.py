@@ -0,0 +1,77 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class BackgroundWorkerPool:
+    """Daemon threads that repeatedly run `task` inside an app context.
+
+    `task` returns how many items it handled; workers sleep until notify() or
+    the poll interval whenever a run handles nothing.
+    """
+
+    def __init__(self, name, task, workers_config_key, poll_interval_config_key):
+        self.name = name
+        self.task = task
+        self.workers_config_key = workers_config_key
+        self.poll_interval_config_key = poll_interval_config_key
+        self._threads = []
+        self._started = False
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def init_app(self, app):
+        """Start the workers on the app's first request, so rows queued before a restart are drained."""
+        # Not in create_app itself: CLI scripts build the app without serving it,
+        # and threads started before a pre-forking server forks do not survive.
+        app.before_request(lambda: self.ensure_started(app))
+
+    def ensure_started(self, app):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            worker_count = app.config.get(self.workers_config_key, 0)
+            poll_interval = app.config.get(self.poll_interval_config_key, 5)
+            self._stopping.clear()
+            for index in range(worker_count):
+                thread = threading.Thread(
+                    target=self._run,
+                    args=(app, poll_interval),
+                    name=f'{self.name}-{index}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            self._started = True
+
+    def notify(self, app):
+        self.ensure_started(app)
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._started = False
+
+    def _run(self, app, poll_interval):
+        while not self._stopping.is_set():
+            handled = 0
+            try:
+                with app.app_context():
+                    handled = self.task()
+            except Exception:
+                logger.exception('%s worker run failed', self.name)
+
+            if not handled:
+                self._wakeup.wait(poll_interval)
+                self._wakeup.clear()
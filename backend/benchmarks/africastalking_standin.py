@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+class AfricasTalkingStandIn:
+    """Local stand-in for the Africa's Talking SMS endpoint; `mode` switches between ok, down and throttled."""
+
+    def __init__(self, latency=0.0, mode='ok'):
+        self.latency = latency
+        self.mode = mode
+        self.messages = []
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def count(self):
+        with self._lock:
+            return len(self.messages)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                form = parse_qs(self.rfile.read(length).decode())
+                with standin._lock:
+                    standin.calls += 1
+                time.sleep(standin.latency)
+
+                if self.path.split('?')[0] != '/version1/messaging':
+                    self._reply(404, {'error': 'Not found'})
+                elif not self.headers.get('apiKey'):
+                    self._reply(401, {'error': 'Missing apiKey'})
+                elif standin.mode == 'down':
+                    self._reply(503, {'error': 'Service unavailable'})
+                elif standin.mode == 'throttled':
+                    self._reply(429, {'error': 'Too many requests'})
+                else:
+                    with standin._lock:
+                        standin.messages.append((form.get('to', [''])[0], form.get('message', [''])[0]))
+                    self._reply(201, {'SMSMessageData': {
+                        'Message': 'Sent to 1/1 Total Cost: KES 0.8000',
+                        'Recipients': [{
+                            'statusCode': 101,
+                            'number': form.get('to', [''])[0],
+                            'status': 'Success',
+                            'cost': 'KES 0.8000',
+                            'messageId': f'ATXid_{uuid.uuid4().hex}'
+                        }]
+                    }})
+
+        return Handler
@@ -0,0 +1,80 @@
+"""Times the CSV import for a generated estate: tenants first, then a payment history.
+
+    cd backend && python -m benchmarks.csv_import --tenants 1000 --payments 100000
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import time
+
+def tenant_csv(count):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['full_name', 'phone', 'email', 'unit_number', 'expected_rent', 'lease_start_date', 'lease_end_date'])
+    for i in range(count):
+        writer.writerow([f'Tenant {i}', f'+2547{i:08d}', f'tenant{i}@example.com', f'U{i}', 10000, '2020-01-01', '2030-12-31'])
+    out.seek(0)
+    return out
+
+def payment_csv(count, tenants):
+    rng = random.Random(7)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['unit_number', 'amount', 'payment_date', 'payment_method', 'transaction_reference'])
+    for i in range(count):
+        method = 'M-PESA' if i % 2 else 'Cash'
+        writer.writerow([
+            f'U{rng.randrange(tenants)}',
+            rng.choice([5000, 10000]),
+            f'{2020 + i % 6}-{1 + i % 12:02d}-{1 + i % 28:02d}',
+            method,
+            f'BENCH{i:08d}' if method == 'M-PESA' else ''
+        ])
+    out.seek(0)
+    return out
+
+def run(tenants, payments, batch_size):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    os.environ['DATABASE_URL'] = f'sqlite:///{database.name}'
+
+    from app import create_app, db, migrations
+    from app.services.import_service import ImportService
+
+    app = create_app('development')
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        started = time.perf_counter()
+        tenant_report = ImportService(batch_size).import_tenants(tenant_csv(tenants))
+        tenant_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        payment_report = ImportService(batch_size).import_payments(payment_csv(payments, tenants))
+        payment_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rerun_report = ImportService(batch_size).import_payments(payment_csv(payments, tenants))
+        rerun_seconds = time.perf_counter() - started
+
+    os.unlink(database.name)
+    return {
+        'batch_size': batch_size,
+        'tenants_imported': tenant_report.imported,
+        'tenant_seconds': round(tenant_seconds, 2),
+        'payments_imported': payment_report.imported,
+        'payment_seconds': round(payment_seconds, 2),
+        'payments_per_second': round(payment_report.imported / payment_seconds),
+        'reimport_duplicates_skipped': rerun_report.duplicates,
+        'reimport_seconds': round(rerun_seconds, 2)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--payments', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.tenants, args.payments, args.batch_size), indent=2))
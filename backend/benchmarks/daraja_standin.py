@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class DarajaStandIn:
+    """Local stand-in for the Daraja OAuth and STK push endpoints, counting calls per path."""
+
+    def __init__(self, latency=0.0, expires_in=3599):
+        self.latency = latency
+        self.expires_in = expires_in
+        self.calls = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def count(self, path):
+        with self._lock:
+            return self.calls.get(path, 0)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _record(self, path):
+        with self._lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                standin._record(path)
+                if path == '/oauth/v1/generate':
+                    time.sleep(standin.latency)
+                    self._reply(200, {'access_token': uuid.uuid4().hex, 'expires_in': str(standin.expires_in)})
+                else:
+                    self._reply(404, {'errorMessage': 'Not found'})
+
+            def do_POST(self):
+                path = self.path.split('?')[0]
+                standin._record(path)
+                length = int(self.headers.get('Content-Length') or 0)
+                self.rfile.read(length)
+                time.sleep(standin.latency)
+                if path == '/mpesa/stkpush/v1/processrequest':
+                    if not self.headers.get('Authorization', '').startswith('Bearer '):
+                        self._reply(401, {'errorMessage': 'Invalid Access Token'})
+                        return
+                    self._reply(200, {
+                        'MerchantRequestID': uuid.uuid4().hex,
+                        'CheckoutRequestID': f'ws_CO_{uuid.uuid4().hex}',
+                        'ResponseCode': '0',
+                        'ResponseDescription': 'Success. Request accepted for processing'
+                    })
+                else:
+                    self._reply(404, {'errorMessage': 'Not found'})
+
+        return Handler
@@ -0,0 +1,180 @@
+"""Fails when a hot route's queries stop using the index meant for them.
+
+    cd backend && python -m benchmarks.index_usage
+    cd backend && python -m benchmarks.index_usage --database-url postgresql://localhost/sawarent_bench --verbose
+
+Each check calls a route (or runs one ORM query) against a seeded estate,
+captures the SQL it issues and runs EXPLAIN on every SELECT with the same
+parameters. The check passes when some plan uses the expected index and
+no plan reads the whole table. On PostgreSQL, sequential scans are
+disabled for the EXPLAIN so a small estate still shows whether an index
+is usable, not whether the planner would bother with it.
+"""
+import argparse
+import json
+import os
+import sys
+
+class Check:
+    def __init__(self, name, table, index, path=None, query=None):
+        self.name = name
+        self.table = table
+        self.index = index
+        self.path = path
+        self.query = query
+
+def _tenant_by_user(ids):
+    from app.models.tenant import Tenant
+    return Tenant.query.filter_by(user_id=ids['user_id']).first()
+
+CHECKS = [
+    Check('payments page', 'payments', 'ix_payments_date_id', path='/api/payments?limit=50&include_total=false'),
+    Check('payments by tenant', 'payments', 'ix_payments_tenant_date', path='/api/payments?limit=50&include_total=false&tenant_id={tenant_id}'),
+    Check('audit trail page', 'payments', 'ix_payments_created_at_id', path='/api/payments/audit-trail?limit=50'),
+    Check('alerts', 'alerts', 'ix_alerts_created_at', path='/api/dashboard/alerts'),
+    Check('unread alerts', 'alerts', 'ix_alerts_is_read_created_at', path='/api/dashboard/alerts?unread_only=true'),
+    Check('sms logs', 'sms_logs', 'ix_sms_logs_sent_at', path='/api/messaging/sms-logs'),
+    Check('tenants by name', 'tenants', 'ix_tenants_active_full_name', path='/api/tenants?limit=50&sort=full_name'),
+    Check('expiring leases', 'tenants', 'ix_tenants_active_lease_end', path='/api/dashboard/lease-expiring'),
+    Check('users by role', 'users', 'ix_users_role_id', path='/api/auth/users?limit=50&role=caretaker'),
+    Check('tenant for user account', 'tenants', 'ix_tenants_user_id', query=_tenant_by_user),
+    Check('overdue invoices', 'invoices', 'ix_invoices_status_due_date', path='/api/invoices/arrears'),
+]
+
+def explain(connection, statement, parameters):
+    """(index names used, tables read in full) for one statement."""
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+        indexes, scans = set(), set()
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if node.get('Index Name'):
+                indexes.add(node['Index Name'])
+            if node['Node Type'] == 'Seq Scan':
+                scans.add(node['Relation Name'])
+            nodes.extend(node.get('Plans', []))
+        return indexes, scans
+
+    indexes, scans = set(), set()
+    for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters):
+        words = row[-1].split()
+        if 'INDEX' in words:
+            indexes.add(words[words.index('INDEX') + 1])
+        elif words[0] == 'SCAN' and len(words) == 2:
+            scans.add(words[1])
+    return indexes, scans
+
+def run(database_url=None, checks=CHECKS, counts=None):
+    if database_url and counts is None:
+        os.environ['DATABASE_URL'] = database_url
+    from benchmarks.seed import BENCH_PASSWORD, BENCH_USERNAME, create_seeded_app, seed
+    from app import db
+    from app.models.tenant import Tenant
+    from app.models.user import User
+    from sqlalchemy import event
+
+    path = None
+    if database_url and counts is None:
+        from app import create_app
+        app = create_app('development')
+        with app.app_context():
+            if not User.query.filter_by(username=BENCH_USERNAME).first():
+                seed(tenants=0, payments=0, sms_logs=0, alerts=0)
+    else:
+        app, _, path = create_seeded_app(database_url, **(counts or {}))
+
+    with app.app_context():
+        tenant = Tenant.query.filter_by(is_active=True).order_by(Tenant.id).first()
+        ids = {'tenant_id': tenant.id, 'user_id': User.query.order_by(User.id).first().id}
+        engine = db.engine
+
+    captured = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            captured.append((statement, parameters))
+    event.listen(engine, 'after_cursor_execute', capture)
+
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+    if response.status_code != 200:
+        raise RuntimeError(f'login failed: {response.get_data(as_text=True)}')
+
+    results = []
+    for check in checks:
+        captured.clear()
+        if check.path:
+            response = client.get(check.path.format(**ids))
+            if response.status_code >= 400:
+                results.append({'check': check.name, 'ok': False, 'error': f'HTTP {response.status_code}'})
+                continue
+        else:
+            with app.app_context():
+                check.query(ids)
+                db.session.rollback()
+        statements = list(captured)
+
+        used, full_scans = set(), set()
+        with engine.connect() as connection:
+            for statement, parameters in statements:
+                indexes, scans = explain(connection, statement, parameters)
+                used |= indexes
+                full_scans |= scans
+            connection.rollback()
+        ok = check.index in used and check.table not in full_scans
+        results.append({
+            'check': check.name,
+            'ok': ok,
+            'table': check.table,
+            'expected_index': check.index,
+            'indexes_used': sorted(used),
+            'full_scans': sorted(full_scans),
+            'statements': len(statements)
+        })
+
+    event.remove(engine, 'after_cursor_execute', capture)
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    if path:
+        os.unlink(path)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='check this already seeded database instead of a temporary SQLite estate')
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--payments', type=int, default=4000)
+    parser.add_argument('--verbose', action='store_true', help='print every check, not just failures')
+    parser.add_argument('--json', action='store_true', help='print the full report as JSON')
+    args = parser.parse_args(argv)
+
+    os.environ['MPESA_INBOX_WORKERS'] = '0'
+    os.environ['SMS_OUTBOX_WORKERS'] = '0'
+    os.environ['SMS_PROVIDER'] = 'console'
+    os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+    os.environ['INSTRUMENTATION_ENABLED'] = 'false'
+
+    counts = None if args.database_url else {
+        'tenants': args.tenants, 'payments': args.payments, 'sms_logs': 1000, 'alerts': 1000, 'months': 12
+    }
+    results = run(args.database_url, counts=counts)
+    failures = [result for result in results if not result['ok']]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            if args.verbose or not result['ok']:
+                mark = 'ok  ' if result['ok'] else 'FAIL'
+                detail = result.get('error') or (
+                    f"expected {result['expected_index']}; used {', '.join(result['indexes_used']) or 'no index'}"
+                    + (f"; full scan of {', '.join(result['full_scans'])}" if result['full_scans'] else '')
+                )
+                print(f"{mark} {result['check']}: {detail}")
+        print(f'{len(results) - len(failures)} of {len(results)} hot queries use their index')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
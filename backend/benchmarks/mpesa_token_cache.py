@@ -0,0 +1,60 @@
+"""Shows that one Daraja token fetch serves many concurrent STK pushes.
+
+    cd backend && python -m benchmarks.mpesa_token_cache --pushes 300 --threads 20
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.daraja_standin import DarajaStandIn
+
+def run(pushes, threads, latency):
+    standin = DarajaStandIn(latency=latency).start()
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+    from app import create_app
+    from app.services.mpesa_service import MPesaService, access_token_cache
+
+    app = create_app('development')
+    app.config.update(
+        MPESA_BASE_URL=standin.base_url,
+        MPESA_CONSUMER_KEY='bench-key',
+        MPESA_CONSUMER_SECRET='bench-secret',
+        MPESA_SHORTCODE='174379',
+        MPESA_PASSKEY='bench-passkey',
+        MPESA_CALLBACK_URL='http://localhost/api/mpesa/callback'
+    )
+    access_token_cache.clear()
+
+    def push(i):
+        with app.app_context():
+            return MPesaService().initiate_stk_push(f'2547{i:08d}', 100, f'BENCH{i}')
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(push, range(pushes)))
+    elapsed = time.perf_counter() - started
+    standin.stop()
+
+    return {
+        'pushes': pushes,
+        'threads': threads,
+        'successful_pushes': sum(1 for r in results if r),
+        'token_fetches': standin.count('/oauth/v1/generate'),
+        'stk_requests': standin.count('/mpesa/stkpush/v1/processrequest'),
+        'elapsed_seconds': round(elapsed, 3)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pushes', type=int, default=300)
+    parser.add_argument('--threads', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.01)
+    args = parser.parse_args()
+
+    report = run(args.pushes, args.threads, args.latency)
+    print(json.dumps(report, indent=2))
+    if report['token_fetches'] != 1 or report['successful_pushes'] != args.pushes:
+        raise SystemExit(1)
@@ -0,0 +1,225 @@
+"""Fails when an endpoint's SQL statement count grows with the size of the data.
+
+    cd backend && python -m benchmarks.query_counts
+    cd backend && python -m benchmarks.query_counts --blueprint payments --verbose
+
+Every check runs against two freshly seeded estates of different sizes. The
+same request must issue the same number of statements on both; an N+1 (a
+query inside a loop over rows) shows up as a higher count on the larger
+estate. Offending statements are listed with how many more times they ran,
+and the exit status is non-zero, so this can gate CI.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+
+SMALL = {'tenants': 30, 'payments': 600, 'sms_logs': 150, 'alerts': 150, 'months': 12}
+LARGE = {'tenants': 240, 'payments': 4800, 'sms_logs': 1200, 'alerts': 1200, 'months': 12}
+
+class Check:
+    def __init__(self, blueprint, method, path, body=None, capture=None):
+        self.blueprint = blueprint
+        self.method = method
+        self.path = path
+        self.body = body
+        self.capture = capture
+
+    @property
+    def name(self):
+        return f'{self.method} {self.path}'
+
+def _capture(key, field):
+    def capture(payload, ids):
+        ids[key] = payload[field]['id']
+    return capture
+
+CHECKS = [
+    Check('auth', 'GET', '/api/auth/current-user'),
+    Check('auth', 'GET', '/api/auth/check-session'),
+    Check('auth', 'GET', '/api/auth/users'),
+    Check('auth', 'GET', '/api/auth/users?limit=50&sort=username'),
+
+    Check('tenants', 'GET', '/api/tenants'),
+    Check('tenants', 'GET', '/api/tenants?limit=50&sort=full_name&fields=full_name,unit_number,phone'),
+    Check('tenants', 'GET', '/api/tenants?search={tenant_surname}'),
+    Check('tenants', 'GET', '/api/tenants/{tenant_id}'),
+    Check('tenants', 'GET', '/api/tenants/{tenant_id}/balance'),
+    Check('tenants', 'GET', '/api/tenants/{tenant_id}/statement'),
+    Check('tenants', 'PUT', '/api/tenants/{tenant_id}', body={'notes': 'query count check'}),
+
+    Check('payments', 'GET', '/api/payments'),
+    Check('payments', 'GET', '/api/payments?all=true'),
+    Check('payments', 'GET', '/api/payments?tenant_id={tenant_id}'),
+    Check('payments', 'GET', '/api/payments/{payment_id}'),
+    Check('payments', 'GET', '/api/payments/audit-trail'),
+    Check('payments', 'GET', '/api/payments/audit-trail/export?format=csv'),
+    Check('payments', 'POST', '/api/payments', body={
+        'tenant_id': '{tenant_id}', 'amount': 500, 'payment_date': '{today}', 'payment_method': 'Cash'
+    }),
+
+    Check('dashboard', 'GET', '/api/dashboard/summary'),
+    Check('dashboard', 'GET', '/api/dashboard/alerts'),
+    Check('dashboard', 'GET', '/api/dashboard/alerts?unread_only=true'),
+    Check('dashboard', 'GET', '/api/dashboard/lease-expiring'),
+
+    Check('messaging', 'GET', '/api/messaging/templates'),
+    Check('messaging', 'GET', '/api/messaging/sms-logs'),
+    Check('messaging', 'GET', '/api/messaging/providers'),
+    Check('messaging', 'POST', '/api/messaging/broadcast', body={'template_id': '{template_id}', 'scope': 'all_active'},
+          capture=_capture('broadcast_id', 'broadcast')),
+    Check('messaging', 'GET', '/api/messaging/broadcasts/{broadcast_id}'),
+    Check('messaging', 'POST', '/api/messaging/reminders/run', body={'dry_run': True}),
+
+    Check('mpesa', 'POST', '/api/mpesa/callback', body={'Body': {'stkCallback': {
+        'CheckoutRequestID': 'ws_CO_query_count', 'ResultCode': 0, 'CallbackMetadata': {'Item': [
+            {'Name': 'Amount', 'Value': 1000},
+            {'Name': 'MpesaReceiptNumber', 'Value': 'QCOUNT0001'},
+            {'Name': 'PhoneNumber', 'Value': '{tenant_msisdn}'}
+        ]}
+    }}}),
+    Check('mpesa', 'GET', '/api/mpesa/inbox'),
+    Check('mpesa', 'GET', '/api/mpesa/campaigns'),
+
+    Check('search', 'GET', '/api/search?q={tenant_surname}'),
+
+    Check('invoices', 'POST', '/api/invoices/generate', body={}),
+    Check('invoices', 'GET', '/api/invoices'),
+    Check('invoices', 'GET', '/api/invoices/arrears'),
+]
+
+def _fill(value, ids):
+    if isinstance(value, str):
+        if value.startswith('{') and value.endswith('}') and value[1:-1] in ids:
+            return ids[value[1:-1]]
+        return value.format(**ids)
+    if isinstance(value, dict):
+        return {key: _fill(item, ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, ids) for item in value]
+    return value
+
+def _normalise(statement):
+    return ' '.join(statement.split())
+
+def profile(counts, checks):
+    """Seed an estate of `counts` and return {check name: (status, Counter of statements)}."""
+    from benchmarks.seed import BENCH_PASSWORD, BENCH_USERNAME, create_seeded_app
+    from app import db
+    from app.models.payment import Payment
+    from app.models.template import Template
+    from app.models.tenant import Tenant
+    from app.services.dashboard_service import DashboardService
+    from app.utils.template_engine import template_cache
+    from sqlalchemy import event
+
+    app, summary, path = create_seeded_app(**counts)
+    template_cache.invalidate()
+
+    with app.app_context():
+        tenant = Tenant.query.filter_by(is_active=True).order_by(Tenant.id).first()
+        today = DashboardService().today
+        ids = {
+            'tenant_id': tenant.id,
+            'tenant_msisdn': f'254{tenant.phone_key}',
+            # Searches must match on both estates; an empty result skips the row query.
+            'tenant_surname': tenant.full_name.split()[-1].lower(),
+            'payment_id': db.session.query(db.func.max(Payment.id)).scalar(),
+            'template_id': Template.query.order_by(Template.id).first().id,
+            'today': today.isoformat()
+        }
+        engine = db.engine
+
+    recorded = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(_normalise(statement))
+    event.listen(engine, 'after_cursor_execute', record)
+
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+    if response.status_code != 200:
+        raise RuntimeError(f'login failed: {response.get_data(as_text=True)}')
+
+    results = {}
+    for check in checks:
+        path_ = _fill(check.path, ids)
+        recorded.clear()
+        if check.method == 'GET':
+            response = client.get(path_)
+        else:
+            response = client.open(path_, method=check.method, json=_fill(check.body, ids) if check.body is not None else None)
+        # Streamed exports run their queries while the body is read.
+        response.get_data()
+        results[check.name] = (response.status_code, Counter(recorded))
+        if check.capture and response.status_code < 400:
+            check.capture(response.get_json(), ids)
+
+    event.remove(engine, 'after_cursor_execute', record)
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    if path:
+        os.unlink(path)
+    return results
+
+def compare(checks, small, large, allowance):
+    failures, report = [], []
+    for check in checks:
+        small_status, small_statements = small[check.name]
+        large_status, large_statements = large[check.name]
+        small_count, large_count = sum(small_statements.values()), sum(large_statements.values())
+        entry = {
+            'blueprint': check.blueprint,
+            'check': check.name,
+            'status': large_status,
+            'statements_small': small_count,
+            'statements_large': large_count
+        }
+        if small_status >= 400 or large_status >= 400:
+            entry['error'] = f'HTTP {small_status} / {large_status}'
+            failures.append(entry)
+        elif large_count > small_count + allowance:
+            entry['grown_statements'] = [
+                {'extra_runs': large_statements[statement] - small_statements.get(statement, 0), 'statement': statement}
+                for statement in large_statements
+                if large_statements[statement] > small_statements.get(statement, 0)
+            ]
+            failures.append(entry)
+        report.append(entry)
+    return report, failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--blueprint', action='append', help='only checks for this blueprint (repeatable)')
+    parser.add_argument('--allowance', type=int, default=0, help='extra statements tolerated on the larger estate')
+    parser.add_argument('--verbose', action='store_true', help='print every check, not just failures')
+    parser.add_argument('--json', action='store_true', help='print the full report as JSON')
+    args = parser.parse_args(argv)
+
+    os.environ['MPESA_INBOX_WORKERS'] = '0'
+    os.environ['SMS_OUTBOX_WORKERS'] = '0'
+    os.environ['SMS_PROVIDER'] = 'console'
+    os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+    os.environ['INSTRUMENTATION_ENABLED'] = 'false'
+
+    checks = [check for check in CHECKS if not args.blueprint or check.blueprint in args.blueprint]
+    small = profile(SMALL, checks)
+    large = profile(LARGE, checks)
+    report, failures = compare(checks, small, large, args.allowance)
+
+    if args.json:
+        print(json.dumps({'small': SMALL, 'large': LARGE, 'checks': report}, indent=2))
+    else:
+        for entry in report:
+            if args.verbose or entry in failures:
+                mark = 'FAIL' if entry in failures else 'ok  '
+                print(f"{mark} {entry['check']}: {entry['statements_small']} -> {entry['statements_large']} statements"
+                      + (f" ({entry['error']})" if 'error' in entry else ''))
+                for grown in entry.get('grown_statements', []):
+                    print(f"       +{grown['extra_runs']}x {grown['statement'][:300]}")
+        print(f'{len(report) - len(failures)} of {len(report)} checks keep a constant statement count')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
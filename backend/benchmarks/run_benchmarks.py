@@ -0,0 +1,234 @@
+"""Times the hot endpoints through the Flask test client against a seeded estate and prints JSON.
+
+    cd backend && python -m benchmarks.run_benchmarks --tenants 5000 --payments 200000 --output before.json
+    cd backend && python -m benchmarks.run_benchmarks --tenants 5000 --payments 200000 --compare before.json
+    cd backend && python -m benchmarks.run_benchmarks --database-url postgresql://localhost/sawarent_bench --no-seed
+
+Each scenario reports latency percentiles over --repeat calls, the SQL
+statements per call and the tracemalloc peak of one extra traced call.
+The dashboard response cache is off unless --cache is given, so the
+numbers reflect the queries rather than cache hits.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+SEARCH_TERMS = ['wanj', 'kariuki', '0712', 'b01', 'chebet ko']
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+class StatementCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'after_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+def mpesa_callback(index, phone):
+    return {'Body': {'stkCallback': {
+        'MerchantRequestID': f'bench-{index}',
+        'CheckoutRequestID': f'ws_CO_bench_{index}',
+        'ResultCode': 0,
+        'ResultDesc': 'The service request is processed successfully.',
+        'CallbackMetadata': {'Item': [
+            {'Name': 'Amount', 'Value': 1000},
+            {'Name': 'MpesaReceiptNumber', 'Value': f'BENCHCB{index:06d}'},
+            {'Name': 'TransactionDate', 'Value': 20260101120000},
+            {'Name': 'PhoneNumber', 'Value': int(phone)}
+        ]}
+    }}}
+
+def scenarios(app, client):
+    from app.models.payment import Payment
+    from app.models.tenant import Tenant
+    from app.services.messaging_service import MessagingService
+
+    with app.app_context():
+        tenant = Tenant.query.filter_by(is_active=True).order_by(Tenant.id).first()
+        payment = Payment.query.order_by(Payment.id.desc()).first()
+        phone = '254' + tenant.phone_key
+        tenant_id, payment_id = tenant.id, payment.id
+
+    counter = {'callback': 0, 'search': 0}
+
+    def callback():
+        counter['callback'] += 1
+        return client.post('/api/mpesa/callback', json=mpesa_callback(counter['callback'], phone))
+
+    def search():
+        counter['search'] += 1
+        return client.get(f'/api/tenants?search={SEARCH_TERMS[counter["search"] % len(SEARCH_TERMS)]}')
+
+    def render_receipt():
+        with app.app_context():
+            from app import db
+            messaging_service = MessagingService()
+            message = messaging_service.render_payment_receipt(
+                db.session.get(Payment, payment_id), db.session.get(Tenant, tenant_id)
+            )
+        return message
+
+    return [
+        ('dashboard_summary', lambda: client.get('/api/dashboard/summary')),
+        ('payments_page', lambda: client.get('/api/payments?limit=50')),
+        ('payments_tenant_page', lambda: client.get(f'/api/payments?limit=50&tenant_id={tenant_id}')),
+        ('audit_trail_page', lambda: client.get('/api/payments/audit-trail?limit=50')),
+        ('tenant_search', search),
+        ('mpesa_callback', callback),
+        ('template_render', render_receipt)
+    ]
+
+def measure(name, call, counter, repeat, warmup):
+    for _ in range(warmup):
+        call()
+
+    samples = []
+    statements = []
+    for _ in range(repeat):
+        before = counter.count
+        started = time.perf_counter()
+        response = call()
+        samples.append(time.perf_counter() - started)
+        statements.append(counter.count - before)
+        status = getattr(response, 'status_code', 200)
+        if status >= 400:
+            raise RuntimeError(f'{name} returned {status}: {response.get_data(as_text=True)[:200]}')
+
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'calls': repeat,
+        'p50_ms': round(statistics.median(samples) * 1000, 2),
+        'p90_ms': round(percentile(samples, 0.90) * 1000, 2),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 2),
+        'max_ms': round(max(samples) * 1000, 2),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 2),
+        'sql_statements': max(statements),
+        'peak_memory_kb': round(peak / 1024, 1)
+    }
+
+def compare(report, baseline):
+    """p50/p90 and statement deltas against an earlier run's JSON."""
+    deltas = {}
+    for name, result in report['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        deltas[name] = {
+            'p50_ratio': round(result['p50_ms'] / before['p50_ms'], 2) if before['p50_ms'] else None,
+            'p90_ratio': round(result['p90_ms'] / before['p90_ms'], 2) if before['p90_ms'] else None,
+            'sql_statements_delta': result['sql_statements'] - before['sql_statements'],
+            'peak_memory_kb_delta': round(result['peak_memory_kb'] - before['peak_memory_kb'], 1)
+        }
+    return deltas
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run(args):
+    os.environ['MPESA_INBOX_WORKERS'] = '0'
+    os.environ['SMS_OUTBOX_WORKERS'] = '0'
+    os.environ['SMS_PROVIDER'] = 'console'
+    os.environ['INSTRUMENTATION_ENABLED'] = 'false'
+    if not args.cache:
+        os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+
+    from benchmarks.seed import BENCH_PASSWORD, BENCH_USERNAME, create_seeded_app, seed
+    counts = {
+        'tenants': args.tenants,
+        'payments': args.payments,
+        'sms_logs': args.sms_logs,
+        'alerts': args.alerts,
+        'months': args.months
+    }
+
+    started = time.perf_counter()
+    path = None
+    if args.no_seed:
+        if args.database_url:
+            os.environ['DATABASE_URL'] = args.database_url
+        from app import create_app
+        app = create_app('development')
+        with app.app_context():
+            from app.models.user import User
+            if not User.query.filter_by(username=BENCH_USERNAME).first():
+                seed(tenants=0, payments=0, sms_logs=0, alerts=0)
+        seeded = None
+    else:
+        app, seeded, path = create_seeded_app(args.database_url, **counts)
+    seed_seconds = time.perf_counter() - started
+
+    from app import db
+    with app.app_context():
+        counter = StatementCounter(db.engine)
+        dialect = db.engine.dialect.name
+
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+    if response.status_code != 200:
+        raise RuntimeError(f'login failed: {response.get_data(as_text=True)}')
+
+    selected = set(args.only.split(',')) if args.only else None
+    results = {}
+    for name, call in scenarios(app, client):
+        if selected and name not in selected:
+            continue
+        results[name] = measure(name, call, counter, args.repeat, args.warmup)
+
+    if path:
+        os.unlink(path)
+
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'dialect': dialect,
+            'dataset': seeded or 'existing database',
+            'seed_seconds': round(seed_seconds, 1),
+            'response_cache': bool(args.cache),
+            'repeat': args.repeat
+        },
+        'scenarios': results
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='seed into / benchmark this database (default: temporary SQLite file)')
+    parser.add_argument('--no-seed', action='store_true', help='benchmark an already seeded --database-url')
+    parser.add_argument('--tenants', type=int, default=2000)
+    parser.add_argument('--payments', type=int, default=100000)
+    parser.add_argument('--sms-logs', type=int, default=20000)
+    parser.add_argument('--alerts', type=int, default=20000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', help='comma-separated scenario names')
+    parser.add_argument('--cache', action='store_true', help='leave the dashboard response cache on')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.compare:
+        with open(args.compare) as baseline:
+            report['compared_to'] = compare(report, json.load(baseline))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    print(output)
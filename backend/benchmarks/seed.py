@@ -0,0 +1,279 @@
+"""Fills a database with a synthetic estate: tenants, payment history, SMS logs, alerts and templates.
+
+    cd backend && python -m benchmarks.seed --tenants 5000 --payments 2000000 --sms-logs 500000 --alerts 500000
+    cd backend && python -m benchmarks.seed --database-url postgresql://localhost/sawarent_bench --tenants 5000
+
+Rows go in through chunked executemany inserts, so millions of payments take
+minutes rather than hours. The ledger rollup and search index are rebuilt at
+the end, the same way the CSV import leaves them.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+FIRST_NAMES = ['Wanjiku', 'Achieng', 'Kamau', 'Otieno', 'Njeri', 'Mwangi', 'Akinyi', 'Kiprop', 'Chebet', 'Mutua',
+               'Wairimu', 'Ouma', 'Nyambura', 'Kibet', 'Auma', 'Njoroge', 'Jeptoo', 'Mumbi', 'Onyango', 'Wafula']
+LAST_NAMES = ['Kariuki', 'Odhiambo', 'Wekesa', 'Njoroge', 'Ruto', 'Omondi', 'Maina', 'Kilonzo', 'Barasa', 'Koech',
+              'Mutiso', 'Otieno', 'Kimani', 'Cheruiyot', 'Gitau', 'Ochieng', 'Muthoni', 'Langat', 'Wambua', 'Kiplagat']
+RENTS = [6500, 8000, 10000, 12000, 15000, 18000, 25000, 35000]
+PAYMENT_METHODS = [('M-PESA', 0.75), ('Cash', 0.15), ('Bank Transfer', 0.10)]
+ALERT_TYPES = [('mpesa_payment_received', 'success'), ('payment_logged', 'info'), ('mpesa_unmatched', 'warning'),
+               ('sms_failed', 'error'), ('lease_expiring', 'warning')]
+SMS_STATUSES = [('sent', 0.9), ('failed', 0.05), ('pending', 0.05)]
+TEMPLATES = [
+    ('Payment Receipt', 'receipt', 'formal',
+     'Dear {tenant_name}, we confirm receipt of KES {amount} for unit {unit_number} on {payment_date}. '
+     'Ref: {transaction_reference}. Balance: KES {remaining_amount}.'),
+    ('Rent Reminder', 'reminder', 'friendly',
+     'Hi {tenant_name}, your rent of KES {amount} for unit {unit_number} is due on {due_date}. '
+     'Outstanding: KES {remaining_amount}. Thank you!')
+]
+BENCH_USERNAME = 'bench_admin'
+BENCH_PASSWORD = 'bench-password'
+
+def kenyan_phone(index, rng):
+    """A unique Safaricom/Airtel number for `index`, written the inconsistent ways tenants give them."""
+    # 7919 is coprime with 10**8, so distinct indexes give distinct subscriber numbers.
+    subscriber = (index * 7919 + 12345678) % 10 ** 8
+    prefix = rng.choice(['7', '7', '7', '1'])
+    style = rng.random()
+    if style < 0.6:
+        return f'+254{prefix}{subscriber:08d}'
+    if style < 0.85:
+        return f'0{prefix}{subscriber:08d}'
+    if style < 0.95:
+        return f'254{prefix}{subscriber:08d}'
+    return f'+254 {prefix}{subscriber // 10 ** 6:02d} {subscriber // 1000 % 1000:03d} {subscriber % 1000:03d}'
+
+def mpesa_receipt(index):
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    value, code = index, ''
+    for _ in range(9):
+        value, remainder = divmod(value, 36)
+        code = digits[remainder] + code
+    return f'S{code}'
+
+def weighted(rng, choices):
+    roll, total = rng.random(), 0.0
+    for value, weight in choices:
+        total += weight
+        if roll < total:
+            return value
+    return choices[-1][0]
+
+def _insert(db, table, rows):
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+def seed(tenants=500, payments=20000, sms_logs=5000, alerts=5000, months=24, batch_size=5000, seed_value=42, log=print):
+    """Seed the database of the current app context; returns row counts and timings."""
+    from app import db
+    from app.models.alert import Alert
+    from app.models.payment import Payment
+    from app.models.sms_log import SMSLog
+    from app.models.template import Template
+    from app.models.tenant import Tenant
+    from app.models.user import User
+    from app.services.ledger_service import LedgerService
+    from app.services.search_service import SearchService
+    from app.utils.phone import phone_key
+    from datetime import datetime, timedelta
+    import pytz
+
+    rng = random.Random(seed_value)
+    tz = pytz.timezone('Africa/Nairobi')
+    now = datetime.now(tz)
+    today = now.date()
+    history_start = (today.replace(day=1) - timedelta(days=31 * (months - 1))).replace(day=1)
+    timings = {}
+
+    started = time.perf_counter()
+    if not User.query.filter_by(username=BENCH_USERNAME).first():
+        user = User(username=BENCH_USERNAME, email='bench@example.com', role='super_admin', full_name='Benchmark Admin')
+        user.set_password(BENCH_PASSWORD)
+        db.session.add(user)
+    for name, category, theme, content in TEMPLATES:
+        if not Template.query.filter_by(category=category, theme=theme, is_active=True).first():
+            db.session.add(Template(name=name, category=category, theme=theme, content=content, is_active=True))
+    db.session.commit()
+
+    first_tenant_id = (db.session.query(db.func.max(Tenant.id)).scalar() or 0) + 1
+    tenant_rows = []
+    for i in range(tenants):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        phone = kenyan_phone(first_tenant_id + i, rng)
+        lease_start = history_start + timedelta(days=rng.randrange(0, 28 * max(months // 3, 1)))
+        # Roughly one in twelve tenants has already moved out.
+        moved_out = rng.random() < 0.08
+        lease_end = today - timedelta(days=rng.randrange(1, 200)) if moved_out else today + timedelta(days=rng.randrange(30, 720))
+        tenant_rows.append({
+            'full_name': f'{first} {last}',
+            'phone': phone,
+            'phone_key': phone_key(phone),
+            'email': f'{first}.{last}{first_tenant_id + i}@example.com'.lower(),
+            'unit_number': f'{chr(65 + i % 26)}{i // 26 + 1:03d}',
+            'expected_rent': float(rng.choice(RENTS)),
+            'deposit_amount': 0.0,
+            'lease_start_date': lease_start,
+            'lease_end_date': max(lease_end, lease_start + timedelta(days=30)),
+            'is_active': not moved_out,
+            'created_at': now,
+            'updated_at': now
+        })
+    for start in range(0, len(tenant_rows), batch_size):
+        _insert(db, Tenant.__table__, tenant_rows[start:start + batch_size])
+    db.session.commit()
+    tenant_list = db.session.query(
+        Tenant.id, Tenant.expected_rent, Tenant.lease_start_date, Tenant.lease_end_date
+    ).filter(Tenant.id >= first_tenant_id).order_by(Tenant.id).all()
+    timings['tenants_s'] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    first_payment_id = (db.session.query(db.func.max(Payment.id)).scalar() or 0) + 1
+    receipt_offset = first_payment_id
+    rows = []
+    for i in range(payments):
+        tenant = tenant_list[i % len(tenant_list)]
+        last_day = min(tenant.lease_end_date, today)
+        span = max((last_day - tenant.lease_start_date).days, 1)
+        payment_date = tenant.lease_start_date + timedelta(days=rng.randrange(span))
+        amount = tenant.expected_rent if rng.random() < 0.8 else round(tenant.expected_rent * rng.choice([0.25, 0.5, 0.75]), 2)
+        method = weighted(rng, PAYMENT_METHODS)
+        status, remaining = Payment.status_for(amount, tenant.expected_rent)
+        rows.append({
+            'tenant_id': tenant.id,
+            'amount': amount,
+            'payment_date': payment_date,
+            'payment_method': method,
+            'payment_status': status,
+            'remaining_amount': remaining,
+            'transaction_reference': mpesa_receipt(receipt_offset + i) if method == 'M-PESA' else (
+                f'BNK{receipt_offset + i:09d}' if method == 'Bank Transfer' else ''),
+            'receipt_sent': method == 'M-PESA',
+            'created_at': datetime.combine(payment_date, datetime.min.time()),
+            'updated_at': now
+        })
+        if len(rows) >= batch_size:
+            _insert(db, Payment.__table__, rows)
+            db.session.commit()
+            rows = []
+            if (i + 1) % (batch_size * 40) == 0:
+                log(f'  {i + 1} payments')
+    _insert(db, Payment.__table__, rows)
+    db.session.commit()
+    timings['payments_s'] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    rows = []
+    for i in range(sms_logs):
+        tenant_index = rng.randrange(len(tenant_list))
+        status = weighted(rng, SMS_STATUSES)
+        rows.append({
+            'recipient_phone': tenant_rows[tenant_index]['phone'],
+            'recipient_name': tenant_rows[tenant_index]['full_name'],
+            'message': f'Dear tenant, we confirm receipt of your payment. Ref {mpesa_receipt(i)}.',
+            'message_type': rng.choice(['receipt', 'reminder', 'broadcast']),
+            'status': status,
+            'sent_at': now - timedelta(minutes=rng.randrange(60 * 24 * 30 * months)),
+            'tenant_id': tenant_list[tenant_index].id,
+            'attempts': 1 if status != 'pending' else 0,
+            'last_error': 'provider timeout' if status == 'failed' else None
+        })
+        if len(rows) >= batch_size:
+            _insert(db, SMSLog.__table__, rows)
+            db.session.commit()
+            rows = []
+    _insert(db, SMSLog.__table__, rows)
+    db.session.commit()
+    timings['sms_logs_s'] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    rows = []
+    for i in range(alerts):
+        alert_type, severity = rng.choice(ALERT_TYPES)
+        created_at = now - timedelta(minutes=rng.randrange(60 * 24 * 30 * months))
+        rows.append({
+            'alert_type': alert_type,
+            'message': f'{alert_type.replace("_", " ").capitalize()} #{i}',
+            'severity': severity,
+            'is_read': created_at < now - timedelta(days=7),
+            'related_tenant_id': tenant_list[rng.randrange(len(tenant_list))].id,
+            'related_payment_id': first_payment_id + rng.randrange(payments) if payments else None,
+            'created_at': created_at
+        })
+        if len(rows) >= batch_size:
+            _insert(db, Alert.__table__, rows)
+            db.session.commit()
+            rows = []
+    _insert(db, Alert.__table__, rows)
+    db.session.commit()
+    timings['alerts_s'] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    ledger_service = LedgerService()
+    tenant_ids = [tenant.id for tenant in tenant_list]
+    # Per chunk, so the replay never holds the whole payment history in memory.
+    for start in range(0, len(tenant_ids), 500):
+        ledger_service.rebuild(tenant_ids=tenant_ids[start:start + 500])
+        db.session.commit()
+    timings['ledger_s'] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    SearchService().rebuild()
+    db.session.commit()
+    timings['search_index_s'] = round(time.perf_counter() - started, 2)
+
+    return {
+        'tenants': tenants,
+        'payments': payments,
+        'sms_logs': sms_logs,
+        'alerts': alerts,
+        'months': months,
+        'timings': timings
+    }
+
+def create_seeded_app(database_url=None, **counts):
+    """A fresh app on `database_url` (a temporary SQLite file by default) seeded with `counts`."""
+    import tempfile
+    path = None
+    if database_url is None:
+        handle = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        handle.close()
+        path = handle.name
+        database_url = f'sqlite:///{path}'
+    os.environ['DATABASE_URL'] = database_url
+
+    # Config reads DATABASE_URL once, at import; point it at this database
+    # even when an earlier estate in the same process already imported it.
+    from config import config
+    config['development'].SQLALCHEMY_DATABASE_URI = database_url
+    from app import create_app, db, migrations
+    app = create_app('development')
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        summary = seed(**counts)
+    return app, summary, path
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='target database (default: DATABASE_URL)')
+    parser.add_argument('--tenants', type=int, default=5000)
+    parser.add_argument('--payments', type=int, default=200000)
+    parser.add_argument('--sms-logs', type=int, default=50000)
+    parser.add_argument('--alerts', type=int, default=50000)
+    parser.add_argument('--months', type=int, default=24, help='months of payment history')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42, help='random seed, for repeatable estates')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    from app import create_app, db, migrations
+    app = create_app('development')
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        summary = seed(args.tenants, args.payments, args.sms_logs, args.alerts, args.months, args.batch_size, args.seed)
+    print(json.dumps(summary, indent=2))
+    print(f'Log in as {BENCH_USERNAME} / {BENCH_PASSWORD}')
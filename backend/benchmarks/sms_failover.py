@@ -0,0 +1,87 @@
+"""Shows SMS traffic failing over to the secondary provider while the primary is down, then recovering.
+
+    cd backend && python -m benchmarks.sms_failover --messages 50
+
+Between the outage and recovery, the primary's trial call is throttled by
+its own rate limit; the breaker must still let the next trial through.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+from benchmarks.africastalking_standin import AfricasTalkingStandIn
+
+def run(messages, reset_timeout):
+    standin = AfricasTalkingStandIn(mode='down').start()
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+    from app import create_app
+    from app.services.messaging_service import MessagingService
+    from app.services.sms_providers import sms_providers
+    from app.utils.rate_limit import TokenBucket
+
+    app = create_app('development')
+    app.logger.setLevel(logging.WARNING)
+    app.config.update(
+        SMS_PROVIDER='africastalking',
+        SMS_FALLBACK_PROVIDER='mock',
+        SMS_MOCK_LATENCY=0,
+        AFRICASTALKING_BASE_URL=standin.base_url,
+        AFRICASTALKING_USERNAME='sandbox',
+        AFRICASTALKING_API_KEY='bench-key',
+        AFRICASTALKING_RATE_PER_SECOND=1000,
+        SMS_RATE_PER_SECOND=1000,
+        SMS_CIRCUIT_FAILURE_THRESHOLD=3,
+        SMS_CIRCUIT_RESET_TIMEOUT=reset_timeout
+    )
+    sms_providers.reset()
+
+    def send_all(label):
+        used = {}
+        with app.app_context():
+            service = MessagingService()
+            for i in range(messages):
+                name = service.deliver(f'+2547{i:08d}', f'{label} {i}', 'Bench')
+                used[name] = used.get(name, 0) + 1
+        return used
+
+    outage = send_all('Outage')
+    calls_during_outage = standin.calls
+
+    standin.mode = 'ok'
+    time.sleep(reset_timeout)
+
+    # Empty the primary's token bucket so the breaker's trial call is throttled.
+    primary = sms_providers.get('africastalking', app.config)
+    rate_limiter, rate_limit_wait = primary.rate_limiter, primary.rate_limit_wait
+    primary.rate_limiter = TokenBucket(rate=0.001, capacity=1)
+    primary.rate_limiter.try_acquire()
+    primary.rate_limit_wait = 0
+    throttled_trial = send_all('Throttled')
+    circuit_after_throttled_trial = primary.circuit_breaker.state
+    primary.rate_limiter, primary.rate_limit_wait = rate_limiter, rate_limit_wait
+
+    recovered = send_all('Recovered')
+
+    with app.app_context():
+        stats = sms_providers.stats()
+    standin.stop()
+
+    return {
+        'messages_per_phase': messages,
+        'delivered_during_outage': outage,
+        'primary_calls_during_outage': calls_during_outage,
+        'delivered_while_trial_throttled': throttled_trial,
+        'circuit_after_throttled_trial': circuit_after_throttled_trial,
+        'delivered_after_recovery': recovered,
+        'providers': stats
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--reset-timeout', type=float, default=1)
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.reset_timeout), indent=2))
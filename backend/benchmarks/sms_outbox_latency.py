@@ -0,0 +1,73 @@
+"""Shows that /api/messaging/send-sms latency no longer depends on provider latency.
+
+    cd backend && python -m benchmarks.sms_outbox_latency --latency 0.5 --messages 20
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+def run(messages, latency, workers):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    os.environ['DATABASE_URL'] = f'sqlite:///{database.name}'
+    os.environ['SMS_PROVIDER'] = 'mock'
+    os.environ['SMS_MOCK_LATENCY'] = str(latency)
+    os.environ['SMS_OUTBOX_WORKERS'] = str(workers)
+    os.environ['SMS_OUTBOX_POLL_INTERVAL'] = '0.05'
+
+    from app import create_app, db, migrations
+    from app.models.user import User
+    from app.models.tenant import Tenant
+    from app.models.sms_log import SMSLog
+    from datetime import date
+    import logging
+
+    app = create_app('development')
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        admin = User(username='bench', email='bench@example.com', role='super_admin')
+        admin.set_password('bench')
+        db.session.add(admin)
+        db.session.add(Tenant(
+            full_name='Bench Tenant', phone='+254700000001', unit_number='B1', expected_rent=10000,
+            lease_start_date=date(2024, 1, 1), lease_end_date=date(2030, 1, 1)
+        ))
+        db.session.commit()
+
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'bench', 'password': 'bench'})
+
+    request_latencies = []
+    started = time.perf_counter()
+    for i in range(messages):
+        request_started = time.perf_counter()
+        response = client.post('/api/messaging/send-sms', json={'tenant_id': 1, 'message': f'Benchmark {i}'})
+        request_latencies.append(time.perf_counter() - request_started)
+        assert response.status_code == 202, response.get_json()
+
+    with app.app_context():
+        while SMSLog.query.filter(SMSLog.status != 'sent').count():
+            time.sleep(0.05)
+            db.session.remove()
+    delivered_after = time.perf_counter() - started
+    os.unlink(database.name)
+
+    return {
+        'messages': messages,
+        'provider_latency_seconds': latency,
+        'outbox_workers': workers,
+        'request_p50_ms': round(statistics.median(request_latencies) * 1000, 2),
+        'request_max_ms': round(max(request_latencies) * 1000, 2),
+        'all_delivered_after_seconds': round(delivered_after, 2)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.latency, args.workers), indent=2))
@@ -0,0 +1,159 @@
+"""Measures worker boot: process start to app ready, and to the first served request.
+
+    cd backend && python -m benchmarks.startup --runs 15 --output before.json
+    cd backend && python -m benchmarks.startup --runs 15 --compare before.json
+
+Every run is a fresh interpreter, the way a gunicorn worker without
+--preload boots. It reports the import of the app package, create_app(),
+the SQL statements issued while booting, and the first authenticated API
+request, which pays for the first connection and the first query compiles.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = r'''
+import json, time
+started = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, 'before_cursor_execute', lambda *args: statements.append(1))
+
+from app import create_app
+imported = time.perf_counter()
+app = create_app('development')
+created = time.perf_counter()
+boot_statements = len(statements)
+
+client = app.test_client()
+with client.session_transaction() as session:
+    session['_user_id'] = str(USER_ID)
+    session['_fresh'] = True
+before_request = time.perf_counter()
+response = client.get('/api/tenants?limit=20')
+responded = time.perf_counter()
+assert response.status_code == 200, response.get_data(as_text=True)
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (responded - before_request) * 1000,
+    'ready_to_first_response_ms': (responded - started) * 1000,
+    'boot_sql_statements': boot_statements
+}))
+'''
+
+METRICS = ('process_ms', 'import_ms', 'create_app_ms', 'first_request_ms', 'ready_to_first_response_ms', 'boot_sql_statements')
+
+def prepare(database_url, tenants):
+    """Migrate and seed the database the workers boot against; returns the bench admin's id."""
+    os.environ['DATABASE_URL'] = database_url
+    from benchmarks.seed import BENCH_USERNAME, seed
+    from app import create_app, db, migrations
+    from app.models.user import User
+
+    app = create_app('development')
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        if not User.query.filter_by(username=BENCH_USERNAME).first():
+            seed(tenants=tenants, payments=tenants * 10, sms_logs=tenants, alerts=tenants, log=lambda message: None)
+        user_id = User.query.filter_by(username=BENCH_USERNAME).one().id
+        db.engine.dispose()
+    return user_id
+
+def boot(user_id, env):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD.replace('USER_ID', str(user_id))],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f'worker failed to boot:\n{result.stderr[-2000:]}')
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample['process_ms'] = elapsed
+    return sample
+
+def summarise(samples):
+    report = {}
+    for metric in METRICS:
+        values = [sample[metric] for sample in samples]
+        report[metric] = {
+            'p50': round(statistics.median(values), 1),
+            'min': round(min(values), 1),
+            'max': round(max(values), 1)
+        }
+    return report
+
+def compare(report, baseline):
+    return {
+        metric: {
+            'p50_before': baseline['startup'][metric]['p50'],
+            'p50_after': report['startup'][metric]['p50'],
+            'p50_ratio': round(report['startup'][metric]['p50'] / baseline['startup'][metric]['p50'], 2)
+            if baseline['startup'][metric]['p50'] else None
+        }
+        for metric in METRICS if metric in baseline.get('startup', {})
+    }
+
+def run(args):
+    env = dict(os.environ)
+    env.update({
+        'MPESA_INBOX_WORKERS': '0',
+        'SMS_OUTBOX_WORKERS': '0',
+        'SMS_PROVIDER': 'console'
+    })
+
+    path = None
+    database_url = args.database_url
+    if database_url is None:
+        handle = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        handle.close()
+        path = handle.name
+        database_url = f'sqlite:///{path}'
+    env['DATABASE_URL'] = database_url
+
+    try:
+        user_id = prepare(database_url, args.tenants)
+        for _ in range(args.warmup):
+            boot(user_id, env)
+        samples = [boot(user_id, env) for _ in range(args.runs)]
+    finally:
+        if path:
+            os.unlink(path)
+
+    from benchmarks.run_benchmarks import git_revision
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'python': sys.version.split()[0],
+            'database': database_url.split(':', 1)[0],
+            'runs': args.runs
+        },
+        'startup': summarise(samples)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='boot against this database (default: temporary SQLite file)')
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=2, help='boots discarded first, so .pyc files and the page cache are warm')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.compare:
+        with open(args.compare) as baseline:
+            report['compared_to'] = compare(report, json.load(baseline))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    print(output)
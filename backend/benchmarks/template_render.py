@@ -0,0 +1,64 @@
+"""Compares the old str.replace template render with the compiled segment render.
+
+    cd backend && python -m benchmarks.template_render --recipients 500 --repeat 20
+"""
+import argparse
+import json
+import time
+
+from app.utils.template_engine import CompiledTemplate
+
+CONTENT = (
+    'Dear {tenant_name}, your rent payment for unit {unit_number} is overdue. '
+    'Please settle the outstanding amount of KES {remaining_amount} by {due_date}. '
+    'Expected rent: KES {expected_rent}. Reference: {transaction_reference}. Thank you.'
+)
+
+def legacy_render(content, **kwargs):
+    for key, value in kwargs.items():
+        placeholder = '{' + key + '}'
+        content = content.replace(placeholder, str(value))
+    return content
+
+def recipients(count):
+    return [{
+        'tenant_name': f'Tenant {i}',
+        'unit_number': f'A{i}',
+        'remaining_amount': 1000 + i,
+        'due_date': '05/11/2026',
+        'expected_rent': 15000,
+        'transaction_reference': f'QWE{i:07d}',
+        'amount': 5000,
+        'payment_date': '01/11/2026'
+    } for i in range(count)]
+
+def run(count, repeat):
+    values = recipients(count)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        legacy = [legacy_render(CONTENT, **v) for v in values]
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        # A broadcast compiles once, then renders every recipient.
+        compiled = CompiledTemplate(CONTENT)
+        rendered = [compiled.render(v) for v in values]
+    compiled_seconds = time.perf_counter() - started
+
+    assert rendered == legacy
+    renders = count * repeat
+    return {
+        'renders': renders,
+        'legacy_renders_per_second': round(renders / legacy_seconds),
+        'compiled_renders_per_second': round(renders / compiled_seconds),
+        'speedup': round(legacy_seconds / compiled_seconds, 2)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipients', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.recipients, args.repeat), indent=2))
@@ -0,0 +1,87 @@
+"""Compares the old four-column ilike tenant search with the search index on a large tenant table.
+
+    cd backend && python -m benchmarks.tenant_search --tenants 30000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+FIRST_NAMES = ['Wanjiku', 'Achieng', 'Kamau', 'Otieno', 'Njeri', 'Mwangi', 'Akinyi', 'Kiprop', 'Chebet', 'Mutua']
+LAST_NAMES = ['Kariuki', 'Odhiambo', 'Wekesa', 'Njoroge', 'Ruto', 'Omondi', 'Maina', 'Kilonzo', 'Barasa', 'Koech']
+QUERIES = ['wanj', 'kariuki', '0712', '+2547120', 'b-12', 'chebet ko', 'qwe10', 'mutua.omondi']
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def run(tenants, repeat):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    os.environ['DATABASE_URL'] = f'sqlite:///{database.name}'
+
+    from app import create_app, db, migrations
+    from app.models.tenant import Tenant
+    from app.services.search_service import SearchService
+    from datetime import date
+    from sqlalchemy import insert
+
+    app = create_app('development')
+    rng = random.Random(42)
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        rows = []
+        for i in range(tenants):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            rows.append({
+                'full_name': f'{first} {last}',
+                'phone': f'+2547{rng.randint(10000000, 99999999)}',
+                'email': f'{first}.{last}{i}@example.com'.lower(),
+                'unit_number': f'{chr(65 + i % 26)}-{i // 26}',
+                'expected_rent': 10000,
+                'lease_start_date': date(2024, 1, 1),
+                'lease_end_date': date(2030, 1, 1),
+                'is_active': True
+            })
+        db.session.execute(insert(Tenant), rows)
+        SearchService().rebuild()
+        db.session.commit()
+
+        def legacy(term):
+            pattern = f'%{term}%'
+            return Tenant.query.filter_by(is_active=True).filter(db.or_(
+                Tenant.full_name.ilike(pattern),
+                Tenant.phone.ilike(pattern),
+                Tenant.unit_number.ilike(pattern),
+                Tenant.email.ilike(pattern)
+            )).limit(20).all()
+
+        def indexed(term):
+            return SearchService().search(term, types=('tenant',), limit=20)
+
+        report = {'tenants': tenants}
+        for name, search in (('legacy_ilike', legacy), ('search_index', indexed)):
+            samples = []
+            for _ in range(repeat):
+                for term in QUERIES:
+                    started = time.perf_counter()
+                    search(term)
+                    samples.append(time.perf_counter() - started)
+                    db.session.rollback()
+            report[name] = {
+                'p50_ms': round(statistics.median(samples) * 1000, 2),
+                'p95_ms': round(percentile(samples, 0.95) * 1000, 2),
+                'max_ms': round(max(samples) * 1000, 2)
+            }
+
+    os.unlink(database.name)
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=30000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args.tenants, args.repeat), indent=2))
@@ -0,0 +1,36 @@
+from app import create_app, db
+from app.services.ledger_service import LedgerService
+import argparse
+import sys
+
+app = create_app('development')
+
+def check_balances(tenant_ids=None, fix=False, limit=50):
+    with app.app_context():
+        ledger_service = LedgerService()
+        drift = ledger_service.check(tenant_ids)
+        if not drift:
+            print('✓ Ledger balances match payment history')
+            return 0
+
+        for record in drift[:limit]:
+            print(' '.join(f'{key}={value}' for key, value in record.items()))
+        if len(drift) > limit:
+            print(f'... {len(drift) - limit} more')
+
+        affected = sorted({record['tenant_id'] for record in drift})
+        print(f'✗ {len(drift)} drifted values across {len(affected)} tenants')
+
+        if fix:
+            ledger_service.rebuild(tenant_ids=affected)
+            db.session.commit()
+            print(f'✓ Rebuilt the ledger for {len(affected)} tenants')
+        return 1
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare stored tenant balances with a replay of payment history')
+    parser.add_argument('--tenant', type=int, nargs='*', dest='tenant_ids', help='Only these tenant ids (default: all)')
+    parser.add_argument('--fix', action='store_true', help='Rebuild drifting tenants from payments')
+    parser.add_argument('--limit', type=int, default=50, help='Drift records to print')
+    args = parser.parse_args()
+    sys.exit(check_balances(tenant_ids=args.tenant_ids or None, fix=args.fix, limit=args.limit))
@@ -17,6 +17,17 @@ class Config:
     
     TIMEZONE = os.getenv('TIMEZONE', 'Africa/Nairobi')
     
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_URL = os.getenv('RESPONSE_CACHE_URL', '')
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256'))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '300'))
+    
+    INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', 'true').lower() == 'true'
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '500'))
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', '100'))
+    SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'true').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    
     SESSION_COOKIE_SECURE = False
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
@@ -28,11 +39,57 @@ class Config:
     MPESA_PASSKEY = os.getenv('MPESA_PASSKEY', '')
     MPESA_CALLBACK_URL = os.getenv('MPESA_CALLBACK_URL', '')
     MPESA_ENVIRONMENT = os.getenv('MPESA_ENVIRONMENT', 'sandbox')
+    MPESA_BASE_URL = os.getenv('MPESA_BASE_URL', '')
+    MPESA_CONNECT_TIMEOUT = float(os.getenv('MPESA_CONNECT_TIMEOUT', '5'))
+    MPESA_READ_TIMEOUT = float(os.getenv('MPESA_READ_TIMEOUT', '30'))
+    MPESA_HTTP_POOL_SIZE = int(os.getenv('MPESA_HTTP_POOL_SIZE', '20'))
+    MPESA_INBOX_WORKERS = int(os.getenv('MPESA_INBOX_WORKERS', '2'))
+    MPESA_INBOX_BATCH_SIZE = int(os.getenv('MPESA_INBOX_BATCH_SIZE', '100'))
+    MPESA_INBOX_MAX_ATTEMPTS = int(os.getenv('MPESA_INBOX_MAX_ATTEMPTS', '5'))
+    MPESA_INBOX_POLL_INTERVAL = float(os.getenv('MPESA_INBOX_POLL_INTERVAL', '5'))
+    MPESA_INBOX_CLAIM_TIMEOUT = int(os.getenv('MPESA_INBOX_CLAIM_TIMEOUT', '300'))
+    MPESA_CAMPAIGN_CONCURRENCY = int(os.getenv('MPESA_CAMPAIGN_CONCURRENCY', '8'))
+    MPESA_CAMPAIGN_RATE_PER_SECOND = float(os.getenv('MPESA_CAMPAIGN_RATE_PER_SECOND', '5'))
+    MPESA_CAMPAIGN_WORKERS = int(os.getenv('MPESA_CAMPAIGN_WORKERS', '1'))
+    MPESA_CAMPAIGN_BATCH_SIZE = int(os.getenv('MPESA_CAMPAIGN_BATCH_SIZE', '20'))
+    MPESA_CAMPAIGN_POLL_INTERVAL = float(os.getenv('MPESA_CAMPAIGN_POLL_INTERVAL', '5'))
+    MPESA_CAMPAIGN_CLAIM_TIMEOUT = int(os.getenv('MPESA_CAMPAIGN_CLAIM_TIMEOUT', '300'))
     
     SMS_PROVIDER = os.getenv('SMS_PROVIDER', 'twilio')
     TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID', '')
     TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN', '')
     TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER', '')
+    SMS_MOCK_LATENCY = float(os.getenv('SMS_MOCK_LATENCY', '0'))
+    SMS_FALLBACK_PROVIDER = os.getenv('SMS_FALLBACK_PROVIDER', '')
+    AFRICASTALKING_USERNAME = os.getenv('AFRICASTALKING_USERNAME', '')
+    AFRICASTALKING_API_KEY = os.getenv('AFRICASTALKING_API_KEY', '')
+    AFRICASTALKING_SENDER_ID = os.getenv('AFRICASTALKING_SENDER_ID', '')
+    AFRICASTALKING_BASE_URL = os.getenv('AFRICASTALKING_BASE_URL', '')
+    SMS_RATE_PER_SECOND = float(os.getenv('SMS_RATE_PER_SECOND', '10'))
+    TWILIO_RATE_PER_SECOND = float(os.getenv('TWILIO_RATE_PER_SECOND', '1'))
+    AFRICASTALKING_RATE_PER_SECOND = float(os.getenv('AFRICASTALKING_RATE_PER_SECOND', '10'))
+    SMS_RATE_LIMIT_WAIT = float(os.getenv('SMS_RATE_LIMIT_WAIT', '1'))
+    SMS_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('SMS_CIRCUIT_FAILURE_THRESHOLD', '5'))
+    SMS_CIRCUIT_RESET_TIMEOUT = int(os.getenv('SMS_CIRCUIT_RESET_TIMEOUT', '30'))
+    SMS_CONNECT_TIMEOUT = float(os.getenv('SMS_CONNECT_TIMEOUT', '5'))
+    SMS_READ_TIMEOUT = float(os.getenv('SMS_READ_TIMEOUT', '15'))
+    SMS_HTTP_POOL_SIZE = int(os.getenv('SMS_HTTP_POOL_SIZE', '10'))
+    TEMPLATE_LOOKUP_TTL = int(os.getenv('TEMPLATE_LOOKUP_TTL', '60'))
+    
+    SMS_OUTBOX_WORKERS = int(os.getenv('SMS_OUTBOX_WORKERS', '2'))
+    SMS_OUTBOX_BATCH_SIZE = int(os.getenv('SMS_OUTBOX_BATCH_SIZE', '10'))
+    SMS_OUTBOX_MAX_ATTEMPTS = int(os.getenv('SMS_OUTBOX_MAX_ATTEMPTS', '5'))
+    SMS_OUTBOX_RETRY_BASE = int(os.getenv('SMS_OUTBOX_RETRY_BASE', '30'))
+    SMS_OUTBOX_POLL_INTERVAL = float(os.getenv('SMS_OUTBOX_POLL_INTERVAL', '5'))
+    SMS_OUTBOX_CLAIM_TIMEOUT = int(os.getenv('SMS_OUTBOX_CLAIM_TIMEOUT', '300'))
+    
+    RENT_DUE_DAY = int(os.getenv('RENT_DUE_DAY', '1'))
+    RENT_REMINDER_POLICIES = os.getenv('RENT_REMINDER_POLICIES', 'pre_due:-3,due:0,overdue:7')
+    RENT_REMINDER_CATCH_UP_DAYS = int(os.getenv('RENT_REMINDER_CATCH_UP_DAYS', '2'))
+    RENT_REMINDER_BATCH_SIZE = int(os.getenv('RENT_REMINDER_BATCH_SIZE', '500'))
+    
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '1000'))
+    INVOICE_BATCH_SIZE = int(os.getenv('INVOICE_BATCH_SIZE', '1000'))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -42,6 +99,8 @@ class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
     SESSION_COOKIE_SECURE = True
+    # Per-request timings tell anyone watching responses where the slow queries are.
+    SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'false').lower() == 'true'
 
 config = {
     'development': DevelopmentConfig,
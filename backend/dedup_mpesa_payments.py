@@ -0,0 +1,67 @@
+from app import create_app, db
+from app.models.payment import Payment
+from app.models.alert import Alert
+from app.services.ledger_service import LedgerService
+from app.services.invoice_service import InvoiceService
+from sqlalchemy import func
+import argparse
+
+app = create_app('development')
+
+def find_duplicates():
+    duplicates = db.session.query(
+        Payment.transaction_reference,
+        func.count(Payment.id).label('copies'),
+        func.min(Payment.id).label('keep_id')
+    ).filter(
+        Payment.payment_method == 'M-PESA',
+        Payment.transaction_reference.isnot(None),
+        Payment.transaction_reference != ''
+    ).group_by(Payment.transaction_reference).having(func.count(Payment.id) > 1).all()
+    return duplicates
+
+def dedup_payments(apply=False):
+    with app.app_context():
+        duplicates = find_duplicates()
+        extra_rows = sum(d.copies - 1 for d in duplicates)
+        print(f'Found {len(duplicates)} duplicated M-PESA receipts ({extra_rows} extra payment rows)')
+        for d in duplicates:
+            print(f'  {d.transaction_reference}: {d.copies} copies, keeping payment #{d.keep_id}')
+
+        if not apply or not duplicates:
+            if duplicates:
+                print('\nRun again with --apply to delete the extra rows.')
+            return
+
+        extras_by_reference = {d.transaction_reference: Payment.query.filter(
+            Payment.payment_method == 'M-PESA',
+            Payment.transaction_reference == d.transaction_reference,
+            Payment.id != d.keep_id
+        ).all() for d in duplicates}
+        tenant_ids = {payment.tenant_id for extras in extras_by_reference.values() for payment in extras}
+        # Allocations reference the payments about to be deleted.
+        invoice_service = InvoiceService()
+        invoice_service.reset_allocations(tenant_ids)
+
+        for d in duplicates:
+            extras = extras_by_reference[d.transaction_reference]
+            for payment in extras:
+                Alert.query.filter_by(related_payment_id=payment.id).update(
+                    {'related_payment_id': d.keep_id}, synchronize_session=False
+                )
+                db.session.delete(payment)
+
+        db.session.flush()
+        if tenant_ids:
+            LedgerService().rebuild(tenant_ids=sorted(tenant_ids))
+            invoice_service.allocate(tenant_ids)
+
+        db.session.commit()
+        print(f'✓ Removed {extra_rows} duplicate payments and rebuilt the ledger for {len(tenant_ids)} tenants')
+        print('Run migrate.py to add the unique index uq_payments_mpesa_reference')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Find and remove duplicate M-PESA payments')
+    parser.add_argument('--apply', action='store_true', help='delete the duplicate rows')
+    args = parser.parse_args()
+    dedup_payments(apply=args.apply)
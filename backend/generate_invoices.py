@@ -0,0 +1,34 @@
+from app import create_app, db
+from app.services.invoice_service import InvoiceService
+from app.services.ledger_service import period_index, period_of
+import argparse
+
+app = create_app('development')
+
+def parse_period(value):
+    year, month = value.split('-')
+    if not 1 <= int(month) <= 12:
+        raise argparse.ArgumentTypeError('period must be YYYY-MM')
+    return int(year), int(month)
+
+def generate_invoices(period=None, since=None, dry_run=False):
+    with app.app_context():
+        invoice_service = InvoiceService()
+        last = period or (invoice_service.today.year, invoice_service.today.month)
+        first = since or last
+        for index in range(period_index(*first), period_index(*last) + 1):
+            year, month = period_of(index)
+            summary = invoice_service.generate(year, month, dry_run=dry_run)
+            if not dry_run:
+                db.session.commit()
+            action = 'Would create' if dry_run else 'Created'
+            print(f"✓ {year}-{month:02d}: {action} {summary['created']} of {summary['billable']} invoices"
+                  + (f", {summary['allocated']} payment allocations" if not dry_run else ''))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Issue monthly rent invoices (idempotent; safe to run daily from cron to pick up new move-ins)')
+    parser.add_argument('--period', type=parse_period, help='YYYY-MM to invoice (default: this month)')
+    parser.add_argument('--since', type=parse_period, help='also backfill every month from this YYYY-MM')
+    parser.add_argument('--dry-run', action='store_true', help='count the invoices without creating them')
+    args = parser.parse_args()
+    generate_invoices(args.period, args.since, args.dry_run)
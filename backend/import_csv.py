@@ -0,0 +1,30 @@
+from app import create_app
+from app.services.import_service import ImportService
+import argparse
+import json
+
+app = create_app('development')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk import tenants or payments from a CSV file')
+    parser.add_argument('kind', choices=['tenants', 'payments'])
+    parser.add_argument('path')
+    parser.add_argument('--dry-run', action='store_true', help='validate every row without writing anything')
+    parser.add_argument('--batch-size', type=int, help='rows per executemany batch (default IMPORT_BATCH_SIZE)')
+    parser.add_argument('--report', help='write the full per-row error report to this JSON file')
+    args = parser.parse_args()
+
+    with app.app_context(), open(args.path, encoding='utf-8-sig', newline='') as stream:
+        import_service = ImportService(batch_size=args.batch_size)
+        importer = import_service.import_tenants if args.kind == 'tenants' else import_service.import_payments
+        report = importer(stream, dry_run=args.dry_run).to_dict()
+
+    action = 'Validated' if args.dry_run else 'Imported'
+    print(f"✓ {action} {report['imported']} of {report['rows']} {args.kind} "
+          f"({report['duplicates']} duplicates, {report['error_count']} rows with errors)")
+    for error in report['errors'][:20]:
+        print(f"  row {error['row']}: {error['error']}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Full report written to {args.report}')
@@ -1,4 +1,4 @@
-from app import create_app, db
+from app import create_app, db, migrations
 from app.models.user import User
 from app.models.tenant import Tenant
 from app.models.template import Template
@@ -9,7 +9,9 @@ app = create_app('development')
 
 def init_sample_data():
     with app.app_context():
-        db.create_all()
+        if migrations.pending(db.engine):
+            print('✗ The schema is not up to date; run migrate.py first')
+            return
         
         if User.query.count() == 0:
             admin = User(
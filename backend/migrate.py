@@ -0,0 +1,29 @@
+from app import create_app, db
+from app import migrations
+import argparse
+import sys
+
+app = create_app('development')
+
+def migrate(target=None, show_status=False):
+    with app.app_context():
+        if show_status:
+            for version, name, applied_at in migrations.status(db.engine):
+                state = f'applied {applied_at:%Y-%m-%d %H:%M}' if applied_at else 'pending'
+                print(f'{version}_{name}: {state}')
+            return 0
+
+        try:
+            applied = migrations.upgrade(db.engine, target=target)
+        except migrations.MigrationError as e:
+            print(f'✗ {e}')
+            return 1
+        print(f'✓ Applied {len(applied)} migrations' if applied else '✓ Schema is up to date')
+        return 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply pending schema migrations from app/migrations')
+    parser.add_argument('--to', dest='target', help='stop after this version, e.g. 0007')
+    parser.add_argument('--status', action='store_true', help='list applied and pending migrations')
+    args = parser.parse_args()
+    sys.exit(migrate(args.target, args.status))
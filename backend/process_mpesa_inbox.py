@@ -0,0 +1,34 @@
+from app import create_app, db
+from app.services.mpesa_inbox_service import MpesaInboxService
+import argparse
+import time
+
+app = create_app('development')
+
+def process_inbox(loop=False, interval=5):
+    with app.app_context():
+        inbox_service = MpesaInboxService()
+        while True:
+            processed = inbox_service.drain()
+            if processed:
+                print(f'✓ Processed {processed} M-PESA inbox entries')
+            if not loop:
+                break
+            time.sleep(interval)
+
+def reprocess(entry_ids=None):
+    with app.app_context():
+        count = MpesaInboxService().reprocess(entry_ids)
+        print(f'✓ Reset {count} poison inbox entries to pending')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Drain the M-PESA callback inbox')
+    parser.add_argument('--loop', action='store_true', help='keep polling instead of exiting when the inbox is empty')
+    parser.add_argument('--interval', type=float, default=5)
+    parser.add_argument('--reprocess', nargs='*', type=int, metavar='ID',
+                        help='reset poison entries (all, or the given ids) to pending before draining')
+    args = parser.parse_args()
+
+    if args.reprocess is not None:
+        reprocess(args.reprocess or None)
+    process_inbox(loop=args.loop, interval=args.interval)
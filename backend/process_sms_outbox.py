@@ -0,0 +1,24 @@
+from app import create_app
+from app.services.sms_outbox_service import SMSOutboxService
+import argparse
+import time
+
+app = create_app('development')
+
+def process_outbox(loop=False, interval=5):
+    with app.app_context():
+        outbox_service = SMSOutboxService()
+        while True:
+            processed = outbox_service.drain()
+            if processed:
+                print(f'✓ Attempted {processed} queued SMS messages')
+            if not loop:
+                break
+            time.sleep(interval)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Deliver queued SMS messages')
+    parser.add_argument('--loop', action='store_true', help='keep polling instead of exiting when the outbox is empty')
+    parser.add_argument('--interval', type=float, default=5)
+    args = parser.parse_args()
+    process_outbox(loop=args.loop, interval=args.interval)
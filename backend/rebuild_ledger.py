@@ -0,0 +1,17 @@
+from app import create_app, db
+from app.services.ledger_service import LedgerService
+import argparse
+
+app = create_app('development')
+
+def rebuild_ledger(tenant_ids=None):
+    with app.app_context():
+        count = LedgerService().rebuild(tenant_ids=tenant_ids)
+        db.session.commit()
+        print(f'✓ Rebuilt {count} tenant month balances')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild the tenant_month_balance rollup and payment statuses from payments')
+    parser.add_argument('--tenant', type=int, nargs='*', dest='tenant_ids', help='Only these tenant ids (default: all)')
+    args = parser.parse_args()
+    rebuild_ledger(tenant_ids=args.tenant_ids or None)
@@ -0,0 +1,17 @@
+from app import create_app, db
+from app.services.search_service import SearchService
+import argparse
+
+app = create_app('development')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Create the tenant/payment search index if needed and repopulate it')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        search_service = SearchService()
+        search_service.install()
+        count = search_service.rebuild(batch_size=args.batch_size)
+        db.session.commit()
+        print(f'✓ Indexed {count} search documents ({search_service.dialect})')
@@ -22,7 +22,4 @@ def make_shell_context():
     }
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-    
     app.run(host='0.0.0.0', port=8000, debug=True)
@@ -0,0 +1,31 @@
+from app import create_app
+from app.services.reminder_service import ReminderService
+from datetime import date
+import argparse
+import time
+
+app = create_app('development')
+
+def send_reminders(today=None, dry_run=False):
+    with app.app_context():
+        summary = ReminderService(today=today).run(dry_run=dry_run)
+        if not summary:
+            print('No reminder policy is due today')
+        for item in summary:
+            action = 'Would queue' if dry_run else 'Queued'
+            print(f"✓ {item['policy']} (due {item['due_date']}): {action} {item['queued']} of {item['targets']} "
+                  f"tenants, {item['already_reminded']} already reminded")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Queue rent reminders for every policy due today (safe to run from cron on several nodes)')
+    parser.add_argument('--date', type=date.fromisoformat, help='run as if today were this YYYY-MM-DD date')
+    parser.add_argument('--dry-run', action='store_true', help='report the targets without queueing anything')
+    parser.add_argument('--loop', action='store_true', help='stay running and repeat every --interval seconds')
+    parser.add_argument('--interval', type=float, default=3600)
+    args = parser.parse_args()
+
+    while True:
+        send_reminders(args.date, args.dry_run)
+        if not args.loop:
+            break
+        time.sleep(args.interval)
@@ -43,7 +43,7 @@ export default function Messaging() {
 
   const fetchTenants = async () => {
     try {
-      const response = await api.get('/tenants')
+      const response = await api.get('/tenants', { params: { fields: 'full_name,unit_number,phone', sort: 'full_name' } })
       setTenants(response.data.tenants)
     } catch (error) {
       console.error('Failed to fetch tenants:', error)
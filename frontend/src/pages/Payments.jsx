@@ -24,7 +24,7 @@ export default function Payments() {
 
   const fetchPayments = async () => {
     try {
-      const response = await api.get('/payments')
+      const response = await api.get('/payments', { params: { all: true } })
       setPayments(response.data.payments)
     } catch (error) {
       console.error('Failed to fetch payments:', error)
@@ -33,7 +33,7 @@ export default function Payments() {
 
   const fetchTenants = async () => {
     try {
-      const response = await api.get('/tenants')
+      const response = await api.get('/tenants', { params: { fields: 'full_name,unit_number', sort: 'full_name' } })
       setTenants(response.data.tenants)
     } catch (error) {
       console.error('Failed to fetch tenants:', error)
@@ -2,6 +2,8 @@
 
 echo "Starting Property Management System..."
 
+python backend/migrate.py || exit 1
+
 python backend/run.py &
 BACKEND_PID=$!
 